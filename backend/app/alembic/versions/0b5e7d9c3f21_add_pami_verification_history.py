@@ -0,0 +1,65 @@
+"""Add PAMI verification history
+
+Revision ID: 0b5e7d9c3f21
+Revises: f7c2d5e8a914
+Create Date: 2026-10-18 21:14:52.630981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '0b5e7d9c3f21'
+down_revision = 'f7c2d5e8a914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pamiverificationrun',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('owner_id', sa.Uuid(), nullable=False),
+    sa.Column('job_id', sa.Uuid(), nullable=True),
+    sa.Column('origen', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('nombre_archivo', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('motor', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('total_urls', sa.Integer(), nullable=False),
+    sa.Column('urls_coincidentes', sa.Integer(), nullable=False),
+    sa.Column('urls_no_coincidentes', sa.Integer(), nullable=False),
+    sa.Column('urls_con_error', sa.Integer(), nullable=False),
+    sa.Column('urls_sin_verificar', sa.Integer(), nullable=False),
+    sa.Column('verificado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['job_id'], ['pamiverificationjob.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pamiverificationrun_verificado_en'), 'pamiverificationrun', ['verificado_en'], unique=False)
+    op.create_table('pamiverificationrecord',
+    sa.Column('run_id', sa.Uuid(), nullable=False),
+    sa.Column('posicion', sa.Integer(), nullable=False),
+    sa.Column('url_id', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('paciente', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('fecha', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.Column('estado', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('categoria', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.Column('clase_error', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True),
+    sa.Column('verificado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['run_id'], ['pamiverificationrun.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('run_id', 'posicion')
+    )
+    op.create_index(op.f('ix_pamiverificationrecord_url_id'), 'pamiverificationrecord', ['url_id'], unique=False)
+    op.create_index(op.f('ix_pamiverificationrecord_paciente'), 'pamiverificationrecord', ['paciente'], unique=False)
+    op.create_index(op.f('ix_pamiverificationrecord_estado'), 'pamiverificationrecord', ['estado'], unique=False)
+    op.create_index(op.f('ix_pamiverificationrecord_verificado_en'), 'pamiverificationrecord', ['verificado_en'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_pamiverificationrecord_verificado_en'), table_name='pamiverificationrecord')
+    op.drop_index(op.f('ix_pamiverificationrecord_estado'), table_name='pamiverificationrecord')
+    op.drop_index(op.f('ix_pamiverificationrecord_paciente'), table_name='pamiverificationrecord')
+    op.drop_index(op.f('ix_pamiverificationrecord_url_id'), table_name='pamiverificationrecord')
+    op.drop_table('pamiverificationrecord')
+    op.drop_index(op.f('ix_pamiverificationrun_verificado_en'), table_name='pamiverificationrun')
+    op.drop_table('pamiverificationrun')
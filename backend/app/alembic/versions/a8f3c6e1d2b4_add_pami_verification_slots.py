@@ -0,0 +1,40 @@
+"""Add PAMI verification slots
+
+Revision ID: a8f3c6e1d2b4
+Revises: 0b5e7d9c3f21
+Create Date: 2026-10-18 23:02:17.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8f3c6e1d2b4'
+down_revision = '0b5e7d9c3f21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pamiverificationslot',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('owner_id', sa.Uuid(), nullable=False),
+    sa.Column('total_urls', sa.Integer(), nullable=False),
+    sa.Column('creado_en', sa.DateTime(), nullable=False),
+    sa.Column('actualizado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pamiverificationslot_actualizado_en'), 'pamiverificationslot', ['actualizado_en'], unique=False)
+    # Las verificaciones en línea ocupaban filas de pamiverificationjob sin archivo de entrada
+    op.execute(
+        "DELETE FROM pamiverificationjob WHERE archivo_entrada IS NULL AND estado = 'en_proceso' "
+        "AND NOT EXISTS (SELECT 1 FROM pamiverificationresult WHERE job_id = pamiverificationjob.id)"
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_pamiverificationslot_actualizado_en'), table_name='pamiverificationslot')
+    op.drop_table('pamiverificationslot')
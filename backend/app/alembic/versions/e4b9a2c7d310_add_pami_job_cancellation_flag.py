@@ -0,0 +1,28 @@
+"""Add PAMI job cancellation flag
+
+Revision ID: e4b9a2c7d310
+Revises: c1d7f3a8e5b2
+Create Date: 2026-10-18 18:05:12.418230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b9a2c7d310'
+down_revision = 'c1d7f3a8e5b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'pamiverificationjob',
+        sa.Column('cancelacion_solicitada', sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+
+
+def downgrade():
+    op.drop_column('pamiverificationjob', 'cancelacion_solicitada')
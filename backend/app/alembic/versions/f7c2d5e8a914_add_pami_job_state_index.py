@@ -0,0 +1,27 @@
+"""Add PAMI job state index for the scheduler queue
+
+Revision ID: f7c2d5e8a914
+Revises: e4b9a2c7d310
+Create Date: 2026-10-18 19:42:37.105482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c2d5e8a914'
+down_revision = 'e4b9a2c7d310'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        op.f('ix_pamiverificationjob_estado'), 'pamiverificationjob', ['estado'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_pamiverificationjob_estado'), table_name='pamiverificationjob')
@@ -1,74 +1,181 @@
+import io
+import json
 import logging
-from typing import Any
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+import re
+import uuid
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing
+from datetime import datetime
+from typing import Annotated, Any, Literal
 
-from app.api.deps import CurrentUser
-from app.models import PAMIVerificationRequest, PAMIVerificationResponse
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+)
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from sqlmodel import col, func, select
+
+from app import crud
+from app.api.deps import CurrentUser, SessionDep
+from app.core.config import settings
+from app.models import (
+    PAMIVerificationHistoryPublic,
+    PAMIVerificationJob,
+    PAMIVerificationJobPublic,
+    PAMIVerificationJobsPublic,
+    PAMIVerificationRecordPublic,
+    PAMIVerificationRequest,
+    PAMIVerificationResponse,
+)
+from app.services.pami_artifact_store import ArtefactoPAMI, artifact_store
+from app.services.pami_browser_pool import browser_pool
+from app.services.pami_classifier import PredicadoInvalido, validar_predicados
+from app.services.pami_ingestion import EXTENSIONES_ACEPTADAS
+from app.services.pami_jobs import construir_job_publico, job_reanudable, job_runner
+from app.services.pami_scheduler import job_scheduler, posiciones_en_cola
+from app.services.pami_streaming import (
+    MEDIA_TYPES,
+    FormatoStream,
+    stream_job,
+    stream_verificacion,
+)
 from app.services.pami_verification_service import PAMIVerificationService
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/pami-verification", tags=["pami-verification"])
 
+# Un solo rango de bytes: "bytes=inicio-fin", "bytes=inicio-" o "bytes=-sufijo"
+RANGO_BYTES = re.compile(r"bytes=([0-9]*)-([0-9]*)", re.IGNORECASE)
 
-@router.post("/verify-excel", response_model=PAMIVerificationResponse)
-async def verificar_excel_pami(
-    current_user: CurrentUser,
-    archivo_excel: UploadFile = File(..., description="Archivo Excel con URLs de PAMI"),
+# Estados guardados en el historial (las filas sin verificar no se guardan)
+EstadoHistorial = Literal["coincide", "no_coincide", "error"]
+
+
+def parametros_verificacion(
     columna_urls: str = Form(default="Id", description="Nombre de la columna que contiene las URLs/IDs"),
     columnas_adicionales: str = Form(
         default="Paciente,Fecha,F. Alta,Observacion,Diagnostico,Motivo",
         description="Columnas adicionales separadas por comas"
     ),
-    batch_size: int = Form(default=10, description="Tamaño del bloque de pestañas a procesar"),
-    delay_seconds: int = Form(default=1, description="Tiempo de espera en segundos entre bloques")
+    batch_size: int = Form(
+        default=10, description="Concurrencia inicial; el controlador adaptativo la ajusta durante la corrida"
+    ),
+    engine: Literal["browser", "http", "auto"] = Form(
+        default=settings.PAMI_DEFAULT_ENGINE,
+        description="Motor de verificación: browser, http o auto (HTTP con respaldo del navegador)"
+    ),
+    force_refresh: bool = Form(
+        default=False, description="Ignorar la caché de veredictos y volver a verificar todos los IDs"
+    ),
+    procesos: int | None = Form(
+        default=None, ge=1,
+        description="Procesos que verifican en paralelo, cada uno con su navegador y sesión (vacío: automático)"
+    ),
+    formato_salida: Literal["xlsx", "csv", "parquet"] = Form(
+        default="xlsx", description="Formato del archivo de resultados: xlsx, csv o parquet"
+    ),
+    predicados: str | None = Form(
+        default=None,
+        description=(
+            'Predicados para clasificar las páginas, en JSON y en orden de prioridad: '
+            '{"rechazada": "Rechazada", "pendiente": "re:Pendiente de (?:auditoría|aprobación)"}'
+        )
+    )
+) -> PAMIVerificationRequest:
+    """Arma la configuración de la verificación a partir de los campos del formulario"""
+    columnas_list = [col.strip() for col in columnas_adicionales.split(",") if col.strip()]
+    predicados_dict = parsear_predicados(predicados) if predicados else None
+
+    return PAMIVerificationRequest(
+        columna_urls=columna_urls,
+        columnas_adicionales=columnas_list,
+        batch_size=batch_size,
+        engine=engine,
+        force_refresh=force_refresh,
+        procesos=procesos,
+        formato_salida=formato_salida,
+        predicados=predicados_dict
+    )
+
+
+def parsear_predicados(predicados: str) -> dict[str, str]:
+    """Valida el JSON de predicados del formulario antes de iniciar la verificación"""
+    try:
+        valor = json.loads(predicados)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"predicados no es un JSON válido: {e}")
+    if not isinstance(valor, dict) or not all(
+        isinstance(nombre, str) and isinstance(patron, str) for nombre, patron in valor.items()
+    ):
+        raise HTTPException(status_code=400, detail='predicados debe ser un objeto {"nombre": "patrón"}')
+    try:
+        validar_predicados(valor)
+    except PredicadoInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return valor
+
+
+def validar_archivo_excel(archivo_excel: UploadFile) -> None:
+    """Valida que se haya subido una planilla Excel o CSV"""
+    if not archivo_excel.filename:
+        raise HTTPException(status_code=400, detail="No se proporcionó un archivo")
+
+    if not archivo_excel.filename.lower().endswith(EXTENSIONES_ACEPTADAS):
+        raise HTTPException(
+            status_code=400,
+            detail="El archivo debe ser un Excel válido (.xlsx o .xls) o un CSV"
+        )
+
+
+@router.post("/verify-excel", response_model=PAMIVerificationResponse)
+async def verificar_excel_pami(
+    current_user: CurrentUser,
+    request_data: Annotated[PAMIVerificationRequest, Depends(parametros_verificacion)],
+    archivo_excel: UploadFile = File(..., description="Archivo Excel con URLs de PAMI"),
+    incluir_base64: bool = Query(
+        default=False, description="Incluir también los archivos en base64 en la respuesta (compatibilidad)"
+    )
 ) -> Any:
     """
     Verifica URLs de PAMI desde un archivo Excel.
     
     Recibe un archivo Excel con URLs/IDs de PAMI, las verifica usando Playwright,
-    y devuelve archivos HTML y Excel con los resultados procesados.
+    y guarda los archivos HTML y Excel de resultados en el almacén de artefactos.
+    La verificación ocupa un lugar de los mismos topes que los trabajos encolados
+    y, si no hay lugar, espera su turno.
     
     Args:
         archivo_excel: Archivo Excel con las URLs a verificar
-        columna_urls: Nombre de la columna que contiene las URLs/IDs  
-        columnas_adicionales: Lista de columnas adicionales separadas por comas
-        batch_size: Cantidad de URLs a procesar en paralelo
-        delay_seconds: Tiempo de espera entre lotes de procesamiento
+        request_data: Configuración de la verificación (columna de URLs, columnas
+            adicionales, concurrencia inicial y motor)
+        incluir_base64: Devolver además los archivos codificados en base64
     
     Returns:
-        PAMIVerificationResponse con archivos procesados y estadísticas
+        PAMIVerificationResponse con ids y URLs de descarga de los archivos y estadísticas
     """
-    
-    # Validar archivo
-    if not archivo_excel.filename:
-        raise HTTPException(status_code=400, detail="No se proporcionó un archivo")
-    
-    if not archivo_excel.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(
-            status_code=400, 
-            detail="El archivo debe ser un Excel válido (.xlsx o .xls)"
-        )
+    validar_archivo_excel(archivo_excel)
+    # La planilla se lee una sola vez: da el tamaño para el planificador y se verifica tal cual
+    df_datos = await PAMIVerificationService.leer_datos(archivo_excel.file, request_data)
     
     logger.info(f"Usuario {current_user.email} inició verificación PAMI con archivo: {archivo_excel.filename}")
     
     try:
-        # Preparar configuración
-        columnas_list = [col.strip() for col in columnas_adicionales.split(",") if col.strip()]
-        
-        request_data = PAMIVerificationRequest(
-            columna_urls=columna_urls,
-            columnas_adicionales=columnas_list,
-            batch_size=batch_size,
-            delay_seconds=delay_seconds
-        )
-        
-        # Procesar archivo
-        resultado = await PAMIVerificationService.verificar_excel_pami(
-            archivo_excel.file, 
-            request_data
-        )
+        # Procesar archivo cuando el planificador le da lugar
+        async with job_scheduler.turno_en_linea(current_user.id, len(df_datos)):
+            resultado = await PAMIVerificationService.verificar_excel_pami(
+                df_datos,
+                request_data,
+                owner_id=current_user.id,
+                incluir_base64=incluir_base64,
+                nombre_archivo=archivo_excel.filename or ""
+            )
         
         logger.info(f"Verificación PAMI completada para usuario {current_user.email}")
         logger.info(f"Estadísticas: {resultado.estadisticas.model_dump()}")
@@ -85,6 +192,377 @@ async def verificar_excel_pami(
         )
 
 
+def respuesta_stream(eventos: Any, formato: FormatoStream) -> StreamingResponse:
+    """Respuesta en streaming sin caché ni buffering de proxies intermedios"""
+    return StreamingResponse(
+        eventos,
+        media_type=MEDIA_TYPES[formato],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/verify-stream")
+async def verificar_excel_pami_stream(
+    current_user: CurrentUser,
+    request_data: Annotated[PAMIVerificationRequest, Depends(parametros_verificacion)],
+    archivo_excel: UploadFile = File(..., description="Archivo Excel con URLs de PAMI"),
+    formato: FormatoStream = Query(default="ndjson", description="ndjson o sse")
+) -> StreamingResponse:
+    """
+    Verifica URLs de PAMI y emite un registro por ID a medida que se verifica.
+
+    Cada registro tiene id, coincide, error, latencia_ms y clase_error; el último
+    evento ("fin") trae las estadísticas de la corrida. Como /verify-excel, la
+    verificación espera un lugar del planificador antes de empezar.
+    """
+    validar_archivo_excel(archivo_excel)
+    nombre_archivo = archivo_excel.filename or ""
+    df_datos = await PAMIVerificationService.leer_datos(archivo_excel.file, request_data)
+
+    async def eventos() -> AsyncIterator[str]:
+        async with job_scheduler.turno_en_linea(current_user.id, len(df_datos)):
+            # aclosing: si el cliente se desconecta, la verificación se cancela antes de liberar el lugar
+            async with aclosing(
+                stream_verificacion(
+                    df_datos, request_data, formato, owner_id=current_user.id, nombre_archivo=nombre_archivo
+                )
+            ) as stream:
+                async for evento in stream:
+                    yield evento
+
+    logger.info(f"Usuario {current_user.email} inició verificación PAMI en streaming con archivo: {archivo_excel.filename}")
+    return respuesta_stream(eventos(), formato)
+
+
+@router.post("/jobs", response_model=PAMIVerificationJobPublic, status_code=202)
+async def crear_job_verificacion(
+    session: SessionDep,
+    current_user: CurrentUser,
+    request_data: Annotated[PAMIVerificationRequest, Depends(parametros_verificacion)],
+    archivo_excel: UploadFile = File(..., description="Archivo Excel con URLs de PAMI")
+) -> Any:
+    """
+    Encola una verificación PAMI en segundo plano y devuelve el trabajo creado.
+
+    El planificador la ejecuta cuando hay lugar (tope global y por usuario), dando
+    prioridad a los trabajos con menos IDs; mientras espera, el trabajo queda
+    "pendiente" con su posicion_cola. El progreso se consulta con GET /jobs/{id} y
+    los archivos se descargan desde /jobs/{id}/excel y /jobs/{id}/html cuando termina.
+    """
+    validar_archivo_excel(archivo_excel)
+    contenido = await archivo_excel.read()
+    total_urls = await PAMIVerificationService.contar_ids(io.BytesIO(contenido), request_data)
+
+    job = crud.create_pami_verification_job(
+        session=session,
+        owner_id=current_user.id,
+        nombre_archivo=archivo_excel.filename or "",
+        request_data=request_data,
+        archivo_entrada=contenido,
+        total_urls=total_urls
+    )
+    job_scheduler.despertar()
+
+    logger.info(
+        f"Usuario {current_user.email} encoló el trabajo PAMI {job.id} ({total_urls} IDs) "
+        f"con archivo: {archivo_excel.filename}"
+    )
+    return construir_job_publico(job, posiciones_en_cola(session).get(job.id))
+
+
+@router.get("/jobs", response_model=PAMIVerificationJobsPublic)
+def listar_jobs_verificacion(
+    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+) -> Any:
+    """
+    Lista los trabajos de verificación del usuario (todos para superusuarios).
+    """
+    count_statement = select(func.count()).select_from(PAMIVerificationJob)
+    statement = select(PAMIVerificationJob)
+    if not current_user.is_superuser:
+        count_statement = count_statement.where(PAMIVerificationJob.owner_id == current_user.id)
+        statement = statement.where(PAMIVerificationJob.owner_id == current_user.id)
+
+    count = session.exec(count_statement).one()
+    jobs = session.exec(
+        statement.order_by(col(PAMIVerificationJob.creado_en).desc()).offset(skip).limit(limit)
+    ).all()
+    posiciones = posiciones_en_cola(session) if any(job.estado == "pendiente" for job in jobs) else {}
+
+    return PAMIVerificationJobsPublic(
+        data=[construir_job_publico(job, posiciones.get(job.id)) for job in jobs], count=count
+    )
+
+
+def obtener_job(session: SessionDep, current_user: CurrentUser, job_id: uuid.UUID) -> PAMIVerificationJob:
+    """Obtiene un trabajo validando que pertenezca al usuario"""
+    job = session.get(PAMIVerificationJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    if not current_user.is_superuser and (job.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=PAMIVerificationJobPublic)
+def leer_job_verificacion(
+    session: SessionDep,
+    job: Annotated[PAMIVerificationJob, Depends(obtener_job)]
+) -> Any:
+    """
+    Estado de un trabajo de verificación: URLs procesadas/total, throughput, ETA y,
+    si todavía espera, su posición en la cola.
+    """
+    posicion_cola = posiciones_en_cola(session).get(job.id) if job.estado == "pendiente" else None
+    return construir_job_publico(job, posicion_cola)
+
+
+@router.get("/jobs/{job_id}/stream")
+def stream_job_verificacion(
+    job: Annotated[PAMIVerificationJob, Depends(obtener_job)],
+    formato: FormatoStream = Query(default="ndjson", description="ndjson o sse")
+) -> StreamingResponse:
+    """
+    Emite los resultados por ID de un trabajo a medida que se guardan.
+
+    Empieza por los resultados ya guardados y termina con un evento "fin" con el
+    estado final del trabajo.
+    """
+    return respuesta_stream(stream_job(job.id, formato), formato)
+
+
+@router.post("/jobs/{job_id}/resume", response_model=PAMIVerificationJobPublic, status_code=202)
+def reanudar_job_verificacion(
+    session: SessionDep,
+    job: Annotated[PAMIVerificationJob, Depends(obtener_job)]
+) -> Any:
+    """
+    Reanuda un trabajo interrumpido o con error sin volver a verificar los IDs ya guardados.
+
+    El trabajo vuelve a la cola del planificador, ordenado por los IDs que le faltan.
+    Los archivos Excel/HTML se regeneran con los resultados guardados más los nuevos.
+    """
+    if not job_reanudable(job):
+        raise HTTPException(status_code=409, detail="El trabajo no se puede reanudar en su estado actual")
+
+    # obtener_job usa la misma sesión: la actualización se ve en `job`
+    crud.update_pami_verification_job(
+        session=session, job_id=job.id,
+        datos={"estado": "pendiente", "mensaje_error": None, "cancelacion_solicitada": False}
+    )
+    job_scheduler.despertar()
+
+    logger.info(f"Trabajo PAMI {job.id} reanudado")
+    return construir_job_publico(job, posiciones_en_cola(session).get(job.id))
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=PAMIVerificationJobPublic, status_code=202)
+def cancelar_job_verificacion(
+    session: SessionDep,
+    job: Annotated[PAMIVerificationJob, Depends(obtener_job)]
+) -> Any:
+    """
+    Cancela un trabajo pendiente o en proceso.
+
+    Se deja de despachar IDs, se cierran las páginas y contextos del navegador y
+    se guardan los archivos con los resultados parciales; el trabajo termina en
+    estado "cancelado" con las estadísticas marcadas como parciales. Si el trabajo
+    corre en otro worker, la cancelación se aplica en su siguiente reporte de progreso.
+    Un trabajo que todavía espera en la cola sale de ella sin ejecutarse.
+    """
+    if job.estado not in ("pendiente", "en_proceso"):
+        raise HTTPException(status_code=409, detail="El trabajo no se puede cancelar en su estado actual")
+
+    datos: dict[str, Any] = {"cancelacion_solicitada": True}
+    huerfano = job.estado == "en_proceso" and job_reanudable(job) and not job_runner.ejecutando(job.id)
+    if job.estado == "pendiente" or huerfano:
+        # Nadie lo está ejecutando (en cola o el worker se reinició): se cancela sin esperar al runner.
+        # Si el planificador lo reclamó recién, el runner ve la marca al empezar y termina cancelado
+        datos.update(
+            {"estado": "cancelado", "finalizado_en": datetime.utcnow(), "concurrencia_actual": None, "tasa_actual": None}
+        )
+    crud.update_pami_verification_job(session=session, job_id=job.id, datos=datos)
+    job_runner.cancelar(job.id)
+
+    logger.info(f"Cancelación solicitada para el trabajo PAMI {job.id}")
+    return construir_job_publico(job)
+
+
+class RangoNoSatisfacible(Exception):
+    """El header Range pide bytes que el archivo no tiene (se responde 416)"""
+
+
+def _parsear_rango(rango: str, tamano: int) -> tuple[int, int] | None:
+    """
+    Interpreta un header Range de un solo rango de bytes.
+
+    Devuelve None si el header no es válido o pide varios rangos: se ignora y se
+    envía el archivo completo (RFC 9110). Si el rango es válido pero no tiene
+    bytes dentro del archivo lanza RangoNoSatisfacible.
+    """
+    coincidencia = RANGO_BYTES.fullmatch(rango.strip())
+    if coincidencia is None:
+        return None
+    inicio_texto, fin_texto = coincidencia.groups()
+    if not inicio_texto:
+        if not fin_texto:
+            return None
+        # Sufijo: los últimos N bytes
+        largo = int(fin_texto)
+        if largo == 0 or tamano == 0:
+            raise RangoNoSatisfacible()
+        return max(0, tamano - largo), tamano - 1
+    inicio = int(inicio_texto)
+    if fin_texto and int(fin_texto) < inicio:
+        return None
+    if inicio >= tamano:
+        raise RangoNoSatisfacible()
+    fin = min(int(fin_texto), tamano - 1) if fin_texto else tamano - 1
+    return inicio, fin
+
+
+def _leer_rango(artefacto: ArtefactoPAMI, inicio: int, fin: int, bloque: int = 64 * 1024) -> Iterator[bytes]:
+    with open(artefacto.ruta, "rb") as archivo:
+        archivo.seek(inicio)
+        restante = fin - inicio + 1
+        while restante > 0:
+            datos = archivo.read(min(bloque, restante))
+            if not datos:
+                break
+            restante -= len(datos)
+            yield datos
+
+
+def respuesta_artefacto(artefacto: ArtefactoPAMI, request: Request) -> Response:
+    """
+    Sirve un artefacto desde disco sin cargarlo en memoria.
+
+    Responde 304 si el ETag coincide con If-None-Match y 206 con el rango pedido
+    si llega un header Range de un solo rango de bytes. Un Range inválido o de
+    varios rangos se ignora (200 con el archivo completo) y uno que empieza
+    después del final del archivo responde 416.
+    """
+    etag = f'"{artefacto.etag}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+
+    etags_cliente = [valor.strip() for valor in request.headers.get("if-none-match", "").split(",")]
+    if etag in etags_cliente or "*" in etags_cliente:
+        return Response(status_code=304, headers=headers)
+
+    rango = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    limites = None
+    if rango and (if_range is None or if_range == etag):
+        try:
+            limites = _parsear_rango(rango, artefacto.tamano)
+        except RangoNoSatisfacible:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{artefacto.tamano}"})
+
+    if limites is not None:
+        inicio, fin = limites
+        return StreamingResponse(
+            _leer_rango(artefacto, inicio, fin),
+            status_code=206,
+            media_type=artefacto.media_type,
+            headers={
+                **headers,
+                "Content-Range": f"bytes {inicio}-{fin}/{artefacto.tamano}",
+                "Content-Length": str(fin - inicio + 1),
+                "Content-Disposition": f'attachment; filename="{artefacto.nombre_archivo}"',
+            }
+        )
+
+    return FileResponse(
+        artefacto.ruta, media_type=artefacto.media_type, filename=artefacto.nombre_archivo, headers=headers
+    )
+
+
+def obtener_artefacto_job(artefacto_id: str | None, job: PAMIVerificationJob) -> ArtefactoPAMI:
+    """Artefacto de un trabajo completado (o cancelado, con resultados parciales), validando que siga disponible"""
+    if job.estado not in ("completado", "cancelado") or artefacto_id is None:
+        raise HTTPException(status_code=409, detail="El trabajo todavía no tiene resultados")
+    artefacto = artifact_store.obtener(artefacto_id)
+    if artefacto is None:
+        raise HTTPException(status_code=410, detail="El archivo ya no está disponible")
+    return artefacto
+
+
+@router.get("/jobs/{job_id}/excel")
+def descargar_excel_job(
+    request: Request,
+    job: Annotated[PAMIVerificationJob, Depends(obtener_job)]
+) -> Response:
+    """
+    Descarga el Excel de resultados de un trabajo completado.
+    """
+    return respuesta_artefacto(obtener_artefacto_job(job.archivo_excel_id, job), request)
+
+
+@router.get("/jobs/{job_id}/html")
+def descargar_html_job(
+    request: Request,
+    job: Annotated[PAMIVerificationJob, Depends(obtener_job)]
+) -> Response:
+    """
+    Descarga el reporte HTML de un trabajo completado.
+    """
+    return respuesta_artefacto(obtener_artefacto_job(job.archivo_html_id, job), request)
+
+
+@router.get("/artifacts/{artefacto_id}")
+def descargar_artefacto(
+    request: Request, current_user: CurrentUser, artefacto_id: str
+) -> Response:
+    """
+    Descarga un archivo generado por una verificación (soporta Range y ETag).
+    """
+    artefacto = artifact_store.obtener(artefacto_id)
+    if artefacto is None:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+    if not current_user.is_superuser and artefacto.owner_id != str(current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return respuesta_artefacto(artefacto, request)
+
+
+@router.get("/history", response_model=PAMIVerificationHistoryPublic)
+def leer_historial_verificacion(
+    session: SessionDep,
+    current_user: CurrentUser,
+    url_id: str | None = Query(default=None, description="ID de autorización"),
+    paciente: str | None = Query(default=None, description="Paciente (coincidencia exacta)"),
+    estado: EstadoHistorial | None = Query(default=None, description="coincide, no_coincide o error"),
+    desde: datetime | None = Query(default=None, description="Verificados a partir de esta fecha (UTC)"),
+    hasta: datetime | None = Query(default=None, description="Verificados antes de esta fecha (UTC)"),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000)
+) -> Any:
+    """
+    Historial de veredictos por ID de las verificaciones del usuario (todas para superusuarios).
+
+    Responde consultas como "¿la autorización 12345 fue alguna vez PAMI?" sin volver
+    a verificar: cada filtro usa un índice y los resultados vienen del más reciente
+    al más antiguo.
+    """
+    registros, count = crud.get_pami_verification_history(
+        session=session,
+        owner_id=None if current_user.is_superuser else current_user.id,
+        url_id=url_id,
+        paciente=paciente,
+        estado=estado,
+        desde=desde,
+        hasta=hasta,
+        skip=skip,
+        limit=limit
+    )
+    return PAMIVerificationHistoryPublic(
+        data=[
+            PAMIVerificationRecordPublic.model_validate(registro, update={"nombre_archivo": nombre_archivo})
+            for registro, nombre_archivo in registros
+        ],
+        count=count
+    )
+
+
 @router.get("/health", include_in_schema=False)
 async def health_check():
     """Health check endpoint para verificar disponibilidad del servicio"""
@@ -104,7 +582,8 @@ async def health_check():
                 "status": "healthy",
                 "service": "pami-verification",
                 "playwright_available": True,
-                "playwright_version": version
+                "playwright_version": version,
+                "browser_pool": browser_pool.estado()
             }
         )
     except ImportError:
@@ -127,8 +606,13 @@ async def verificar_excel_pami_test(
         default="Paciente,Fecha,F. Alta,Observacion,Diagnostico,Motivo",
         description="Columnas adicionales separadas por comas"
     ),
-    batch_size: int = Form(default=2, description="Tamaño del bloque de pestañas a procesar"),
-    delay_seconds: int = Form(default=1, description="Tiempo de espera en segundos entre bloques")
+    batch_size: int = Form(
+        default=2, description="Concurrencia inicial; el controlador adaptativo la ajusta durante la corrida"
+    ),
+    engine: Literal["browser", "http", "auto"] = Form(
+        default=settings.PAMI_DEFAULT_ENGINE,
+        description="Motor de verificación: browser, http o auto (HTTP con respaldo del navegador)"
+    )
 ) -> Any:
     """
     ENDPOINT DE PRUEBA SIN AUTENTICACIÓN
@@ -136,14 +620,7 @@ async def verificar_excel_pami_test(
     """
     
     # Validar archivo
-    if not archivo_excel.filename:
-        raise HTTPException(status_code=400, detail="No se proporcionó un archivo")
-    
-    if not archivo_excel.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(
-            status_code=400, 
-            detail="El archivo debe ser un Excel válido (.xlsx o .xls)"
-        )
+    validar_archivo_excel(archivo_excel)
     
     logger.info(f"TEST: Verificación PAMI iniciada con archivo: {archivo_excel.filename}")
     
@@ -155,13 +632,14 @@ async def verificar_excel_pami_test(
             columna_urls=columna_urls,
             columnas_adicionales=columnas_list,
             batch_size=batch_size,
-            delay_seconds=delay_seconds
+            engine=engine
         )
         
         # Procesar archivo
         resultado = await PAMIVerificationService.verificar_excel_pami(
             archivo_excel.file, 
-            request_data
+            request_data,
+            incluir_base64=True
         )
         
         logger.info(f"TEST: Verificación PAMI completada")
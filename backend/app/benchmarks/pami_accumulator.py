@@ -0,0 +1,107 @@
+"""
+Micro-benchmark de la acumulación de resultados de la verificación PAMI.
+
+Mide el costo por fila de AcumuladorResultados (registrar + materializar) para
+distintos tamaños de planilla, y opcionalmente lo compara con la acumulación
+anterior basada en pd.concat por fila.
+
+Uso:
+    python -m app.benchmarks.pami_accumulator
+    python -m app.benchmarks.pami_accumulator --filas 1000 5000 10000 --legacy
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Hashable
+from typing import Any
+
+import pandas as pd
+
+from app.services.pami_result_accumulator import AcumuladorResultados
+
+COLUMNAS = [
+    "Id",
+    "Paciente",
+    "Fecha",
+    "F. Alta",
+    "Observacion",
+    "Diagnostico",
+    "Motivo",
+]
+
+
+def generar_planilla(filas: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Id": [str(100000 + numero) for numero in range(filas)],
+            "Paciente": [f"Paciente {numero}" for numero in range(filas)],
+            "Fecha": ["01/01/2024"] * filas,
+            "F. Alta": ["05/01/2024"] * filas,
+            "Observacion": ["Sin observaciones"] * filas,
+            "Diagnostico": [f"Diagnóstico {numero % 50}" for numero in range(filas)],
+            "Motivo": ["Internación"] * filas,
+        }
+    )
+
+
+def medir_acumulador(df_datos: pd.DataFrame, veredictos: list[bool]) -> float:
+    inicio = time.perf_counter()
+    acumulador = AcumuladorResultados(df_datos, "Id")
+    for posicion, coincide in enumerate(veredictos):
+        acumulador.registrar(posicion, coincide)
+    acumulador.materializar()
+    return time.perf_counter() - inicio
+
+
+def medir_concat(df_datos: pd.DataFrame, veredictos: list[bool]) -> float:
+    """Acumulación anterior: un pd.concat, row.copy() y row.to_dict() por fila"""
+    inicio = time.perf_counter()
+    df_resultados = pd.DataFrame(columns=COLUMNAS + ["URL_Completa", "Coincide"])
+    coincidentes: list[dict[Hashable, Any]] = []
+    no_coincidentes: list[dict[Hashable, Any]] = []
+    for posicion, (_, row) in enumerate(df_datos.iterrows()):
+        nueva_fila = row.copy()
+        nueva_fila["URL_Completa"] = f"https://pami/{row['Id']}"
+        nueva_fila["Coincide"] = veredictos[posicion]
+        df_resultados = pd.concat(
+            [df_resultados, pd.DataFrame([nueva_fila])], ignore_index=True
+        )
+        (coincidentes if veredictos[posicion] else no_coincidentes).append(
+            row.to_dict()
+        )
+    pd.DataFrame(coincidentes)
+    pd.DataFrame(no_coincidentes)
+    return time.perf_counter() - inicio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--filas", type=int, nargs="+", default=[100, 1000, 5000, 10000]
+    )
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="Medir también la acumulación con pd.concat",
+    )
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"{'filas':>8} {'acumulador (µs/fila)':>22} {'concat (µs/fila)':>18}")
+    for filas in args.filas:
+        df_datos = generar_planilla(filas)
+        veredictos = [random.random() < 0.3 for _ in range(filas)]
+        acumulador = medir_acumulador(df_datos, veredictos) / filas * 1e6
+        concat = (
+            f"{medir_concat(df_datos, veredictos) / filas * 1e6:.1f}"
+            if args.legacy
+            else "-"
+        )
+        print(f"{filas:>8} {acumulador:>22.1f} {concat:>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Servidor local que imita a Markey/PAMI para medir la verificación sin salir de la máquina.
+
+Sirve el mismo formulario de login (section#loginForm con UserName, Password y los
+selects depoCodigo/ubicCodigo) y páginas de autorizaciones por ID con latencia,
+proporción de coincidencias, errores 503 y vencimiento de sesión configurables.
+
+Uso:
+    python -m app.benchmarks.pami_fake_server --puerto 8765 --latencia-ms 150 --coincidencias 0.3
+    PAMI_BASE_URL=http://127.0.0.1:8765/Markey/PacienteAutorizaciones/Index/ fastapi dev app/main.py
+"""
+
+import argparse
+import asyncio
+import html
+import random
+import secrets
+import time
+import zlib
+from dataclasses import dataclass, field
+from urllib.parse import quote
+
+from fastapi import FastAPI, Form, Request
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
+
+from app.core.config import settings
+
+RUTA_AUTORIZACIONES = "/Markey/PacienteAutorizaciones/Index"
+RUTA_LOGIN = "/Markey/Account/Login"
+COOKIE_SESION = "MarkeySesion"
+
+# Relleno para que las páginas superen PAMI_HTTP_MIN_CONTENT_LENGTH como las reales
+_RELLENO = "<p>" + "Prestación ambulatoria sin observaciones. " * 60 + "</p>"
+
+_PAGINA_LOGIN = """<!DOCTYPE html>
+<html>
+<head><title>Markey - Iniciar sesión</title></head>
+<body>
+<section id="loginForm">
+  <form method="post" action="{accion}">
+    <input type="text" name="UserName" />
+    <input type="password" name="Password" />
+    <select id="depoCodigo" name="depoCodigo">
+      <option value="1">Depósito central</option>
+      <option value="2">Depósito norte</option>
+    </select>
+    <select id="ubicCodigo" name="ubicCodigo">
+      <option value="1">Ubicación 1</option>
+      <option value="2">Ubicación 2</option>
+    </select>
+    <input type="submit" value="Ingresar" />
+  </form>
+</section>
+</body>
+</html>"""
+
+_PAGINA_AUTORIZACIONES = """<!DOCTYPE html>
+<html>
+<head><title>Autorizaciones del paciente</title></head>
+<body>
+<h1>Autorizaciones - ID {url_id}</h1>
+<table><tr><td>Financiador</td><td>{financiador}</td></tr></table>
+{relleno}
+</body>
+</html>"""
+
+
+@dataclass
+class ConfiguracionServidorFalso:
+    """Comportamiento del servidor falso"""
+
+    latencia_ms: float = 100.0
+    jitter_ms: float = 0.0
+    proporcion_coincidencias: float = 0.3
+    proporcion_errores: float = 0.0
+    # 0 = las sesiones no vencen
+    expiracion_sesion_segundos: float = 0.0
+    texto_coincidencia: str = field(default_factory=lambda: settings.PAMI_SEARCH_TEXT)
+
+
+@dataclass
+class EstadoServidorFalso:
+    """Contadores del servidor, expuestos en GET /__estado"""
+
+    sesiones: dict[str, float] = field(default_factory=dict)
+    requests: int = 0
+    logins: int = 0
+    sesiones_vencidas: int = 0
+    errores: int = 0
+
+
+def coincide(url_id: str, proporcion: float) -> bool:
+    """Veredicto determinista por ID, para que dos corridas den los mismos resultados"""
+    return zlib.crc32(url_id.encode()) % 10_000 < proporcion * 10_000
+
+
+def crear_app(configuracion: ConfiguracionServidorFalso | None = None) -> FastAPI:
+    configuracion = configuracion or ConfiguracionServidorFalso()
+    estado = EstadoServidorFalso()
+    app = FastAPI(title="Markey falso", openapi_url=None)
+    app.state.configuracion = configuracion
+    app.state.estado = estado
+
+    def sesion_valida(request: Request) -> bool:
+        token = request.cookies.get(COOKIE_SESION)
+        if token is None or token not in estado.sesiones:
+            return False
+        vencimiento = configuracion.expiracion_sesion_segundos
+        if vencimiento > 0 and time.monotonic() - estado.sesiones[token] > vencimiento:
+            del estado.sesiones[token]
+            estado.sesiones_vencidas += 1
+            return False
+        return True
+
+    def pagina_login(destino: str) -> HTMLResponse:
+        accion = html.escape(f"{RUTA_LOGIN}?ReturnUrl={quote(destino)}")
+        return HTMLResponse(_PAGINA_LOGIN.format(accion=accion))
+
+    @app.get(RUTA_AUTORIZACIONES + "/{url_id}")
+    async def autorizaciones(url_id: str, request: Request) -> Response:
+        estado.requests += 1
+        if not sesion_valida(request):
+            return pagina_login(request.url.path)
+
+        demora = configuracion.latencia_ms + random.uniform(
+            -configuracion.jitter_ms, configuracion.jitter_ms
+        )
+        await asyncio.sleep(max(0.0, demora) / 1000)
+        if random.random() < configuracion.proporcion_errores:
+            estado.errores += 1
+            return HTMLResponse("Servicio no disponible", status_code=503)
+
+        financiador = (
+            configuracion.texto_coincidencia
+            if coincide(url_id, configuracion.proporcion_coincidencias)
+            else "OSDE - OSDE"
+        )
+        return HTMLResponse(
+            _PAGINA_AUTORIZACIONES.format(
+                url_id=html.escape(url_id), financiador=financiador, relleno=_RELLENO
+            )
+        )
+
+    @app.get(RUTA_LOGIN)
+    async def formulario_login(ReturnUrl: str = "/") -> HTMLResponse:
+        return pagina_login(ReturnUrl)
+
+    @app.post(RUTA_LOGIN)
+    async def login(
+        UserName: str = Form(default=""),
+        Password: str = Form(default=""),
+        depoCodigo: str = Form(default=""),
+        ubicCodigo: str = Form(default=""),
+        ReturnUrl: str = "/",
+    ) -> Response:
+        if not (UserName and Password and depoCodigo and ubicCodigo):
+            return pagina_login(ReturnUrl)
+
+        token = secrets.token_urlsafe(16)
+        estado.sesiones[token] = time.monotonic()
+        estado.logins += 1
+        destino = ReturnUrl if ReturnUrl.startswith("/") else "/"
+        respuesta = RedirectResponse(destino, status_code=302)
+        respuesta.set_cookie(COOKIE_SESION, token, httponly=True)
+        return respuesta
+
+    @app.get("/__estado")
+    async def estado_servidor() -> JSONResponse:
+        return JSONResponse(
+            {
+                "requests": estado.requests,
+                "logins": estado.logins,
+                "sesiones_vencidas": estado.sesiones_vencidas,
+                "errores": estado.errores,
+            }
+        )
+
+    return app
+
+
+def agregar_argumentos(parser: argparse.ArgumentParser) -> None:
+    """Opciones del servidor falso, compartidas con el benchmark"""
+    parser.add_argument("--latencia-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--coincidencias",
+        type=float,
+        default=0.3,
+        help="Proporción de IDs que coinciden",
+    )
+    parser.add_argument(
+        "--errores", type=float, default=0.0, help="Proporción de respuestas 503"
+    )
+    parser.add_argument(
+        "--expiracion-sesion",
+        type=float,
+        default=0.0,
+        help="Segundos de vida de la sesión (0: no vence)",
+    )
+
+
+def configuracion_desde_argumentos(
+    args: argparse.Namespace,
+) -> ConfiguracionServidorFalso:
+    return ConfiguracionServidorFalso(
+        latencia_ms=args.latencia_ms,
+        jitter_ms=args.jitter_ms,
+        proporcion_coincidencias=args.coincidencias,
+        proporcion_errores=args.errores,
+        expiracion_sesion_segundos=args.expiracion_sesion,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        crear_app(configuracion_desde_argumentos(args)),
+        host=args.host,
+        port=args.puerto,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Benchmark de throughput de la verificación PAMI contra el servidor falso local.
+
+Levanta app.benchmarks.pami_fake_server en un hilo, apunta PAMI_BASE_URL a él y
+ejecuta PAMIVerificationService.ejecutar_verificacion con cada motor pedido.
+Informa URLs/segundo, RSS pico del proceso y sus hijos (Chromium incluido) y los
+percentiles de latencia de cada etapa.
+
+Uso:
+    python -m app.benchmarks.pami_throughput --urls 500 --motor browser http auto
+    python -m app.benchmarks.pami_throughput --urls 2000 --motor http --latencia-ms 300 --errores 0.05
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from app.benchmarks.pami_accumulator import generar_planilla
+from app.benchmarks.pami_fake_server import (
+    RUTA_AUTORIZACIONES,
+    agregar_argumentos,
+    configuracion_desde_argumentos,
+    crear_app,
+)
+from app.core.config import settings
+from app.models import PAMIVerificationRequest, PAMIVerificationStats
+
+
+class MuestreadorMemoria:
+    """
+    Registra el RSS máximo del proceso y de todos sus descendientes.
+
+    Lee /proc cada `intervalo` segundos; donde no existe /proc se usa ru_maxrss,
+    que solo cubre al proceso actual.
+    """
+
+    def __init__(self, intervalo: float = 0.1) -> None:
+        self.intervalo = intervalo
+        self.pico_bytes = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def __enter__(self) -> "MuestreadorMemoria":
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self._detener.set()
+        self._hilo.join()
+
+    def _muestrear(self) -> None:
+        while True:
+            self.pico_bytes = max(self.pico_bytes, rss_arbol(os.getpid()))
+            if self._detener.wait(self.intervalo):
+                return
+
+
+def rss_arbol(pid: int) -> int:
+    """RSS en bytes de un proceso y sus descendientes"""
+    if not os.path.isdir("/proc"):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    hijos: dict[int, list[int]] = {}
+    rss: dict[int, int] = {}
+    for entrada in os.scandir("/proc"):
+        if not entrada.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada.name}/stat") as archivo:
+                # Los campos siguen al nombre del comando entre paréntesis: estado, ppid, ..., rss (24)
+                campos = archivo.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        proceso = int(entrada.name)
+        hijos.setdefault(int(campos[1]), []).append(proceso)
+        rss[proceso] = int(campos[21]) * resource.getpagesize()
+
+    total, pendientes = 0, [pid]
+    while pendientes:
+        proceso = pendientes.pop()
+        total += rss.get(proceso, 0)
+        pendientes.extend(hijos.get(proceso, []))
+    return total
+
+
+def puerto_libre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def iniciar_servidor(args: argparse.Namespace) -> tuple[str, uvicorn.Server]:
+    """Levanta el servidor falso en un hilo y devuelve su URL base"""
+    puerto = puerto_libre()
+    app = crear_app(configuracion_desde_argumentos(args))
+    servidor = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=puerto, log_level="warning")
+    )
+    hilo = threading.Thread(target=servidor.run, daemon=True)
+    hilo.start()
+    while not servidor.started:
+        if not hilo.is_alive():
+            raise RuntimeError(
+                f"No se pudo iniciar el servidor falso en el puerto {puerto}"
+            )
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{puerto}", servidor
+
+
+def configurar_entorno(url_servidor: str) -> None:
+    """Apunta la verificación al servidor falso, también para los procesos del modo particionado"""
+    valores = {
+        "PAMI_BASE_URL": f"{url_servidor}{RUTA_AUTORIZACIONES}/",
+        "PAMI_VERDICT_CACHE_ENABLED": False,
+        "PAMI_BROWSER_POOL_PRELAUNCH": False,
+    }
+    for nombre, valor in valores.items():
+        setattr(settings, nombre, valor)
+        os.environ[nombre] = str(valor)
+
+
+def generar_excel(urls: int) -> bytes:
+    buffer = io.BytesIO()
+    generar_planilla(urls).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+async def ejecutar(
+    motores: list[str], contenido: bytes, args: argparse.Namespace
+) -> None:
+    """Corre todos los motores en el mismo event loop, como lo haría la aplicación"""
+    from app.services.pami_browser_pool import browser_pool
+    from app.services.pami_verification_service import PAMIVerificationService
+
+    try:
+        for motor in motores:
+            request_data = PAMIVerificationRequest(
+                engine=motor, batch_size=args.concurrencia, procesos=args.procesos
+            )
+            with MuestreadorMemoria() as memoria:
+                resultado = await PAMIVerificationService.ejecutar_verificacion(
+                    io.BytesIO(contenido), request_data
+                )
+            resultado.cerrar()
+            imprimir(motor, resultado.estadisticas, memoria.pico_bytes, args.detalle)
+    finally:
+        await browser_pool.cerrar()
+
+
+def imprimir(
+    motor: str, stats: PAMIVerificationStats, pico_bytes: int, detalle: bool
+) -> None:
+    print(
+        f"{motor:>8} {stats.total_urls:>6} {stats.duracion_segundos:>9.2f} {stats.urls_por_segundo:>8.2f} "
+        f"{pico_bytes / 1024 / 1024:>10.1f} {stats.latencia_p50_ms:>8.1f} {stats.latencia_p95_ms:>8.1f} "
+        f"{stats.urls_con_error:>7}"
+    )
+    for etapa, percentiles in stats.latencias_por_etapa.items():
+        print(
+            f"{'':>9}{etapa:<22} p50 {percentiles['p50']:>8.1f}  "
+            f"p95 {percentiles['p95']:>8.1f}  p99 {percentiles['p99']:>8.1f}"
+        )
+    if detalle:
+        print(json.dumps(stats.model_dump(), indent=2, ensure_ascii=False))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--urls", type=int, default=200)
+    parser.add_argument(
+        "--motor", nargs="+", choices=["browser", "http", "auto"], default=["browser"]
+    )
+    parser.add_argument(
+        "--concurrencia", type=int, default=10, help="Concurrencia inicial (batch_size)"
+    )
+    parser.add_argument(
+        "--procesos", type=int, default=1, help="Procesos del modo particionado"
+    )
+    parser.add_argument(
+        "--detalle",
+        action="store_true",
+        help="Imprimir también las estadísticas completas",
+    )
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    url_servidor, servidor = iniciar_servidor(args)
+    configurar_entorno(url_servidor)
+    contenido = generar_excel(args.urls)
+
+    print(
+        f"Servidor falso en {url_servidor} (latencia {args.latencia_ms} ms, coincidencias {args.coincidencias})"
+    )
+    print(
+        f"{'motor':>8} {'urls':>6} {'segundos':>9} {'urls/s':>8} {'RSS (MB)':>10} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'errores':>7}"
+    )
+    asyncio.run(ejecutar(args.motor, contenido, args))
+
+    print(f"Servidor: {httpx.get(f'{url_servidor}/__estado').json()}")
+    servidor.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -48,10 +48,94 @@ class Settings(BaseSettings):
     PAMI_DEPOT_CODE: int = 1
     PAMI_LOCATION_CODE: int = 1
     PAMI_SEARCH_TEXT: str = "PAMI - PAMI"
+    # Predicados con nombre para clasificar las páginas además de PAMI_SEARCH_TEXT, en orden de
+    # prioridad: {"rechazada": "Rechazada", "pendiente": "re:Pendiente de (?:auditoría|aprobación)"}
+    PAMI_PREDICATES: dict[str, str] = {}
     PAMI_LOGIN_FORM_SELECTOR: str = "section#loginForm"
     PAMI_HEADLESS: bool = True
     PAMI_BATCH_SIZE: int = 10
     PAMI_DELAY_SECONDS: int = 1
+    # Lanzar Chromium al iniciar la aplicación; sin valor se lanza salvo con ENVIRONMENT local
+    PAMI_BROWSER_POOL_PRELAUNCH: bool | None = None
+    PAMI_MAX_PAGES_PER_WORKER: int = 20
+    PAMI_POOL_MAX_IDLE_CONTEXTS: int = 2
+    PAMI_CONTEXT_MAX_NAVIGATIONS: int = 500
+    PAMI_CONTEXT_MAX_AGE_MINUTES: int = 30
+    PAMI_SESSION_TTL_MINUTES: int = 20
+    PAMI_DEFAULT_ENGINE: Literal["browser", "http", "auto"] = "browser"
+    PAMI_LOGIN_FORM_MARKER: str = 'id="loginForm"'
+    PAMI_HTTP_MAX_CONNECTIONS: int = 20
+    PAMI_HTTP_TIMEOUT_SECONDS: float = 30.0
+    PAMI_HTTP_MIN_CONTENT_LENGTH: int = 2000
+    PAMI_URL_TIMEOUT_SECONDS: float = 30.0
+    PAMI_READINESS_POLL_MS: int = 50
+    # Margen opcional cuando la página carga sin ningún marcador conocido
+    PAMI_READINESS_PADDING_MS: int = 0
+    PAMI_NOT_FOUND_MARKERS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = []
+    PAMI_BLOCK_RESOURCES: bool = True
+    PAMI_JOB_PROGRESS_INTERVAL_SECONDS: float = 2.0
+    PAMI_JOB_STALE_MINUTES: int = 10
+    PAMI_CHECKPOINT_BATCH_SIZE: int = 100
+    # Con False este proceso no despacha trabajos encolados (tests, workers solo de API)
+    PAMI_SCHEDULER_ENABLED: bool = True
+    # Planificador de trabajos: tope de trabajos en ejecución entre todos los workers,
+    # por usuario y por worker
+    PAMI_SCHEDULER_MAX_RUNNING_JOBS: int = 4
+    PAMI_SCHEDULER_MAX_JOBS_PER_USER: int = 1
+    PAMI_SCHEDULER_MAX_JOBS_PER_WORKER: int = 2
+    PAMI_SCHEDULER_POLL_SECONDS: float = 5.0
+    # Cada este tiempo de espera en cola el tamaño efectivo de un trabajo se reduce a la
+    # mitad, así los trabajos grandes no esperan para siempre detrás de los chicos
+    PAMI_SCHEDULER_AGING_MINUTES: float = 30.0
+    PAMI_ALLOWED_RESOURCE_TYPES: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = ["document", "script", "xhr", "fetch"]
+    # Si queda vacío se permite solo el host de PAMI_BASE_URL
+    PAMI_ALLOWED_HOSTS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = []
+    # Caché de veredictos por ID (en memoria y opcionalmente compartida en Postgres)
+    PAMI_VERDICT_CACHE_ENABLED: bool = True
+    PAMI_VERDICT_CACHE_TTL_MINUTES: int = 1440
+    PAMI_VERDICT_CACHE_MAX_ENTRIES: int = 100_000
+    PAMI_VERDICT_CACHE_DB_ENABLED: bool = False
+    # Almacén local de archivos de resultados (Excel/HTML)
+    PAMI_ARTIFACTS_DIR: str = "/tmp/pami-artifacts"
+    # Los archivos de resultados se arman en memoria hasta este tamaño y después en disco
+    PAMI_RESULTS_SPOOL_MAX_MB: int = 16
+    # Filas por página del reporte HTML; el resto se pagina en el navegador
+    PAMI_HTML_PAGE_SIZE: int = 100
+    PAMI_ARTIFACTS_RETENTION_HOURS: int = 72
+    # Historial de veredictos por ID en Postgres, consultable con GET /pami-verification/history
+    PAMI_HISTORY_ENABLED: bool = True
+    PAMI_HISTORY_INSERT_BATCH_SIZE: int = 5000
+    # Proporción de URLs (0 a 1) cuyo contenido se vuelca al log de debug
+    PAMI_DEBUG_CONTENT_SAMPLE_RATE: float = 0.0
+    # Controlador adaptativo (AIMD) de concurrencia; el techo es PAMI_MAX_PAGES_PER_WORKER
+    # para el navegador y PAMI_HTTP_MAX_CONNECTIONS para HTTP
+    PAMI_AIMD_MIN_CONCURRENCY: int = 1
+    PAMI_AIMD_LATENCY_TARGET_SECONDS: float = 5.0
+    PAMI_AIMD_DECREASE_FACTOR: float = 0.5
+    # Tope de URLs por segundo (0 = sin tope)
+    PAMI_MAX_REQUESTS_PER_SECOND: float = 0
+    # Reintentos de errores transitorios por URL (timeouts, conexión, sesión expirada, 5xx/429)
+    PAMI_RETRY_MAX_ATTEMPTS: int = 3
+    PAMI_RETRY_BACKOFF_SECONDS: float = 1.0
+    PAMI_RETRY_BACKOFF_MAX_SECONDS: float = 10.0
+    # Plazo total por URL, contando todos los intentos y esperas
+    PAMI_URL_DEADLINE_SECONDS: float = 90.0
+    # Verificación particionada en varios procesos, cada uno con su navegador y sesión.
+    # 0 = automático según CPUs y memoria disponible; 1 = siempre en un solo proceso
+    PAMI_SHARD_PROCESSES: int = 0
+    PAMI_SHARD_MAX_PROCESSES: int = 8
+    # IDs a verificar a partir de los cuales se particiona automáticamente
+    PAMI_SHARD_MIN_URLS: int = 5000
+    # Memoria estimada por proceso (Chromium con sus páginas) para el cálculo automático
+    PAMI_SHARD_MEMORY_PER_PROCESS_MB: int = 768
+    # Columnas de texto con hasta esta proporción de valores distintos se leen como categóricas
+    PAMI_CATEGORICAL_MAX_UNIQUE_RATIO: float = 0.5
 
     BACKEND_CORS_ORIGINS: Annotated[
         list[AnyUrl] | str, BeforeValidator(parse_cors)
@@ -106,6 +190,13 @@ class Settings(BaseSettings):
     def emails_enabled(self) -> bool:
         return bool(self.SMTP_HOST and self.EMAILS_FROM_EMAIL)
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def pami_browser_pool_prelaunch(self) -> bool:
+        if self.PAMI_BROWSER_POOL_PRELAUNCH is None:
+            return self.ENVIRONMENT != "local"
+        return self.PAMI_BROWSER_POOL_PRELAUNCH
+
     EMAIL_TEST_USER: EmailStr = "test@example.com"
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
@@ -1,10 +1,32 @@
 import uuid
+from datetime import datetime
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy import literal, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, delete, func, select
 
 from app.core.security import get_password_hash, verify_password
-from app.models import Item, ItemCreate, Task, TaskAssignment, TaskCreate, User, UserCreate, UserUpdate
+from app.models import (
+    Item,
+    ItemCreate,
+    PAMIVerdictCacheEntry,
+    PAMIVerificationJob,
+    PAMIVerificationRecord,
+    PAMIVerificationRequest,
+    PAMIVerificationResult,
+    PAMIVerificationRun,
+    PAMIVerificationSlot,
+    Task,
+    TaskAssignment,
+    TaskCreate,
+    User,
+    UserCreate,
+    UserUpdate,
+)
+
+# Clave del advisory lock de Postgres que serializa el despacho de trabajos PAMI
+PAMI_JOB_QUEUE_LOCK_KEY = 0x50414D49
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -76,4 +98,298 @@ def remove_task_assignment(*, session: Session, task_id: uuid.UUID, user_id: uui
     assignment = session.exec(statement).first()  
     if assignment:  
         session.delete(assignment)  
-        session.commit()
\ No newline at end of file
+        session.commit()
+
+
+def create_pami_verification_job(
+    *,
+    session: Session,
+    owner_id: uuid.UUID,
+    nombre_archivo: str,
+    request_data: PAMIVerificationRequest,
+    archivo_entrada: bytes | None = None,
+    total_urls: int = 0,
+) -> PAMIVerificationJob:
+    db_job = PAMIVerificationJob(
+        owner_id=owner_id,
+        nombre_archivo=nombre_archivo,
+        parametros=request_data.model_dump(),
+        archivo_entrada=archivo_entrada,
+        total_urls=total_urls,
+    )
+    session.add(db_job)
+    session.commit()
+    session.refresh(db_job)
+    return db_job
+
+
+def update_pami_verification_job(
+    *, session: Session, job_id: uuid.UUID, datos: dict[str, Any]
+) -> PAMIVerificationJob | None:
+    db_job = session.get(PAMIVerificationJob, job_id)
+    if not db_job:
+        return None
+    db_job.sqlmodel_update(datos, update={"actualizado_en": datetime.utcnow()})
+    session.add(db_job)
+    session.commit()
+    session.refresh(db_job)
+    return db_job
+
+
+def get_pami_job_cancellation_requested(*, session: Session, job_id: uuid.UUID) -> bool:
+    """Indica si se pidió cancelar el trabajo, sin cargar el archivo de entrada"""
+    statement = select(PAMIVerificationJob.cancelacion_solicitada).where(PAMIVerificationJob.id == job_id)
+    return bool(session.exec(statement).first())
+
+
+def lock_pami_job_queue(*, session: Session) -> None:
+    """
+    Toma el lock de la cola de trabajos PAMI hasta el fin de la transacción, así un
+    solo worker a la vez cuenta los trabajos en ejecución y reclama los siguientes
+    """
+    session.execute(text("SELECT pg_advisory_xact_lock(:clave)"), {"clave": PAMI_JOB_QUEUE_LOCK_KEY})
+
+
+def get_pami_queued_jobs(*, session: Session) -> list[tuple[uuid.UUID, uuid.UUID, int, datetime]]:
+    """Trabajos pendientes con archivo de entrada: (id, owner_id, URLs que faltan verificar, creado_en)"""
+    statement = select(
+        PAMIVerificationJob.id,
+        PAMIVerificationJob.owner_id,
+        col(PAMIVerificationJob.total_urls) - col(PAMIVerificationJob.urls_procesadas),
+        PAMIVerificationJob.creado_en,
+    ).where(
+        PAMIVerificationJob.estado == "pendiente",
+        col(PAMIVerificationJob.archivo_entrada).is_not(None),
+    )
+    return list(session.exec(statement).all())
+
+
+def get_pami_running_jobs_by_owner(*, session: Session, desde: datetime) -> dict[uuid.UUID, int]:
+    """Trabajos en proceso por usuario que reportaron actividad a partir de `desde`"""
+    statement = (
+        select(PAMIVerificationJob.owner_id, func.count())
+        .where(
+            PAMIVerificationJob.estado == "en_proceso",
+            func.coalesce(PAMIVerificationJob.actualizado_en, PAMIVerificationJob.iniciado_en) >= desde,
+        )
+        .group_by(col(PAMIVerificationJob.owner_id))
+    )
+    return dict(session.exec(statement).all())
+
+
+def create_pami_verification_slot(
+    *, session: Session, owner_id: uuid.UUID, total_urls: int
+) -> PAMIVerificationSlot:
+    db_slot = PAMIVerificationSlot(owner_id=owner_id, total_urls=total_urls)
+    session.add(db_slot)
+    session.commit()
+    session.refresh(db_slot)
+    return db_slot
+
+
+def touch_pami_verification_slot(*, session: Session, slot_id: uuid.UUID) -> None:
+    db_slot = session.get(PAMIVerificationSlot, slot_id)
+    if db_slot:
+        db_slot.actualizado_en = datetime.utcnow()
+        session.add(db_slot)
+        session.commit()
+
+
+def delete_pami_verification_slot(*, session: Session, slot_id: uuid.UUID) -> None:
+    db_slot = session.get(PAMIVerificationSlot, slot_id)
+    if db_slot:
+        session.delete(db_slot)
+        session.commit()
+
+
+def delete_stale_pami_verification_slots(*, session: Session, antes: datetime) -> None:
+    """Borra los lugares de verificaciones en línea cuyo worker dejó de reportar (sin commit)"""
+    session.execute(delete(PAMIVerificationSlot).where(col(PAMIVerificationSlot.actualizado_en) < antes))
+
+
+def get_pami_active_slots_by_owner(*, session: Session, desde: datetime) -> dict[uuid.UUID, int]:
+    """Verificaciones en línea por usuario que reportaron actividad a partir de `desde`"""
+    statement = (
+        select(PAMIVerificationSlot.owner_id, func.count())
+        .where(col(PAMIVerificationSlot.actualizado_en) >= desde)
+        .group_by(col(PAMIVerificationSlot.owner_id))
+    )
+    return dict(session.exec(statement).all())
+
+
+def start_pami_queued_jobs(*, session: Session, job_ids: list[uuid.UUID]) -> list[PAMIVerificationJob]:
+    """Pasa a en_proceso los trabajos reclamados que siguen pendientes y confirma la transacción"""
+    if not job_ids:
+        session.commit()
+        return []
+    statement = select(PAMIVerificationJob).where(
+        col(PAMIVerificationJob.id).in_(job_ids), PAMIVerificationJob.estado == "pendiente"
+    )
+    jobs = list(session.exec(statement).all())
+    ahora = datetime.utcnow()
+    for job in jobs:
+        job.sqlmodel_update({"estado": "en_proceso", "actualizado_en": ahora})
+        session.add(job)
+    session.commit()
+    for job in jobs:
+        session.refresh(job)
+    return jobs
+
+
+def save_pami_verification_results(
+    *, session: Session, job_id: uuid.UUID, resultados: list[dict[str, Any]]
+) -> None:
+    """Inserta (o actualiza) en un solo executemany los resultados por ID de un trabajo"""
+    if not resultados:
+        return
+    statement = insert(PAMIVerificationResult)
+    statement = statement.on_conflict_do_update(
+        index_elements=["job_id", "url_id"],
+        set_={
+            "coincide": statement.excluded.coincide,
+            "error": statement.excluded.error,
+            "latencia_ms": statement.excluded.latencia_ms,
+            "clase_error": statement.excluded.clase_error,
+            "categoria": statement.excluded.categoria,
+            "verificado_en": statement.excluded.verificado_en,
+        },
+    )
+    # Un mismo ID no puede actualizarse dos veces en el mismo lote
+    por_id = {resultado["url_id"]: {**resultado, "job_id": job_id} for resultado in resultados}
+    session.execute(statement, list(por_id.values()))
+    session.commit()
+
+
+def get_pami_verified_results(
+    *, session: Session, job_id: uuid.UUID
+) -> dict[str, tuple[bool, str | None]]:
+    """Resultados ya verificados sin error de un trabajo, por ID: (coincide, categoria)"""
+    statement = select(PAMIVerificationResult).where(
+        PAMIVerificationResult.job_id == job_id,
+        PAMIVerificationResult.error == False,  # noqa: E712
+    )
+    return {
+        resultado.url_id: (resultado.coincide, resultado.categoria) for resultado in session.exec(statement).all()
+    }
+
+
+def get_pami_verification_results_after(
+    *, session: Session, job_id: uuid.UUID, cursor: tuple[datetime, str] | None = None, limit: int = 1000
+) -> list[PAMIVerificationResult]:
+    """Resultados de un trabajo en orden de guardado, posteriores al cursor (verificado_en, url_id)"""
+    statement = select(PAMIVerificationResult).where(PAMIVerificationResult.job_id == job_id)
+    if cursor is not None:
+        statement = statement.where(
+            tuple_(col(PAMIVerificationResult.verificado_en), col(PAMIVerificationResult.url_id))
+            > tuple_(literal(cursor[0]), literal(cursor[1]))
+        )
+    statement = statement.order_by(
+        col(PAMIVerificationResult.verificado_en), col(PAMIVerificationResult.url_id)
+    ).limit(limit)
+    return list(session.exec(statement).all())
+
+
+def get_pami_cached_verdicts(
+    *, session: Session, url_ids: list[str], desde: datetime
+) -> dict[str, tuple[bool, datetime]]:
+    """Veredictos cacheados verificados a partir de `desde`, por ID"""
+    veredictos: dict[str, tuple[bool, datetime]] = {}
+    # Se consulta en tramos para no armar un IN con miles de parámetros
+    for inicio in range(0, len(url_ids), 1000):
+        statement = select(PAMIVerdictCacheEntry).where(
+            col(PAMIVerdictCacheEntry.url_id).in_(url_ids[inicio : inicio + 1000]),
+            PAMIVerdictCacheEntry.verificado_en >= desde,
+        )
+        for entrada in session.exec(statement).all():
+            veredictos[entrada.url_id] = (entrada.coincide, entrada.verificado_en)
+    return veredictos
+
+
+def save_pami_cached_verdicts(*, session: Session, veredictos: dict[str, bool]) -> None:
+    """Inserta (o actualiza) en un solo executemany los veredictos cacheados"""
+    if not veredictos:
+        return
+    statement = insert(PAMIVerdictCacheEntry)
+    statement = statement.on_conflict_do_update(
+        index_elements=["url_id"],
+        set_={"coincide": statement.excluded.coincide, "verificado_en": statement.excluded.verificado_en},
+    )
+    ahora = datetime.utcnow()
+    session.execute(
+        statement,
+        [{"url_id": url_id, "coincide": coincide, "verificado_en": ahora} for url_id, coincide in veredictos.items()],
+    )
+    session.commit()
+
+
+def create_pami_verification_run(
+    *, session: Session, run: PAMIVerificationRun, registros: list[dict[str, Any]], tamano_lote: int = 5000
+) -> PAMIVerificationRun:
+    """Guarda una corrida del historial y sus filas con un executemany por lote, en una sola transacción"""
+    session.add(run)
+    session.flush()
+    statement = insert(PAMIVerificationRecord)
+    for inicio in range(0, len(registros), tamano_lote):
+        session.execute(
+            statement,
+            [
+                {**registro, "run_id": run.id, "verificado_en": run.verificado_en}
+                for registro in registros[inicio : inicio + tamano_lote]
+            ],
+        )
+    session.commit()
+    session.refresh(run)
+    return run
+
+
+def get_pami_verification_history(
+    *,
+    session: Session,
+    owner_id: uuid.UUID | None = None,
+    url_id: str | None = None,
+    paciente: str | None = None,
+    estado: str | None = None,
+    desde: datetime | None = None,
+    hasta: datetime | None = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> tuple[list[tuple[PAMIVerificationRecord, str]], int]:
+    """
+    Filas del historial (con el nombre del archivo de su corrida), de la más reciente
+    a la más antigua, y el total que cumple los filtros. Sin `owner_id` se buscan
+    las corridas de todos los usuarios.
+    """
+    condiciones = []
+    if owner_id is not None:
+        condiciones.append(PAMIVerificationRun.owner_id == owner_id)
+    if url_id is not None:
+        condiciones.append(PAMIVerificationRecord.url_id == url_id)
+    if paciente is not None:
+        condiciones.append(PAMIVerificationRecord.paciente == paciente)
+    if estado is not None:
+        condiciones.append(PAMIVerificationRecord.estado == estado)
+    if desde is not None:
+        condiciones.append(PAMIVerificationRecord.verificado_en >= desde)
+    if hasta is not None:
+        condiciones.append(PAMIVerificationRecord.verificado_en < hasta)
+
+    count_statement = (
+        select(func.count())
+        .select_from(PAMIVerificationRecord)
+        .join(PAMIVerificationRun)
+        .where(*condiciones)
+    )
+    statement = (
+        select(PAMIVerificationRecord, PAMIVerificationRun.nombre_archivo)
+        .join(PAMIVerificationRun)
+        .where(*condiciones)
+        .order_by(
+            col(PAMIVerificationRecord.verificado_en).desc(),
+            col(PAMIVerificationRecord.run_id),
+            col(PAMIVerificationRecord.posicion),
+        )
+        .offset(skip)
+        .limit(limit)
+    )
+    count = session.exec(count_statement).one()
+    return list(session.exec(statement).all()), count
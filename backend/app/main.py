@@ -1,3 +1,8 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
@@ -5,6 +10,12 @@ from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
 from app.core.config import settings
+from app.services.pami_artifact_store import artifact_store
+from app.services.pami_browser_pool import browser_pool
+from app.services.pami_jobs import job_runner
+from app.services.pami_scheduler import job_scheduler
+
+logger = logging.getLogger(__name__)
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,10 +25,33 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # El navegador de verificación PAMI vive lo mismo que la aplicación
+    if settings.pami_browser_pool_prelaunch:
+        try:
+            await browser_pool.iniciar()
+        except Exception as e:
+            logger.error(f"No se pudo iniciar el pool de navegador PAMI: {e}")
+    try:
+        await asyncio.to_thread(artifact_store.limpiar_vencidos)
+    except Exception as e:
+        logger.error(f"No se pudieron limpiar los artefactos PAMI vencidos: {e}")
+    # Los trabajos encolados en Postgres los despacha el planificador de cada worker
+    if settings.PAMI_SCHEDULER_ENABLED:
+        job_scheduler.iniciar()
+    yield
+    await job_scheduler.detener()
+    await job_runner.detener()
+    await browser_pool.cerrar()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -1,7 +1,9 @@
 import uuid
 from datetime import datetime
+from typing import Any, Literal
 
 from pydantic import EmailStr
+from sqlalchemy import JSON, Column, LargeBinary
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -47,6 +49,8 @@ class User(UserBase, table=True):
     items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
     tasks: list["Task"] = Relationship(back_populates="owner", cascade_delete=True)  
     assigned_tasks: list["TaskAssignment"] = Relationship(back_populates="user", cascade_delete=True)
+    pami_jobs: list["PAMIVerificationJob"] = Relationship(back_populates="owner", cascade_delete=True)
+    pami_runs: list["PAMIVerificationRun"] = Relationship(back_populates="owner", cascade_delete=True)
 
 # Properties to return via API, id is always required
 class UserPublic(UserBase):
@@ -194,8 +198,31 @@ class PAMIVerificationRequest(SQLModel):
         default=["Paciente", "Fecha", "F. Alta", "Observacion", "Diagnostico", "Motivo"],
         description="Columnas adicionales a incluir en el resultado"
     )
-    batch_size: int = Field(default=10, description="Tamaño del bloque de pestañas a procesar")
-    delay_seconds: int = Field(default=1, description="Tiempo de espera en segundos entre bloques")
+    batch_size: int = Field(
+        default=10, description="Concurrencia inicial; el controlador adaptativo la ajusta durante la corrida"
+    )
+    engine: Literal["browser", "http", "auto"] = Field(
+        default="browser",
+        description="Motor de verificación: navegador, HTTP directo o HTTP con respaldo del navegador"
+    )
+    force_refresh: bool = Field(
+        default=False, description="Ignorar la caché de veredictos y volver a verificar todos los IDs"
+    )
+    formato_salida: Literal["xlsx", "csv", "parquet"] = Field(
+        default="xlsx",
+        description="Formato del archivo de resultados: Excel con hojas por estado, o CSV/Parquet para corridas grandes"
+    )
+    procesos: int | None = Field(
+        default=None, ge=1,
+        description="Procesos que verifican en paralelo, cada uno con su navegador y sesión (None: automático)"
+    )
+    predicados: dict[str, str] | None = Field(
+        default=None,
+        description=(
+            "Predicados con nombre para clasificar cada página, en orden de prioridad: texto literal "
+            "o 're:<regex>' (None: PAMI_PREDICATES)"
+        )
+    )
 
 
 class PAMIURLData(SQLModel):
@@ -211,19 +238,210 @@ class PAMIURLData(SQLModel):
     coincide: bool
 
 
+class PAMIURLResult(SQLModel):
+    """Veredicto de un ID, tal como se emite en el stream de resultados"""
+    id: str
+    coincide: bool
+    error: bool = False
+    latencia_ms: float | None = None
+    clase_error: str | None = None
+    reintentos: int = 0
+    categoria: str | None = None
+
+
 class PAMIVerificationStats(SQLModel):
     """Estadísticas del procesamiento PAMI"""
     total_urls: int
+    ids_unicos: int = 0
     urls_coincidentes: int
     urls_no_coincidentes: int
     urls_con_error: int
+    urls_reintentadas: int = 0
+    reintentos_totales: int = 0
+    motor: str = "browser"
+    procesos: int = 1
+    duracion_segundos: float = 0.0
+    urls_por_segundo: float = 0.0
+    urls_verificadas_http: int = 0
+    urls_verificadas_navegador: int = 0
+    urls_por_segundo_http: float = 0.0
+    urls_por_segundo_navegador: float = 0.0
+    requests_bloqueados: int = 0
+    bytes_ahorrados_estimados: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    latencia_p50_ms: float = 0.0
+    latencia_p95_ms: float = 0.0
+    latencia_p99_ms: float = 0.0
+    latencias_por_etapa: dict[str, dict[str, float]] = Field(
+        default_factory=dict, description="p50/p95/p99 en ms de cada etapa de la verificación"
+    )
+    errores_por_clase: dict[str, int] = Field(default_factory=dict)
+    urls_por_categoria: dict[str, int] = Field(
+        default_factory=dict, description="Filas verificadas sin error por categoría del clasificador de páginas"
+    )
+    parcial: bool = Field(default=False, description="La corrida se canceló antes de verificar todas las filas")
+    urls_sin_verificar: int = 0
 
 
 class PAMIVerificationResponse(SQLModel):
     """Respuesta de la verificación PAMI"""
     mensaje: str
     estadisticas: PAMIVerificationStats
-    archivo_excel_base64: str = Field(description="Archivo Excel codificado en base64")
-    archivo_html_base64: str = Field(description="Archivo HTML codificado en base64")
+    archivo_excel_id: str
+    archivo_html_id: str
+    url_descarga_excel: str
+    url_descarga_html: str
+    archivo_excel_base64: str | None = Field(
+        default=None, description="Archivo Excel codificado en base64 (solo con incluir_base64)"
+    )
+    archivo_html_base64: str | None = Field(
+        default=None, description="Archivo HTML codificado en base64 (solo con incluir_base64)"
+    )
     nombre_archivo_excel: str
-    nombre_archivo_html: str
\ No newline at end of file
+    nombre_archivo_html: str
+
+
+# Trabajo de verificación PAMI ejecutado en segundo plano
+class PAMIVerificationJob(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    owner_id: uuid.UUID = Field(foreign_key="user.id", nullable=False, ondelete="CASCADE")
+    owner: User | None = Relationship(back_populates="pami_jobs")
+    resultados: list["PAMIVerificationResult"] = Relationship(back_populates="job", cascade_delete=True)
+    # pendiente (en la cola del planificador), en_proceso, completado, cancelado, error
+    estado: str = Field(default="pendiente", max_length=20, index=True)
+    # Se consulta desde el proceso que ejecuta el trabajo, así la cancelación funciona entre workers
+    cancelacion_solicitada: bool = False
+    nombre_archivo: str = Field(max_length=255)
+    archivo_entrada: bytes | None = Field(default=None, sa_column=Column(LargeBinary))
+    parametros: dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    total_urls: int = 0
+    urls_procesadas: int = 0
+    creado_en: datetime = Field(default_factory=datetime.utcnow)
+    iniciado_en: datetime | None = None
+    actualizado_en: datetime | None = None
+    finalizado_en: datetime | None = None
+    mensaje_error: str | None = Field(default=None, max_length=1000)
+    concurrencia_actual: int | None = None
+    tasa_actual: float | None = None
+    estadisticas: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON))
+    archivo_excel_id: str | None = Field(default=None, max_length=36)
+    archivo_html_id: str | None = Field(default=None, max_length=36)
+    nombre_archivo_excel: str | None = Field(default=None, max_length=255)
+    nombre_archivo_html: str | None = Field(default=None, max_length=255)
+
+
+# Lugar del planificador ocupado por una verificación en línea (/verify-excel, /verify-stream).
+# No es un trabajo: no se lista en /jobs, se borra al terminar y, si el worker muere, deja de
+# contar cuando pasa PAMI_JOB_STALE_MINUTES sin actividad
+class PAMIVerificationSlot(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    owner_id: uuid.UUID = Field(foreign_key="user.id", nullable=False, ondelete="CASCADE")
+    total_urls: int = 0
+    creado_en: datetime = Field(default_factory=datetime.utcnow)
+    actualizado_en: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+# Resultado por ID guardado a medida que avanza un trabajo, para poder reanudarlo
+class PAMIVerificationResult(SQLModel, table=True):
+    job_id: uuid.UUID = Field(foreign_key="pamiverificationjob.id", primary_key=True, ondelete="CASCADE")
+    url_id: str = Field(primary_key=True, max_length=255)
+    coincide: bool = False
+    error: bool = False
+    latencia_ms: float | None = None
+    clase_error: str | None = Field(default=None, max_length=100)
+    # Categoría del clasificador (predicados), para reanudar sin perderla
+    categoria: str | None = Field(default=None, max_length=50)
+    verificado_en: datetime = Field(default_factory=datetime.utcnow)
+    job: PAMIVerificationJob | None = Relationship(back_populates="resultados")
+
+
+# Último veredicto conocido por ID, compartido entre workers por la caché de veredictos
+class PAMIVerdictCacheEntry(SQLModel, table=True):
+    url_id: str = Field(primary_key=True, max_length=255)
+    coincide: bool = False
+    verificado_en: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+# Historial de verificaciones: una corrida por verificación terminada (o cancelada)
+class PAMIVerificationRun(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    owner_id: uuid.UUID = Field(foreign_key="user.id", nullable=False, ondelete="CASCADE")
+    owner: User | None = Relationship(back_populates="pami_runs")
+    # El historial se conserva aunque se borre el trabajo que lo generó
+    job_id: uuid.UUID | None = Field(default=None, foreign_key="pamiverificationjob.id", ondelete="SET NULL")
+    registros: list["PAMIVerificationRecord"] = Relationship(back_populates="run", cascade_delete=True)
+    origen: str = Field(max_length=20)  # verify-excel, verify-stream, job
+    nombre_archivo: str = Field(default="", max_length=255)
+    motor: str = Field(max_length=20)
+    total_urls: int = 0
+    urls_coincidentes: int = 0
+    urls_no_coincidentes: int = 0
+    urls_con_error: int = 0
+    urls_sin_verificar: int = 0
+    verificado_en: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+# Veredicto de cada fila de una corrida; la fecha de la corrida se repite para filtrar sin join
+class PAMIVerificationRecord(SQLModel, table=True):
+    run_id: uuid.UUID = Field(foreign_key="pamiverificationrun.id", primary_key=True, ondelete="CASCADE")
+    posicion: int = Field(primary_key=True)
+    url_id: str = Field(max_length=255, index=True)
+    paciente: str | None = Field(default=None, max_length=255, index=True)
+    fecha: str | None = Field(default=None, max_length=50)
+    estado: str = Field(max_length=20, index=True)  # coincide, no_coincide, error
+    categoria: str | None = Field(default=None, max_length=50)
+    clase_error: str | None = Field(default=None, max_length=100)
+    verificado_en: datetime = Field(default_factory=datetime.utcnow, index=True)
+    run: PAMIVerificationRun | None = Relationship(back_populates="registros")
+
+
+class PAMIVerificationJobPublic(SQLModel):
+    """Estado y progreso de un trabajo de verificación PAMI"""
+    id: uuid.UUID
+    owner_id: uuid.UUID
+    estado: str
+    nombre_archivo: str
+    total_urls: int
+    urls_procesadas: int
+    porcentaje: float = 0.0
+    urls_por_segundo: float = 0.0
+    eta_segundos: float | None = None
+    concurrencia_actual: int | None = None
+    tasa_actual: float | None = None
+    creado_en: datetime
+    iniciado_en: datetime | None = None
+    finalizado_en: datetime | None = None
+    mensaje_error: str | None = None
+    cancelacion_solicitada: bool = False
+    # Lugar en la cola del planificador (1 = el próximo en ejecutarse); None si no está pendiente
+    posicion_cola: int | None = None
+    estadisticas: PAMIVerificationStats | None = None
+    archivo_excel_id: str | None = None
+    archivo_html_id: str | None = None
+    nombre_archivo_excel: str | None = None
+    nombre_archivo_html: str | None = None
+
+
+class PAMIVerificationJobsPublic(SQLModel):
+    data: list[PAMIVerificationJobPublic]
+    count: int
+
+
+class PAMIVerificationRecordPublic(SQLModel):
+    """Veredicto histórico de un ID en una corrida de verificación"""
+    run_id: uuid.UUID
+    posicion: int
+    url_id: str
+    paciente: str | None = None
+    fecha: str | None = None
+    estado: str
+    categoria: str | None = None
+    clase_error: str | None = None
+    verificado_en: datetime
+    nombre_archivo: str = ""
+
+
+class PAMIVerificationHistoryPublic(SQLModel):
+    data: list[PAMIVerificationRecordPublic]
+    count: int
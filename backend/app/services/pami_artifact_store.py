@@ -0,0 +1,192 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import IO
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto se revisan los artefactos vencidos al guardar uno nuevo
+_INTERVALO_LIMPIEZA_SEGUNDOS = 3600
+
+# Tamaño de los bloques al copiar archivos al almacén
+_TAMANO_BLOQUE = 1024 * 1024
+
+
+@dataclass
+class ArtefactoPAMI:
+    """Archivo generado por una verificación y guardado en el almacén local"""
+
+    id: str
+    nombre_archivo: str
+    media_type: str
+    tamano: int
+    etag: str
+    creado_en: datetime
+    ruta: Path
+    owner_id: str | None = None
+
+    @property
+    def url_descarga(self) -> str:
+        return f"{settings.API_V1_STR}/pami-verification/artifacts/{self.id}"
+
+
+class PAMIArtifactStore:
+    """
+    Almacén de archivos de resultados en un directorio local.
+
+    Cada artefacto se guarda como `<id>` con sus metadatos en `<id>.json`. Los
+    artefactos con más de PAMI_ARTIFACTS_RETENTION_HOURS se eliminan al arrancar
+    la aplicación y, como mucho una vez por hora, al guardar uno nuevo.
+
+    Las operaciones son de disco y bloqueantes: desde código async se llaman con
+    asyncio.to_thread.
+    """
+
+    def __init__(self, directorio: str | None = None) -> None:
+        self._directorio = directorio
+        self._ultima_limpieza = 0.0
+
+    @property
+    def directorio(self) -> Path:
+        return Path(self._directorio or settings.PAMI_ARTIFACTS_DIR)
+
+    def guardar(
+        self,
+        contenido: bytes,
+        nombre_archivo: str,
+        media_type: str,
+        owner_id: uuid.UUID | None = None,
+    ) -> ArtefactoPAMI:
+        """Escribe un artefacto de forma atómica y devuelve sus metadatos"""
+        return self.guardar_archivo(
+            io.BytesIO(contenido), nombre_archivo, media_type, owner_id
+        )
+
+    def guardar_archivo(
+        self,
+        origen: IO[bytes],
+        nombre_archivo: str,
+        media_type: str,
+        owner_id: uuid.UUID | None = None,
+    ) -> ArtefactoPAMI:
+        """
+        Copia un archivo abierto al almacén por bloques, sin cargarlo entero en memoria.
+
+        Se copia desde la posición actual de `origen` y el archivo no se cierra.
+        """
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        if time.monotonic() - self._ultima_limpieza > _INTERVALO_LIMPIEZA_SEGUNDOS:
+            self.limpiar_vencidos()
+
+        artefacto_id = str(uuid.uuid4())
+        ruta = self._ruta(artefacto_id)
+        temporal = ruta.with_suffix(".tmp")
+        hash_contenido = hashlib.sha256()
+        tamano = 0
+        with temporal.open("wb") as destino:
+            while bloque := origen.read(_TAMANO_BLOQUE):
+                hash_contenido.update(bloque)
+                destino.write(bloque)
+                tamano += len(bloque)
+        os.replace(temporal, ruta)
+
+        artefacto = ArtefactoPAMI(
+            id=artefacto_id,
+            nombre_archivo=nombre_archivo,
+            media_type=media_type,
+            tamano=tamano,
+            etag=hash_contenido.hexdigest()[:32],
+            creado_en=datetime.utcnow(),
+            ruta=ruta,
+            owner_id=str(owner_id) if owner_id else None,
+        )
+        self._ruta_metadatos(artefacto.id).write_text(
+            json.dumps(
+                {
+                    "nombre_archivo": artefacto.nombre_archivo,
+                    "media_type": artefacto.media_type,
+                    "tamano": artefacto.tamano,
+                    "etag": artefacto.etag,
+                    "creado_en": artefacto.creado_en.isoformat(),
+                    "owner_id": artefacto.owner_id,
+                }
+            )
+        )
+        logger.info(
+            f"Artefacto guardado: {artefacto.id} ({nombre_archivo}, {artefacto.tamano} bytes)"
+        )
+        return artefacto
+
+    def obtener(self, artefacto_id: str) -> ArtefactoPAMI | None:
+        """Metadatos de un artefacto, o None si no existe o ya venció"""
+        try:
+            artefacto_id = str(uuid.UUID(artefacto_id))
+        except ValueError:
+            return None
+
+        ruta_metadatos = self._ruta_metadatos(artefacto_id)
+        ruta = self._ruta(artefacto_id)
+        if not ruta_metadatos.exists() or not ruta.exists():
+            return None
+
+        metadatos = json.loads(ruta_metadatos.read_text())
+        artefacto = ArtefactoPAMI(
+            id=artefacto_id,
+            nombre_archivo=metadatos["nombre_archivo"],
+            media_type=metadatos["media_type"],
+            tamano=metadatos["tamano"],
+            etag=metadatos["etag"],
+            creado_en=datetime.fromisoformat(metadatos["creado_en"]),
+            ruta=ruta,
+            owner_id=metadatos.get("owner_id"),
+        )
+        if self._vencido(artefacto.creado_en):
+            return None
+        return artefacto
+
+    def eliminar(self, artefacto_id: str) -> None:
+        for ruta in (self._ruta(artefacto_id), self._ruta_metadatos(artefacto_id)):
+            ruta.unlink(missing_ok=True)
+
+    def limpiar_vencidos(self) -> int:
+        """Elimina los artefactos que superaron el tiempo de retención"""
+        self._ultima_limpieza = time.monotonic()
+        if not self.directorio.exists():
+            return 0
+
+        eliminados = 0
+        limite = time.time() - settings.PAMI_ARTIFACTS_RETENTION_HOURS * 3600
+        for ruta in self.directorio.iterdir():
+            try:
+                if ruta.stat().st_mtime < limite:
+                    ruta.unlink(missing_ok=True)
+                    if not ruta.suffix:
+                        eliminados += 1
+            except FileNotFoundError:
+                continue
+        if eliminados:
+            logger.info(f"Se eliminaron {eliminados} artefactos PAMI vencidos")
+        return eliminados
+
+    def _vencido(self, creado_en: datetime) -> bool:
+        return datetime.utcnow() - creado_en > timedelta(
+            hours=settings.PAMI_ARTIFACTS_RETENTION_HOURS
+        )
+
+    def _ruta(self, artefacto_id: str) -> Path:
+        return self.directorio / artefacto_id
+
+    def _ruta_metadatos(self, artefacto_id: str) -> Path:
+        return self.directorio / f"{artefacto_id}.json"
+
+
+artifact_store = PAMIArtifactStore()
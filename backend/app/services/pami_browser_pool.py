@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, cast
+
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    StorageState,
+    async_playwright,
+)
+
+from app.core.config import settings
+from app.services.pami_resource_blocker import (
+    ContadorRecursos,
+    instalar_bloqueo_recursos,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ContextoPAMI:
+    """BrowserContext administrado por el pool, con su contador de uso"""
+
+    def __init__(self, context: BrowserContext) -> None:
+        self.context = context
+        self.creado_en = time.monotonic()
+        self.navegaciones = 0
+        self.generacion_sesion = 0
+        self.recursos = ContadorRecursos()
+        self.renovando = asyncio.Lock()
+
+    def reemplazar(self, context: BrowserContext) -> BrowserContext:
+        """Pasa a usar un BrowserContext nuevo y devuelve el anterior"""
+        anterior, self.context = self.context, context
+        self.creado_en = time.monotonic()
+        self.navegaciones = 0
+        return anterior
+
+    def registrar_navegacion(self) -> None:
+        self.navegaciones += 1
+
+    @property
+    def vencido(self) -> bool:
+        """Indica si el contexto debe reciclarse por cantidad de navegaciones o antigüedad"""
+        edad_minutos = (time.monotonic() - self.creado_en) / 60
+        return (
+            self.navegaciones >= settings.PAMI_CONTEXT_MAX_NAVIGATIONS
+            or edad_minutos >= settings.PAMI_CONTEXT_MAX_AGE_MINUTES
+        )
+
+
+class PAMIBrowserPool:
+    """
+    Pool de Chromium compartido por todas las verificaciones del proceso.
+
+    El navegador se lanza una sola vez (en el lifespan de la aplicación o en el
+    primer uso) y los contextos se prestan a cada verificación y se reciclan
+    al superar el límite de navegaciones o de antigüedad, también durante el
+    préstamo: la siguiente página que se abre usa un BrowserContext nuevo con la
+    misma sesión. La cantidad total de páginas abiertas en el proceso se limita
+    con un semáforo.
+    """
+
+    def __init__(self) -> None:
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        # El lock y el semáforo se crean en el primer uso, dentro del event loop que los usa
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock_loop: asyncio.Lock | None = None
+        self._semaforo_loop: asyncio.Semaphore | None = None
+        self._contextos_libres: list[ContextoPAMI] = []
+        self._contextos_en_uso = 0
+        self._paginas_abiertas = 0
+        self._contextos_reciclados = 0
+
+    def _sincronizacion(self) -> tuple[asyncio.Lock, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        if (
+            self._lock_loop is None
+            or self._semaforo_loop is None
+            or self._loop is not loop
+        ):
+            self._loop = loop
+            self._lock_loop = asyncio.Lock()
+            self._semaforo_loop = asyncio.Semaphore(settings.PAMI_MAX_PAGES_PER_WORKER)
+        return self._lock_loop, self._semaforo_loop
+
+    @property
+    def _lock(self) -> asyncio.Lock:
+        return self._sincronizacion()[0]
+
+    @property
+    def _semaforo_paginas(self) -> asyncio.Semaphore:
+        return self._sincronizacion()[1]
+
+    @property
+    def iniciado(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def iniciar(self) -> Browser:
+        """Lanza Chromium si todavía no está disponible"""
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+
+            # El navegador se cayó: los contextos libres ya no sirven
+            self._contextos_libres.clear()
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=settings.PAMI_HEADLESS
+            )
+            logger.info("Pool de navegador PAMI iniciado")
+            return self._browser
+
+    async def cerrar(self) -> None:
+        """Cierra contextos, navegador y Playwright"""
+        async with self._lock:
+            for contexto in self._contextos_libres:
+                try:
+                    await contexto.context.close()
+                except Exception as e:
+                    logger.warning(f"Error al cerrar contexto del pool: {e}")
+            self._contextos_libres.clear()
+
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception as e:
+                    logger.warning(f"Error al cerrar el navegador del pool: {e}")
+                self._browser = None
+
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+            logger.info("Pool de navegador PAMI cerrado")
+
+    @asynccontextmanager
+    async def contexto(
+        self, storage_state: dict[str, Any] | None = None
+    ) -> AsyncIterator[ContextoPAMI]:
+        """
+        Presta un contexto del pool de forma exclusiva durante una verificación.
+
+        Si hay que crear un contexto nuevo se inicializa con `storage_state`
+        para que arranque con la sesión ya autenticada.
+        """
+        browser = await self.iniciar()
+
+        contexto = None
+        while self._contextos_libres:
+            candidato = self._contextos_libres.pop()
+            if candidato.vencido:
+                await self._descartar(candidato)
+            else:
+                contexto = candidato
+                break
+        if contexto is None:
+            contexto = ContextoPAMI(
+                await browser.new_context(
+                    storage_state=cast(StorageState | None, storage_state)
+                )
+            )
+            if settings.PAMI_BLOCK_RESOURCES:
+                await instalar_bloqueo_recursos(contexto.context, contexto.recursos)
+        contexto.recursos.reiniciar()
+
+        self._contextos_en_uso += 1
+        reutilizable = True
+        try:
+            yield contexto
+        except BaseException:
+            reutilizable = False
+            raise
+        finally:
+            self._contextos_en_uso -= 1
+            if (
+                reutilizable
+                and not contexto.vencido
+                and browser.is_connected()
+                and len(self._contextos_libres) < settings.PAMI_POOL_MAX_IDLE_CONTEXTS
+            ):
+                self._contextos_libres.append(contexto)
+            else:
+                await self._descartar(contexto)
+
+    @asynccontextmanager
+    async def pagina(self, contexto: ContextoPAMI) -> AsyncIterator[Page]:
+        """
+        Abre una página en el contexto respetando el límite de páginas del proceso.
+
+        Si el contexto prestado ya está vencido, antes se renueva su BrowserContext.
+        """
+        async with self._semaforo_paginas:
+            if contexto.vencido:
+                await self._renovar(contexto)
+            context = contexto.context
+            page = await context.new_page()
+            self._paginas_abiertas += 1
+            try:
+                yield page
+            finally:
+                self._paginas_abiertas -= 1
+                if not page.is_closed():
+                    try:
+                        await page.close()
+                    except Exception as e:
+                        logger.warning(f"Error al cerrar página del pool: {e}")
+                # El BrowserContext reemplazado se cierra con su última página
+                if context is not contexto.context and not context.pages:
+                    await self._cerrar_context(context)
+
+    def estado(self) -> dict[str, Any]:
+        """Ocupación actual del pool para el health check"""
+        return {
+            "iniciado": self.iniciado,
+            "contextos_en_uso": self._contextos_en_uso,
+            "contextos_libres": len(self._contextos_libres),
+            "contextos_reciclados": self._contextos_reciclados,
+            "paginas_abiertas": self._paginas_abiertas,
+            "paginas_maximas": settings.PAMI_MAX_PAGES_PER_WORKER,
+        }
+
+    async def _renovar(self, contexto: ContextoPAMI) -> None:
+        """
+        Reemplaza el BrowserContext de un contexto prestado por uno nuevo con la
+        misma sesión (cookies y local storage). Las páginas abiertas terminan en el
+        anterior, que se cierra cuando se cierra la última.
+        """
+        async with contexto.renovando:
+            # Otra página pudo haberlo renovado mientras se esperaba el lock
+            if not contexto.vencido:
+                return
+            browser = await self.iniciar()
+            nuevo = await browser.new_context(
+                storage_state=await contexto.context.storage_state()
+            )
+            if settings.PAMI_BLOCK_RESOURCES:
+                await instalar_bloqueo_recursos(nuevo, contexto.recursos)
+            anterior = contexto.reemplazar(nuevo)
+            logger.info("Contexto PAMI renovado durante la verificación")
+            if not anterior.pages:
+                await self._cerrar_context(anterior)
+
+    async def _descartar(self, contexto: ContextoPAMI) -> None:
+        await self._cerrar_context(contexto.context)
+
+    async def _cerrar_context(self, context: BrowserContext) -> None:
+        self._contextos_reciclados += 1
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"Error al reciclar contexto del pool: {e}")
+
+
+browser_pool = PAMIBrowserPool()
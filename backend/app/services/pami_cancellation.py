@@ -0,0 +1,49 @@
+import asyncio
+import logging
+from collections.abc import Coroutine
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+async def ejecutar_cancelable(
+    corrutina: Coroutine[Any, Any, Any], cancelacion: asyncio.Event | None
+) -> bool:
+    """
+    Ejecuta `corrutina` hasta que termine o hasta que se active `cancelacion`.
+
+    Al cancelarse, la tarea recibe CancelledError: los trabajadores dejan de
+    tomar posiciones y los `async with` del pool cierran las páginas y descartan
+    los contextos prestados (en el modo particionado se terminan los procesos
+    hijos). Lo que ya se registró en el acumulador se conserva.
+
+    Returns:
+        True si la corrutina terminó, False si se canceló antes
+    """
+    if cancelacion is None:
+        await corrutina
+        return True
+    if cancelacion.is_set():
+        corrutina.close()
+        return False
+
+    tarea = asyncio.ensure_future(corrutina)
+    espera = asyncio.ensure_future(cancelacion.wait())
+    interrumpida = True
+    try:
+        await asyncio.wait({tarea, espera}, return_when=asyncio.FIRST_COMPLETED)
+        interrumpida = not tarea.done()
+    finally:
+        espera.cancel()
+        if interrumpida:
+            # Cancelación pedida o cancelación de quien espera: en ambos casos se libera todo
+            tarea.cancel()
+            await asyncio.gather(tarea, return_exceptions=True)
+
+    if interrumpida:
+        logger.info(
+            "Verificación cancelada: se detuvo el despacho y se liberaron páginas y contextos"
+        )
+        return False
+    tarea.result()
+    return True
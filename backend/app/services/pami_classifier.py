@@ -0,0 +1,140 @@
+import re
+from functools import lru_cache
+
+from app.core.config import settings
+
+# Categoría de las páginas que contienen PAMI_SEARCH_TEXT; equivale a Coincide = True
+CATEGORIA_COINCIDE = "coincide"
+# Categoría de las páginas donde no aparece ningún predicado
+CATEGORIA_SIN_COINCIDENCIA = "sin_coincidencia"
+
+# Los patrones con este prefijo son expresiones regulares; el resto se busca literal
+PREFIJO_REGEX = "re:"
+
+# Los nombres se usan como nombre de hoja ("Cat_<nombre>", máximo 31 caracteres en Excel)
+_NOMBRE_VALIDO = re.compile(r"^[A-Za-z0-9_\-]{1,27}$")
+
+
+class PredicadoInvalido(ValueError):
+    """Un predicado tiene un nombre o una expresión regular inválidos"""
+
+
+class ClasificadorPaginas:
+    """
+    Clasifica el contenido de una página con un conjunto de predicados con nombre.
+
+    Los predicados (literales o regex) se combinan en una única expresión con un
+    grupo con nombre por predicado, así que cada página se recorre una sola vez
+    sin importar cuántos predicados haya. La categoría es el primer predicado,
+    en orden de prioridad, que aparece en la página; el texto buscado
+    (PAMI_SEARCH_TEXT, categoría "coincide") siempre tiene la mayor prioridad
+    para que el veredicto Coincide no cambie al agregar predicados.
+
+    Cada alternativa va dentro de un lookahead: el recorrido avanza de a un
+    carácter y una coincidencia no oculta a otra que empiece dentro de ella.
+    """
+
+    def __init__(self, predicados: dict[str, str]) -> None:
+        self._texto_buscado = settings.PAMI_SEARCH_TEXT
+        self.categorias = [CATEGORIA_COINCIDE]
+        alternativas = [re.escape(self._texto_buscado)]
+        for nombre, patron in predicados.items():
+            validar_nombre(nombre)
+            self.categorias.append(nombre)
+            alternativas.append(compilar_patron(nombre, patron).pattern)
+
+        self._grupos = {f"p{indice}": indice for indice in range(len(self.categorias))}
+        try:
+            self._patron = re.compile(
+                "(?="
+                + "|".join(
+                    f"(?P<p{indice}>{alternativa})"
+                    for indice, alternativa in enumerate(alternativas)
+                )
+                + ")"
+            )
+        except re.error as e:
+            # Por ejemplo flags globales como (?i) en medio de la expresión; se usa (?i:...)
+            raise PredicadoInvalido(
+                f"Los predicados no se pueden combinar en una expresión: {e}"
+            ) from e
+
+    @property
+    def categorias_adicionales(self) -> list[str]:
+        return self.categorias[1:]
+
+    def clasificar(self, contenido: str) -> str:
+        """Categoría de la página: el predicado de mayor prioridad presente, o "sin_coincidencia" """
+        if not self.categorias_adicionales:
+            # Sin predicados adicionales alcanza con buscar el texto como siempre
+            return (
+                CATEGORIA_COINCIDE
+                if self._texto_buscado in contenido
+                else CATEGORIA_SIN_COINCIDENCIA
+            )
+
+        mejor: int | None = None
+        for coincidencia in self._patron.finditer(contenido):
+            if coincidencia.lastgroup is None:
+                continue
+            indice = self._grupos[coincidencia.lastgroup]
+            if indice == 0:
+                return CATEGORIA_COINCIDE
+            if mejor is None or indice < mejor:
+                mejor = indice
+        return (
+            self.categorias[mejor] if mejor is not None else CATEGORIA_SIN_COINCIDENCIA
+        )
+
+
+def validar_nombre(nombre: str) -> None:
+    if not _NOMBRE_VALIDO.match(nombre) or nombre in (
+        CATEGORIA_COINCIDE,
+        CATEGORIA_SIN_COINCIDENCIA,
+    ):
+        raise PredicadoInvalido(
+            f"Nombre de predicado inválido: {nombre!r} (letras, números, '_' o '-', hasta 27 caracteres; "
+            f"'{CATEGORIA_COINCIDE}' y '{CATEGORIA_SIN_COINCIDENCIA}' están reservados)"
+        )
+
+
+def compilar_patron(nombre: str, patron: str) -> re.Pattern[str]:
+    """Compila un predicado: "re:<regex>" como expresión regular y cualquier otro texto como literal"""
+    if not patron.startswith(PREFIJO_REGEX):
+        return re.compile(re.escape(patron))
+    try:
+        compilado = re.compile(patron[len(PREFIJO_REGEX) :])
+    except re.error as e:
+        raise PredicadoInvalido(
+            f"Expresión regular inválida en el predicado {nombre!r}: {e}"
+        ) from e
+    if compilado.groupindex:
+        # Los grupos con nombre chocarían con los de la expresión combinada
+        raise PredicadoInvalido(
+            f"El predicado {nombre!r} no puede usar grupos con nombre"
+        )
+    return compilado
+
+
+def validar_predicados(predicados: dict[str, str]) -> None:
+    """
+    Raises:
+        PredicadoInvalido: si algún nombre o expresión regular es inválido
+    """
+    ClasificadorPaginas(predicados)
+
+
+def obtener_clasificador(
+    predicados: dict[str, str] | None = None,
+) -> ClasificadorPaginas:
+    """Clasificador para los predicados de la solicitud o, si no vienen, los de PAMI_PREDICATES"""
+    elegidos = predicados if predicados is not None else settings.PAMI_PREDICATES
+    return _clasificador(settings.PAMI_SEARCH_TEXT, tuple(elegidos.items()))
+
+
+@lru_cache(maxsize=32)
+def _clasificador(
+    _texto_buscado: str, predicados: tuple[tuple[str, str], ...]
+) -> ClasificadorPaginas:
+    # El texto buscado forma parte de la clave para no reutilizar un clasificador con otro PAMI_SEARCH_TEXT
+    return ClasificadorPaginas(dict(predicados))
@@ -0,0 +1,98 @@
+import logging
+from collections.abc import Iterator
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Any
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+
+from app.core.config import settings
+from app.services.pami_result_writer import crear_buffer
+
+logger = logging.getLogger(__name__)
+
+PLANTILLA_REPORTE = "pami_reporte.html"
+
+# Orden de los campos de cada fila en el JSON del reporte; el script del template los lee por posición
+CAMPOS_FILA = (
+    "url",
+    "paciente",
+    "fecha",
+    "f_alta",
+    "motivo",
+    "observacion",
+    "diagnostico",
+)
+
+# Cantidad de fragmentos de texto que se juntan antes de escribirlos en el buffer
+_FRAGMENTOS_POR_ESCRITURA = 256
+
+
+@lru_cache(maxsize=1)
+def plantilla_reporte() -> Template:
+    """Template del reporte, compilado una sola vez por proceso"""
+    entorno = Environment(
+        loader=FileSystemLoader(Path(__file__).parent / "templates"),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    # JSON compacto para las filas embebidas; |tojson igual escapa <, >, & y '
+    entorno.policies["json.dumps_kwargs"] = {
+        "separators": (",", ":"),
+        "ensure_ascii": False,
+    }
+    return entorno.get_template(PLANTILLA_REPORTE)
+
+
+def escribir_reporte_html(
+    urls_para_html: list[dict[str, Any]],
+) -> tuple[IO[bytes], str]:
+    """
+    Renderiza el reporte HTML de las URLs coincidentes en un buffer spooled y lo devuelve rebobinado.
+
+    El template se recorre con generate(), así que el documento nunca se arma
+    completo en memoria. Solo la primera página (PAMI_HTML_PAGE_SIZE filas) va
+    como HTML; las filas viajan además como JSON compacto y el navegador pagina
+    y filtra el resto.
+
+    Es bloqueante: desde código async se llama con asyncio.to_thread.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nombre_archivo = f"ControlUrls_PAMI_{timestamp}.html"
+    por_pagina = max(1, settings.PAMI_HTML_PAGE_SIZE)
+
+    buffer = crear_buffer()
+    try:
+        fragmentos = plantilla_reporte().generate(
+            total=len(urls_para_html),
+            fecha=datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+            por_pagina=por_pagina,
+            primera_pagina=_filas(urls_para_html[:por_pagina]),
+            filas=_filas(urls_para_html),
+        )
+        _escribir_fragmentos(buffer, fragmentos)
+    except BaseException:
+        buffer.close()
+        raise
+
+    buffer.seek(0)
+    logger.info(f"Archivo HTML generado: {nombre_archivo}")
+    return buffer, nombre_archivo
+
+
+def _filas(urls_para_html: list[dict[str, Any]]) -> Iterator[list[str]]:
+    for sitio in urls_para_html:
+        yield [str(sitio.get(campo, "N/A")) for campo in CAMPOS_FILA]
+
+
+def _escribir_fragmentos(buffer: IO[bytes], fragmentos: Iterator[str]) -> None:
+    pendientes: list[str] = []
+    for fragmento in fragmentos:
+        pendientes.append(fragmento)
+        if len(pendientes) >= _FRAGMENTOS_POR_ESCRITURA:
+            buffer.write("".join(pendientes).encode("utf-8"))
+            pendientes.clear()
+    buffer.write("".join(pendientes).encode("utf-8"))
@@ -0,0 +1,82 @@
+import logging
+from types import TracebackType
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RespuestaNoConcluyente(Exception):
+    """La respuesta HTTP no alcanza para decidir sin renderizar la página"""
+
+    def __init__(self, mensaje: str, status_code: int | None = None) -> None:
+        super().__init__(mensaje)
+        self.status_code = status_code
+
+
+class PAMIHttpVerifier:
+    """
+    Verificador de URLs PAMI por HTTP directo, sin renderizar páginas.
+
+    Reutiliza las cookies de la sesión iniciada con Playwright en un
+    `httpx.AsyncClient` con keep-alive y límite de conexiones. Si la respuesta
+    parece una redirección al login o contenido que depende de JavaScript se
+    lanza `RespuestaNoConcluyente` para que la URL se verifique con el navegador.
+    """
+
+    def __init__(self, storage_state: dict[str, Any], max_conexiones: int) -> None:
+        cookies = httpx.Cookies()
+        for cookie in storage_state.get("cookies", []):
+            cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+            )
+
+        self._client = httpx.AsyncClient(
+            cookies=cookies,
+            follow_redirects=True,
+            timeout=settings.PAMI_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=max_conexiones,
+                max_keepalive_connections=max_conexiones,
+            ),
+        )
+
+    async def __aenter__(self) -> "PAMIHttpVerifier":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self._client.aclose()
+
+    async def obtener_contenido(self, url_completa: str) -> str:
+        """Descarga el HTML de la URL y valida que sea concluyente"""
+        respuesta = await self._client.get(url_completa)
+        if requiere_navegador(respuesta):
+            raise RespuestaNoConcluyente(
+                f"Respuesta no concluyente para {url_completa} (HTTP {respuesta.status_code})",
+                status_code=respuesta.status_code,
+            )
+        return respuesta.text
+
+
+def requiere_navegador(respuesta: httpx.Response) -> bool:
+    """Detecta respuestas de login o contenido que solo se completa con JavaScript"""
+    if respuesta.status_code != 200:
+        return True
+
+    contenido = respuesta.text
+    if settings.PAMI_LOGIN_FORM_MARKER in contenido:
+        return True
+    if settings.PAMI_SEARCH_TEXT in contenido:
+        return False
+    return len(contenido) < settings.PAMI_HTTP_MIN_CONTENT_LENGTH
@@ -0,0 +1,162 @@
+import csv
+import importlib.util
+import io
+import logging
+
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Firmas de los formatos de planilla aceptados
+_FIRMA_XLSX = b"PK\x03\x04"
+_FIRMA_XLS = b"\xd0\xcf\x11\xe0"
+
+FORMATO_XLSX = "xlsx"
+FORMATO_XLS = "xls"
+FORMATO_CSV = "csv"
+
+EXTENSIONES_ACEPTADAS = (".xlsx", ".xls", ".csv")
+
+
+class ColumnasFaltantes(ValueError):
+    """La planilla no tiene alguna de las columnas pedidas"""
+
+    def __init__(self, faltantes: list[str], disponibles: list[str]) -> None:
+        super().__init__(f"Columnas faltantes en el archivo: {faltantes}")
+        self.faltantes = faltantes
+        self.disponibles = disponibles
+
+
+def detectar_formato(contenido: bytes) -> str:
+    """Formato de la planilla según sus primeros bytes; lo que no es Excel se lee como CSV"""
+    if contenido.startswith(_FIRMA_XLSX):
+        return FORMATO_XLSX
+    if contenido.startswith(_FIRMA_XLS):
+        return FORMATO_XLS
+    return FORMATO_CSV
+
+
+def motor_excel(formato: str) -> str | None:
+    """Motor de pandas para leer Excel: calamine si está instalado, si no el de pandas por defecto"""
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return "openpyxl" if formato == FORMATO_XLSX else None
+
+
+def leer_planilla(
+    contenido: bytes, columna_urls: str, columnas_adicionales: list[str]
+) -> pd.DataFrame:
+    """
+    Lee de la planilla solo la columna de IDs y las columnas adicionales.
+
+    Primero se leen los encabezados para validar las columnas sin parsear el
+    archivo completo; después se leen únicamente las columnas pedidas. Las filas
+    sin ID se descartan y las columnas de texto con muchos valores repetidos
+    (por ejemplo Diagnostico o Motivo) se convierten a categóricas.
+
+    Es CPU-bound: desde código async se llama con asyncio.to_thread.
+
+    Raises:
+        ColumnasFaltantes: si falta alguna de las columnas pedidas
+    """
+    columnas_requeridas = list(dict.fromkeys([columna_urls, *columnas_adicionales]))
+    df, formato = _leer_columnas(contenido, columnas_requeridas, columnas_requeridas)
+
+    # Una sola copia: filtra las filas sin ID y deja las columnas en el orden pedido
+    df = df.loc[df[columna_urls].notna(), columnas_requeridas].reset_index(drop=True)
+    _categorizar(df, columna_urls)
+
+    logger.info(
+        f"Se cargaron {len(df)} registros del archivo ({formato}, {df.memory_usage(deep=True).sum()} bytes)"
+    )
+    return df
+
+
+def contar_filas_con_id(
+    contenido: bytes, columna_urls: str, columnas_adicionales: list[str]
+) -> int:
+    """
+    Cantidad de filas con ID de la planilla, como len(leer_planilla(...)).
+
+    Valida todas las columnas pedidas con los encabezados pero lee solo la de IDs;
+    sirve para encolar un trabajo que se va a leer completo recién al ejecutarse.
+
+    Raises:
+        ColumnasFaltantes: si falta alguna de las columnas pedidas
+    """
+    columnas_requeridas = list(dict.fromkeys([columna_urls, *columnas_adicionales]))
+    df, _ = _leer_columnas(contenido, columnas_requeridas, [columna_urls])
+    return int(df[columna_urls].notna().sum())
+
+
+def _leer_columnas(
+    contenido: bytes, columnas_requeridas: list[str], columnas_leidas: list[str]
+) -> tuple[pd.DataFrame, str]:
+    """Valida `columnas_requeridas` con los encabezados y lee solo `columnas_leidas`"""
+    formato = detectar_formato(contenido)
+    if formato == FORMATO_CSV:
+        return _leer_csv(contenido, columnas_requeridas, columnas_leidas), formato
+
+    motor = motor_excel(formato)
+    encabezados = pd.read_excel(io.BytesIO(contenido), nrows=0, engine=motor).columns
+    _validar_columnas(columnas_requeridas, list(encabezados))
+    return pd.read_excel(
+        io.BytesIO(contenido), usecols=columnas_leidas, engine=motor
+    ), formato
+
+
+def _leer_csv(
+    contenido: bytes, columnas_requeridas: list[str], columnas_leidas: list[str]
+) -> pd.DataFrame:
+    # Las exportaciones de Excel en español suelen venir en Windows-1252 y separadas por ';'
+    try:
+        texto_inicial = contenido[:65536].decode("utf-8-sig")
+        codificacion = "utf-8-sig"
+    except UnicodeDecodeError:
+        texto_inicial = contenido[:65536].decode("cp1252", errors="replace")
+        codificacion = "cp1252"
+    try:
+        separador = (
+            csv.Sniffer()
+            .sniff(texto_inicial.split("\n", 1)[0], delimiters=",;\t|")
+            .delimiter
+        )
+    except csv.Error:
+        separador = ","
+
+    encabezados = pd.read_csv(
+        io.BytesIO(contenido), nrows=0, sep=separador, encoding=codificacion
+    ).columns
+    _validar_columnas(
+        columnas_requeridas, [str(columna).strip() for columna in encabezados]
+    )
+    return pd.read_csv(
+        io.BytesIO(contenido),
+        sep=separador,
+        encoding=codificacion,
+        usecols=lambda columna: str(columna).strip() in columnas_leidas,
+    ).rename(columns=lambda columna: str(columna).strip())
+
+
+def _validar_columnas(columnas_requeridas: list[str], disponibles: list[str]) -> None:
+    faltantes = [
+        columna for columna in columnas_requeridas if columna not in disponibles
+    ]
+    if faltantes:
+        raise ColumnasFaltantes(faltantes, disponibles)
+
+
+def _categorizar(df: pd.DataFrame, columna_urls: str) -> None:
+    """Convierte a categóricas las columnas de texto con pocos valores distintos"""
+    if df.empty:
+        return
+    for columna in df.columns:
+        if columna == columna_urls or df[columna].dtype != object:
+            continue
+        if (
+            df[columna].nunique(dropna=True) / len(df)
+            <= settings.PAMI_CATEGORICAL_MAX_UNIQUE_RATIO
+        ):
+            df[columna] = df[columna].astype("category")
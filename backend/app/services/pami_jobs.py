@@ -0,0 +1,369 @@
+import asyncio
+import io
+import logging
+import time
+import uuid
+from collections.abc import Coroutine
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+from app.models import (
+    PAMIURLResult,
+    PAMIVerificationJob,
+    PAMIVerificationJobPublic,
+    PAMIVerificationRequest,
+    PAMIVerificationStats,
+)
+from app.services.pami_rate_controller import ControladorConcurrencia
+from app.services.pami_verification_service import PAMIVerificationService
+
+logger = logging.getLogger(__name__)
+
+
+def _actualizar_job(job_id: uuid.UUID, datos: dict[str, Any]) -> None:
+    with Session(engine) as session:
+        crud.update_pami_verification_job(session=session, job_id=job_id, datos=datos)
+
+
+def construir_job_publico(
+    job: PAMIVerificationJob, posicion_cola: int | None = None
+) -> PAMIVerificationJobPublic:
+    """Arma la respuesta pública del trabajo con porcentaje, throughput, ETA y posición en la cola"""
+    porcentaje = 0.0
+    urls_por_segundo = 0.0
+    eta_segundos = None
+
+    if job.total_urls > 0:
+        porcentaje = round(job.urls_procesadas * 100 / job.total_urls, 2)
+
+    if job.iniciado_en is not None:
+        fin = job.finalizado_en or datetime.utcnow()
+        transcurrido = (fin - job.iniciado_en).total_seconds()
+        if transcurrido > 0:
+            urls_por_segundo = round(job.urls_procesadas / transcurrido, 3)
+        if job.estado == "en_proceso" and urls_por_segundo > 0:
+            eta_segundos = round(
+                (job.total_urls - job.urls_procesadas) / urls_por_segundo, 1
+            )
+
+    return PAMIVerificationJobPublic.model_validate(
+        job,
+        update={
+            "porcentaje": porcentaje,
+            "urls_por_segundo": urls_por_segundo,
+            "eta_segundos": eta_segundos,
+            "posicion_cola": posicion_cola if job.estado == "pendiente" else None,
+            "estadisticas": PAMIVerificationStats.model_validate(job.estadisticas)
+            if job.estadisticas
+            else None,
+        },
+    )
+
+
+class CheckpointResultados:
+    """
+    Acumula los resultados por ID de un trabajo y los guarda en lotes.
+
+    Se vacía cuando junta PAMI_CHECKPOINT_BATCH_SIZE resultados o en cada
+    intervalo de reporte de progreso, con un único executemany por lote.
+    """
+
+    def __init__(self, job_id: uuid.UUID) -> None:
+        self.job_id = job_id
+        self.lote_lleno = asyncio.Event()
+        self._pendientes: list[dict[str, Any]] = []
+
+    def agregar(self, resultado: PAMIURLResult) -> None:
+        self._pendientes.append(
+            {
+                "url_id": resultado.id,
+                "coincide": resultado.coincide,
+                "error": resultado.error,
+                "latencia_ms": resultado.latencia_ms,
+                "clase_error": resultado.clase_error,
+                "categoria": resultado.categoria,
+                "verificado_en": datetime.utcnow(),
+            }
+        )
+        if len(self._pendientes) >= settings.PAMI_CHECKPOINT_BATCH_SIZE:
+            self.lote_lleno.set()
+
+    async def guardar(self) -> None:
+        self.lote_lleno.clear()
+        lote, self._pendientes = self._pendientes, []
+        if lote:
+            await asyncio.to_thread(_guardar_resultados, self.job_id, lote)
+
+
+def _guardar_resultados(job_id: uuid.UUID, resultados: list[dict[str, Any]]) -> None:
+    with Session(engine) as session:
+        crud.save_pami_verification_results(
+            session=session, job_id=job_id, resultados=resultados
+        )
+
+
+def _obtener_verificados(job_id: uuid.UUID) -> dict[str, tuple[bool, str | None]]:
+    with Session(engine) as session:
+        return crud.get_pami_verified_results(session=session, job_id=job_id)
+
+
+def _cancelacion_solicitada(job_id: uuid.UUID) -> bool:
+    with Session(engine) as session:
+        return crud.get_pami_job_cancellation_requested(session=session, job_id=job_id)
+
+
+def job_reanudable(job: PAMIVerificationJob) -> bool:
+    """Un trabajo se puede reanudar si falló, si se canceló o si quedó en proceso sin reportar progreso"""
+    if job.archivo_entrada is None:
+        return False
+    if job.estado in ("error", "cancelado"):
+        return True
+    if job.estado == "en_proceso":
+        ultima_actualizacion = job.actualizado_en or job.iniciado_en or job.creado_en
+        minutos = (datetime.utcnow() - ultima_actualizacion).total_seconds() / 60
+        return minutos >= settings.PAMI_JOB_STALE_MINUTES
+    return False
+
+
+class PAMIJobRunner:
+    """
+    Ejecuta trabajos de verificación PAMI en segundo plano.
+
+    El trabajo corre como tarea asyncio en el proceso cuyo planificador lo
+    reclamó de la cola (ver pami_scheduler), pero todo su estado (progreso, resultados por ID, estadísticas y archivos)
+    se guarda en Postgres para poder consultarlo desde cualquier worker y
+    reanudarlo si la corrida se interrumpe.
+
+    Para cancelar un trabajo se marca `cancelacion_solicitada` en Postgres: el
+    proceso que lo ejecuta lo detecta en el siguiente reporte de progreso (o de
+    inmediato si el pedido llegó a ese mismo proceso), corta la verificación y
+    guarda los resultados parciales.
+    """
+
+    def __init__(self) -> None:
+        self._tareas: dict[uuid.UUID, asyncio.Task[None]] = {}
+        self._cancelaciones: dict[uuid.UUID, asyncio.Event] = {}
+
+    def lanzar(self, job: PAMIVerificationJob) -> asyncio.Task[None]:
+        """
+        Ejecuta un trabajo reclamado de la cola. Si es una reanudación, se saltean
+        los IDs que ya tienen resultado guardado.
+        """
+        if job.archivo_entrada is None:
+            raise ValueError("El trabajo no tiene archivo de entrada guardado")
+        request_data = PAMIVerificationRequest.model_validate(job.parametros)
+        return self._crear_tarea(
+            job.id,
+            self._ejecutar(
+                job.id,
+                job.archivo_entrada,
+                request_data,
+                job.owner_id,
+                job.nombre_archivo,
+            ),
+        )
+
+    def _crear_tarea(
+        self, job_id: uuid.UUID, corrutina: Coroutine[Any, Any, None]
+    ) -> asyncio.Task[None]:
+        tarea = asyncio.create_task(corrutina)
+        self._tareas[job_id] = tarea
+        self._cancelaciones[job_id] = asyncio.Event()
+
+        def limpiar(_: asyncio.Task[None]) -> None:
+            self._tareas.pop(job_id, None)
+            self._cancelaciones.pop(job_id, None)
+
+        tarea.add_done_callback(limpiar)
+        return tarea
+
+    @property
+    def en_ejecucion(self) -> int:
+        return len(self._tareas)
+
+    def ejecutando(self, job_id: uuid.UUID) -> bool:
+        return job_id in self._tareas
+
+    def cancelar(self, job_id: uuid.UUID) -> bool:
+        """
+        Corta la verificación de un trabajo que corre en este proceso.
+
+        Returns:
+            False si el trabajo no corre en este proceso (lo detectará su proceso por Postgres)
+        """
+        cancelacion = self._cancelaciones.get(job_id)
+        if cancelacion is None:
+            return False
+        cancelacion.set()
+        return True
+
+    async def detener(self) -> None:
+        """Cancela los trabajos en curso del proceso (apagado de la aplicación)"""
+        tareas = list(self._tareas.values())
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+
+    async def _ejecutar(
+        self,
+        job_id: uuid.UUID,
+        contenido: bytes,
+        request_data: PAMIVerificationRequest,
+        owner_id: uuid.UUID,
+        nombre_archivo: str,
+    ) -> None:
+        await asyncio.to_thread(
+            _actualizar_job,
+            job_id,
+            {
+                "estado": "en_proceso",
+                "iniciado_en": datetime.utcnow(),
+                "finalizado_en": None,
+                "mensaje_error": None,
+            },
+        )
+        # Un trabajo nuevo no tiene resultados guardados; uno reanudado saltea los que ya tiene
+        verificados_previos = (
+            await asyncio.to_thread(_obtener_verificados, job_id) or None
+        )
+
+        progreso = {"procesadas": 0, "total": 0}
+        checkpoint = CheckpointResultados(job_id)
+        controlador = ControladorConcurrencia()
+        cancelacion = self._cancelaciones.get(job_id) or asyncio.Event()
+        if await asyncio.to_thread(_cancelacion_solicitada, job_id):
+            cancelacion.set()
+
+        def registrar_progreso(procesadas: int, total: int) -> None:
+            progreso["procesadas"] = procesadas
+            progreso["total"] = total
+
+        detenido = False
+
+        async def reportar_progreso() -> None:
+            ultimo = None
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        checkpoint.lote_lleno.wait(),
+                        timeout=settings.PAMI_JOB_PROGRESS_INTERVAL_SECONDS,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                if detenido:
+                    return
+                if not cancelacion.is_set() and await asyncio.to_thread(
+                    _cancelacion_solicitada, job_id
+                ):
+                    logger.info(f"Cancelación solicitada para el trabajo PAMI {job_id}")
+                    cancelacion.set()
+                await checkpoint.guardar()
+                actual = (
+                    progreso["procesadas"],
+                    progreso["total"],
+                    controlador.concurrencia,
+                    controlador.tasa(),
+                )
+                if actual != ultimo:
+                    await asyncio.to_thread(
+                        _actualizar_job,
+                        job_id,
+                        {
+                            "urls_procesadas": actual[0],
+                            "total_urls": actual[1],
+                            "concurrencia_actual": actual[2],
+                            "tasa_actual": actual[3],
+                        },
+                    )
+                    ultimo = actual
+
+        async def finalizar_reporte() -> None:
+            # Se espera la escritura en curso para que no pise el estado final
+            nonlocal detenido
+            detenido = True
+            checkpoint.lote_lleno.set()
+            await asyncio.gather(reportero, return_exceptions=True)
+            await checkpoint.guardar()
+
+        reportero = asyncio.create_task(reportar_progreso())
+        inicio = time.perf_counter()
+        try:
+            resultado = await PAMIVerificationService.ejecutar_verificacion(
+                io.BytesIO(contenido),
+                request_data,
+                progreso=registrar_progreso,
+                resultado_url=checkpoint.agregar,
+                verificados_previos=verificados_previos,
+                controlador=controlador,
+                cancelacion=cancelacion,
+            )
+            await finalizar_reporte()
+            try:
+                excel, html = await PAMIVerificationService.guardar_artefactos(
+                    resultado
+                )
+            finally:
+                resultado.cerrar()
+            await PAMIVerificationService.guardar_historial(
+                resultado, owner_id, nombre_archivo, "job", job_id
+            )
+            stats = resultado.estadisticas
+            await asyncio.to_thread(
+                _actualizar_job,
+                job_id,
+                {
+                    "estado": "cancelado" if stats.parcial else "completado",
+                    "finalizado_en": datetime.utcnow(),
+                    "concurrencia_actual": None,
+                    "tasa_actual": None,
+                    "total_urls": stats.total_urls,
+                    "urls_procesadas": stats.total_urls - stats.urls_sin_verificar,
+                    "estadisticas": resultado.estadisticas.model_dump(),
+                    "archivo_excel_id": excel.id,
+                    "archivo_html_id": html.id,
+                    "nombre_archivo_excel": resultado.nombre_archivo_excel,
+                    "nombre_archivo_html": resultado.nombre_archivo_html,
+                },
+            )
+            logger.info(
+                f"Trabajo PAMI {job_id} {'cancelado' if stats.parcial else 'completado'} "
+                f"en {time.perf_counter() - inicio:.1f}s"
+            )
+        except asyncio.CancelledError:
+            await finalizar_reporte()
+            await asyncio.to_thread(
+                _actualizar_job,
+                job_id,
+                {
+                    "estado": "error",
+                    "finalizado_en": datetime.utcnow(),
+                    "concurrencia_actual": None,
+                    "tasa_actual": None,
+                    "mensaje_error": "Trabajo interrumpido por reinicio del servidor",
+                },
+            )
+            raise
+        except Exception as e:
+            await finalizar_reporte()
+            detalle = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Error en trabajo PAMI {job_id}: {detalle}")
+            await asyncio.to_thread(
+                _actualizar_job,
+                job_id,
+                {
+                    "estado": "error",
+                    "finalizado_en": datetime.utcnow(),
+                    "concurrencia_actual": None,
+                    "tasa_actual": None,
+                    "mensaje_error": str(detalle)[:1000],
+                },
+            )
+
+
+job_runner = PAMIJobRunner()
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+import httpx
+from playwright.async_api import Error as PlaywrightError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ventana en segundos para medir la tasa actual de URLs por segundo
+_VENTANA_TASA_SEGUNDOS = 10.0
+
+
+def es_sobrecarga(error: BaseException) -> bool:
+    """Errores que indican que el servidor está saturado: timeouts, 5xx/429 y conexiones caídas"""
+    codigo: int | None = getattr(error, "status_code", None)
+    if codigo is not None:
+        return codigo >= 500 or codigo == 429
+    if isinstance(
+        error, asyncio.TimeoutError | httpx.TimeoutException | httpx.TransportError
+    ):
+        return True
+    if isinstance(error, PlaywrightError):
+        mensaje = str(error)
+        return "Timeout" in mensaje or "net::ERR" in mensaje
+    return False
+
+
+class TurnoVerificacion:
+    """Un permiso del controlador para verificar una URL"""
+
+    def __init__(self) -> None:
+        self.inicio = time.monotonic()
+        self.sobrecarga = False
+        self.sin_trabajo = False
+
+    def marcar_sobrecarga(self) -> None:
+        self.sobrecarga = True
+
+    def marcar_sin_trabajo(self) -> None:
+        """El turno no verificó ninguna URL: no cuenta para la tasa ni para el límite"""
+        self.sin_trabajo = True
+
+
+class ControladorConcurrencia:
+    """
+    Controla cuántas URLs se verifican en paralelo con un esquema AIMD.
+
+    - Suma en promedio una URL concurrente por cada ventana de turnos que terminan
+      bien por debajo de PAMI_AIMD_LATENCY_TARGET_SECONDS.
+    - Ante timeouts, errores 5xx/429 o conexiones caídas multiplica el límite por
+      PAMI_AIMD_DECREASE_FACTOR, una sola vez por ventana (los turnos que empezaron
+      antes del último recorte no vuelven a recortar).
+    - Nunca supera el techo de la fase ni PAMI_MAX_REQUESTS_PER_SECOND si está configurado.
+    """
+
+    def __init__(self) -> None:
+        self.limite = 1.0
+        self.maximo = 1
+        self._en_curso = 0
+        self._condicion = asyncio.Condition()
+        self._ultimo_recorte = 0.0
+        self._proximo_turno = 0.0
+        self._inicio = time.monotonic()
+        self._finalizados: deque[float] = deque()
+
+    def configurar(self, inicial: int, maximo: int) -> None:
+        """Fija el límite inicial y el techo para una fase de la verificación"""
+        self.maximo = max(1, maximo)
+        self.limite = float(
+            max(settings.PAMI_AIMD_MIN_CONCURRENCY, min(inicial, self.maximo))
+        )
+        self._inicio = time.monotonic()
+        self._finalizados.clear()
+        logger.info(
+            f"Concurrencia adaptativa: inicial {int(self.limite)}, techo {self.maximo}"
+        )
+
+    @property
+    def concurrencia(self) -> int:
+        return int(self.limite)
+
+    def tasa(self) -> float:
+        """URLs por segundo terminadas en la última ventana"""
+        ahora = time.monotonic()
+        self._descartar_viejos(ahora)
+        ventana = min(_VENTANA_TASA_SEGUNDOS, ahora - self._inicio)
+        return round(len(self._finalizados) / ventana, 3) if ventana > 0 else 0.0
+
+    def reflejar(self, concurrencia: int, terminadas: int = 0) -> None:
+        """
+        Refleja controladores que corren en otros procesos (verificación particionada):
+        la concurrencia pasa a ser la suma que informan y sus URLs terminadas cuentan para la tasa.
+        """
+        ahora = time.monotonic()
+        self._finalizados.extend([ahora] * terminadas)
+        self._descartar_viejos(ahora)
+        self.limite = float(concurrencia)
+
+    async def esperar_cupo(self, numero: int, terminado: Callable[[], bool]) -> bool:
+        """
+        Espera a que la concurrencia permita activar al trabajador `numero`.
+
+        Así los recursos de cada trabajador (por ejemplo su página) se abren recién
+        cuando el límite crece hasta usarlos. Devuelve False si `terminado()` se
+        cumple antes, por ejemplo cuando ya no quedan URLs en la cola.
+        """
+        async with self._condicion:
+            await self._condicion.wait_for(
+                lambda: numero < self.concurrencia or terminado()
+            )
+        return not terminado()
+
+    @asynccontextmanager
+    async def turno(self) -> AsyncIterator[TurnoVerificacion]:
+        """Espera un lugar libre, respeta la tasa máxima y ajusta el límite al terminar"""
+        async with self._condicion:
+            await self._condicion.wait_for(lambda: self._en_curso < self.concurrencia)
+            self._en_curso += 1
+        try:
+            await self._esperar_tasa()
+            turno = TurnoVerificacion()
+            try:
+                yield turno
+            except Exception as e:
+                if es_sobrecarga(e):
+                    turno.marcar_sobrecarga()
+                raise
+            finally:
+                self._ajustar(turno)
+        finally:
+            async with self._condicion:
+                self._en_curso -= 1
+                self._condicion.notify_all()
+
+    async def _esperar_tasa(self) -> None:
+        if settings.PAMI_MAX_REQUESTS_PER_SECOND <= 0:
+            return
+        ahora = time.monotonic()
+        espera = self._proximo_turno - ahora
+        self._proximo_turno = (
+            max(ahora, self._proximo_turno) + 1 / settings.PAMI_MAX_REQUESTS_PER_SECOND
+        )
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    def _ajustar(self, turno: TurnoVerificacion) -> None:
+        if turno.sin_trabajo:
+            return
+        ahora = time.monotonic()
+        self._finalizados.append(ahora)
+        self._descartar_viejos(ahora)
+
+        anterior = self.concurrencia
+        if turno.sobrecarga:
+            if turno.inicio >= self._ultimo_recorte:
+                self.limite = max(
+                    float(settings.PAMI_AIMD_MIN_CONCURRENCY),
+                    self.limite * settings.PAMI_AIMD_DECREASE_FACTOR,
+                )
+                self._ultimo_recorte = ahora
+        elif ahora - turno.inicio <= settings.PAMI_AIMD_LATENCY_TARGET_SECONDS:
+            self.limite = min(float(self.maximo), self.limite + 1 / self.limite)
+
+        # Los trabajadores que esperan lugar se despiertan al liberar el turno
+        if self.concurrencia != anterior:
+            logger.info(f"Concurrencia adaptativa: {anterior} -> {self.concurrencia}")
+
+    def _descartar_viejos(self, ahora: float) -> None:
+        while (
+            self._finalizados and ahora - self._finalizados[0] > _VENTANA_TASA_SEGUNDOS
+        ):
+            self._finalizados.popleft()
@@ -0,0 +1,59 @@
+import logging
+
+from playwright.async_api import Page
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Estados que devuelve la detección de contenido
+ESTADO_LOGIN = "login"
+ESTADO_COINCIDE = "coincide"
+ESTADO_NO_ENCONTRADO = "no_encontrado"
+ESTADO_CARGADO = "cargado"
+
+# Se evalúa en la página hasta devolver un estado o agotar el tiempo
+_SCRIPT_DETECCION = """
+([texto, marcadores, selectorLogin]) => {
+    const login = document.querySelector(selectorLogin);
+    if (login && login.getClientRects().length > 0) return "login";
+    const html = document.documentElement ? document.documentElement.innerHTML : "";
+    if (html.includes(texto)) return "coincide";
+    if (marcadores.some((marcador) => html.includes(marcador))) return "no_encontrado";
+    if (document.readyState === "complete") return "cargado";
+    return false;
+}
+"""
+
+
+async def esperar_contenido(page: Page, timeout_ms: float) -> str:
+    """
+    Espera hasta que la página muestre el texto buscado, un marcador de "no encontrado",
+    el formulario de login o termine de cargar, lo que ocurra primero.
+
+    Si la página terminó de cargar sin ningún marcador y hay configurado un margen
+    (PAMI_READINESS_PADDING_MS), se espera ese margen una vez más por contenido tardío.
+
+    Raises:
+        playwright TimeoutError si no se alcanza ningún estado dentro de `timeout_ms`
+    """
+    argumentos = [
+        settings.PAMI_SEARCH_TEXT,
+        list(settings.PAMI_NOT_FOUND_MARKERS),
+        settings.PAMI_LOGIN_FORM_SELECTOR,
+    ]
+    handle = await page.wait_for_function(
+        _SCRIPT_DETECCION,
+        arg=argumentos,
+        polling=settings.PAMI_READINESS_POLL_MS,
+        timeout=timeout_ms,
+    )
+    estado = str(await handle.json_value())
+
+    if estado == ESTADO_CARGADO and settings.PAMI_READINESS_PADDING_MS > 0:
+        await page.wait_for_timeout(settings.PAMI_READINESS_PADDING_MS)
+        estado = str(
+            await page.evaluate(_SCRIPT_DETECCION, argumentos) or ESTADO_CARGADO
+        )
+
+    return estado
@@ -0,0 +1,76 @@
+import logging
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Route
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tamaño promedio estimado por tipo de recurso para calcular el ahorro de tráfico
+BYTES_ESTIMADOS_POR_TIPO = {
+    "image": 30_000,
+    "font": 40_000,
+    "stylesheet": 25_000,
+    "media": 200_000,
+    "script": 50_000,
+}
+BYTES_ESTIMADOS_OTROS = 5_000
+
+
+class ContadorRecursos:
+    """Requests bloqueados y bytes estimados ahorrados durante una verificación"""
+
+    def __init__(self) -> None:
+        self.requests_bloqueados = 0
+        self.bytes_ahorrados_estimados = 0
+        self.por_tipo: dict[str, int] = {}
+
+    def registrar(self, tipo_recurso: str) -> None:
+        self.requests_bloqueados += 1
+        self.bytes_ahorrados_estimados += BYTES_ESTIMADOS_POR_TIPO.get(
+            tipo_recurso, BYTES_ESTIMADOS_OTROS
+        )
+        self.por_tipo[tipo_recurso] = self.por_tipo.get(tipo_recurso, 0) + 1
+
+    def reiniciar(self) -> None:
+        self.requests_bloqueados = 0
+        self.bytes_ahorrados_estimados = 0
+        self.por_tipo = {}
+
+
+def hosts_permitidos() -> list[str]:
+    """Hosts configurados o, si no hay, el host de PAMI_BASE_URL"""
+    if settings.PAMI_ALLOWED_HOSTS:
+        return [host.lower() for host in settings.PAMI_ALLOWED_HOSTS]
+    return [(urlparse(settings.PAMI_BASE_URL).hostname or "").lower()]
+
+
+def recurso_permitido(tipo_recurso: str, url: str, hosts: list[str]) -> bool:
+    """Un recurso se descarga si su tipo está permitido y proviene de un host permitido"""
+    if tipo_recurso not in settings.PAMI_ALLOWED_RESOURCE_TYPES:
+        return False
+    host = (urlparse(url).hostname or "").lower()
+    return any(
+        host == permitido or host.endswith(f".{permitido}") for permitido in hosts
+    )
+
+
+async def instalar_bloqueo_recursos(
+    context: BrowserContext, contador: ContadorRecursos
+) -> None:
+    """Registra en el contexto la regla que aborta imágenes, fuentes, estilos y scripts de terceros"""
+    hosts = hosts_permitidos()
+
+    async def filtrar(route: Route) -> None:
+        request = route.request
+        if recurso_permitido(request.resource_type, request.url, hosts):
+            await route.continue_()
+        else:
+            contador.registrar(request.resource_type)
+            await route.abort()
+
+    await context.route("**/*", filtrar)
+    logger.info(
+        f"Bloqueo de recursos activo (tipos permitidos: {settings.PAMI_ALLOWED_RESOURCE_TYPES}, hosts: {hosts})"
+    )
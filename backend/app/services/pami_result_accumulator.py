@@ -0,0 +1,251 @@
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+
+from app.core.config import settings
+from app.models import PAMIURLResult
+from app.services.pami_classifier import CATEGORIA_COINCIDE, CATEGORIA_SIN_COINCIDENCIA
+from app.services.pami_timing import RegistroEtapas
+
+# Columnas de la planilla que se muestran en el reporte HTML (clave en el HTML, columna)
+_COLUMNAS_HTML = [
+    ("paciente", "Paciente"),
+    ("fecha", "Fecha"),
+    ("f_alta", "F. Alta"),
+    ("observacion", "Observacion"),
+    ("diagnostico", "Diagnostico"),
+    ("motivo", "Motivo"),
+]
+
+# Estado de cada fila en los resultados: una URL con error no cuenta como no coincidente
+ESTADO_COINCIDE = "coincide"
+ESTADO_NO_COINCIDE = "no_coincide"
+ESTADO_ERROR = "error"
+# Filas que no llegaron a verificarse porque la corrida se canceló
+ESTADO_SIN_VERIFICAR = "sin_verificar"
+
+
+@dataclass
+class ResultadosMaterializados:
+    """Resultados de una verificación listos para generar los archivos de salida"""
+
+    df_resultados: pd.DataFrame
+    df_coincidentes: pd.DataFrame
+    df_no_coincidentes: pd.DataFrame
+    df_errores: pd.DataFrame
+    urls_para_html: list[dict[str, str]]
+    # Filas de cada predicado adicional del clasificador, solo las categorías con filas
+    df_por_categoria: dict[str, pd.DataFrame]
+
+
+class AcumuladorResultados:
+    """
+    Acumula los veredictos de una verificación por posición de fila.
+
+    Los datos de entrada se toman una sola vez como listas por columna y los
+    veredictos se guardan en listas preasignadas, así que registrar una fila
+    cuesta O(1) sin importar el orden en que lleguen los resultados. Los
+    DataFrames y las filas del HTML se arman una única vez al final.
+    """
+
+    def __init__(self, df_datos: pd.DataFrame, columna_urls: str) -> None:
+        self._df_datos = df_datos.reset_index(drop=True)
+        self._columnas = {
+            columna: self._df_datos[columna].tolist()
+            for columna in self._df_datos.columns
+        }
+        self.url_ids = [str(valor) for valor in self._columnas[columna_urls]]
+        total = len(self.url_ids)
+        self.coincidencias: list[bool] = [False] * total
+        self.errores: list[bool] = [False] * total
+        self.latencias_ms: list[float | None] = [None] * total
+        self.clases_error: list[str | None] = [None] * total
+        self.reintentos: list[int] = [0] * total
+        self.categorias: list[str | None] = [None] * total
+        self.registradas: list[bool] = [False] * total
+        self.etapas = RegistroEtapas()
+
+    def __len__(self) -> int:
+        return len(self.url_ids)
+
+    def registrar(
+        self,
+        posicion: int,
+        coincide: bool,
+        error: bool = False,
+        latencia_ms: float | None = None,
+        clase_error: str | None = None,
+        reintentos: int = 0,
+        categoria: str | None = None,
+    ) -> None:
+        """
+        Registra el veredicto de una fila. Sin `categoria` (caché, reanudación) se
+        deduce del veredicto; las filas con error no tienen categoría.
+        """
+        self.coincidencias[posicion] = coincide and not error
+        self.errores[posicion] = error
+        self.latencias_ms[posicion] = latencia_ms
+        self.clases_error[posicion] = clase_error
+        self.reintentos[posicion] = reintentos
+        if error:
+            categoria = None
+        elif categoria is None:
+            categoria = CATEGORIA_COINCIDE if coincide else CATEGORIA_SIN_COINCIDENCIA
+        self.categorias[posicion] = categoria
+        self.registradas[posicion] = True
+
+    def replicar(self, origen: int, destino: int) -> None:
+        """Copia el veredicto de una fila a otra fila con el mismo ID"""
+        self.registrar(
+            destino,
+            self.coincidencias[origen],
+            self.errores[origen],
+            self.latencias_ms[origen],
+            self.clases_error[origen],
+            self.reintentos[origen],
+            self.categorias[origen],
+        )
+
+    def resultado(self, posicion: int) -> PAMIURLResult:
+        latencia = self.latencias_ms[posicion]
+        return PAMIURLResult(
+            id=self.url_ids[posicion],
+            coincide=self.coincidencias[posicion],
+            error=self.errores[posicion],
+            latencia_ms=round(latencia, 1) if latencia is not None else None,
+            clase_error=self.clases_error[posicion],
+            reintentos=self.reintentos[posicion],
+            categoria=self.categorias[posicion],
+        )
+
+    def estado(self, posicion: int) -> str:
+        if not self.registradas[posicion]:
+            return ESTADO_SIN_VERIFICAR
+        if self.errores[posicion]:
+            return ESTADO_ERROR
+        return ESTADO_COINCIDE if self.coincidencias[posicion] else ESTADO_NO_COINCIDE
+
+    @property
+    def urls_con_error(self) -> int:
+        return sum(self.errores)
+
+    @property
+    def urls_sin_verificar(self) -> int:
+        return self.registradas.count(False)
+
+    def contar_categorias(self) -> dict[str, int]:
+        """Filas por categoría, sin las filas con error"""
+        conteo: dict[str, int] = {}
+        for categoria in self.categorias:
+            if categoria is not None:
+                conteo[categoria] = conteo.get(categoria, 0) + 1
+        return conteo
+
+    def registros_historial(self) -> list[dict[str, Any]]:
+        """
+        Filas verificadas para el historial (ver PAMIVerificationRecord); las que
+        quedaron sin verificar no se guardan.
+        """
+        pacientes = self._columnas.get("Paciente")
+        fechas = self._columnas.get("Fecha")
+        registros = []
+        for posicion, url_id in enumerate(self.url_ids):
+            if not self.registradas[posicion]:
+                continue
+            registros.append(
+                {
+                    "posicion": posicion,
+                    "url_id": url_id[:255],
+                    "paciente": _texto(pacientes[posicion], 255)
+                    if pacientes is not None
+                    else None,
+                    "fecha": _texto(fechas[posicion], 50)
+                    if fechas is not None
+                    else None,
+                    "estado": self.estado(posicion),
+                    "categoria": self.categorias[posicion],
+                    "clase_error": self.clases_error[posicion],
+                }
+            )
+        return registros
+
+    def materializar(
+        self, categorias_adicionales: list[str] | None = None
+    ) -> ResultadosMaterializados:
+        """
+        Arma los DataFrames de resultados y las filas del reporte HTML.
+
+        `categorias_adicionales` son los predicados del clasificador, además de
+        coincide/sin_coincidencia, que tienen su propio DataFrame.
+        """
+        urls_completas = [
+            f"{settings.PAMI_BASE_URL}{url_id}" for url_id in self.url_ids
+        ]
+        df_resultados = self._df_datos.assign(
+            URL_Completa=urls_completas,
+            Coincide=self.coincidencias,
+            Estado=[self.estado(posicion) for posicion in range(len(self))],
+            Categoria=self.categorias,
+            Clase_Error=self.clases_error,
+        )
+
+        coincide = pd.Series(self.coincidencias, dtype=bool)
+        con_error = pd.Series(self.errores, dtype=bool)
+        registrada = pd.Series(self.registradas, dtype=bool)
+        df_coincidentes = self._df_datos[coincide].reset_index(drop=True)
+        df_no_coincidentes = self._df_datos[
+            ~coincide & ~con_error & registrada
+        ].reset_index(drop=True)
+        df_errores = df_resultados.loc[
+            con_error, [*self._df_datos.columns, "URL_Completa", "Clase_Error"]
+        ]
+        df_errores = df_errores.reset_index(drop=True)
+
+        categoria = pd.Series(self.categorias, dtype=object)
+        df_por_categoria = {}
+        for nombre in categorias_adicionales or []:
+            df_categoria = self._df_datos[categoria == nombre].reset_index(drop=True)
+            if not df_categoria.empty:
+                df_por_categoria[nombre] = df_categoria
+
+        columnas_html = {
+            clave: self._columnas.get(columna, ["N/A"] * len(self))
+            for clave, columna in _COLUMNAS_HTML
+        }
+        urls_para_html = []
+        for posicion, coincide in enumerate(self.coincidencias):
+            if not coincide:
+                continue
+            url_id = self.url_ids[posicion]
+            fila: dict[str, Any] = {
+                clave: str(valores[posicion])
+                for clave, valores in columnas_html.items()
+            }
+            fila.update(
+                {
+                    "name": f"Paciente: {fila['paciente']} - ID: {url_id}",
+                    "url": urls_completas[posicion],
+                    "id": f"url_{url_id}",
+                }
+            )
+            urls_para_html.append(fila)
+
+        return ResultadosMaterializados(
+            df_resultados=df_resultados,
+            df_coincidentes=df_coincidentes,
+            df_no_coincidentes=df_no_coincidentes,
+            df_errores=df_errores,
+            urls_para_html=urls_para_html,
+            df_por_categoria=df_por_categoria,
+        )
+
+
+def _texto(valor: Any, largo: int) -> str | None:
+    if (
+        valor is None
+        or (isinstance(valor, float) and pd.isna(valor))
+        or valor is pd.NaT
+    ):
+        return None
+    return str(valor)[:largo]
@@ -0,0 +1,137 @@
+import csv
+import importlib.util
+import io
+import logging
+import tempfile
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Literal
+
+import pandas as pd
+from openpyxl import Workbook
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FormatoSalida = Literal["xlsx", "csv", "parquet"]
+
+MEDIA_TYPES_SALIDA: dict[str, str] = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_disponible() -> bool:
+    """Indica si hay un motor de Parquet instalado (pyarrow o fastparquet)"""
+    return any(
+        importlib.util.find_spec(modulo) is not None
+        for modulo in ("pyarrow", "fastparquet")
+    )
+
+
+def crear_buffer() -> IO[bytes]:
+    """
+    Buffer para un archivo de resultados: en memoria hasta PAMI_RESULTS_SPOOL_MAX_MB
+    y después en un temporal dentro del directorio de artefactos.
+    """
+    directorio = Path(settings.PAMI_ARTIFACTS_DIR)
+    directorio.mkdir(parents=True, exist_ok=True)
+    return tempfile.SpooledTemporaryFile(
+        max_size=settings.PAMI_RESULTS_SPOOL_MAX_MB * 1024 * 1024, dir=str(directorio)
+    )
+
+
+def escribir_resultados(
+    formato: FormatoSalida,
+    df_resultados: pd.DataFrame,
+    df_coincidentes: pd.DataFrame,
+    df_no_coincidentes: pd.DataFrame,
+    df_errores: pd.DataFrame,
+    df_por_categoria: dict[str, pd.DataFrame] | None = None,
+) -> tuple[IO[bytes], str]:
+    """
+    Escribe el archivo de resultados en un buffer spooled y lo devuelve rebobinado.
+
+    - xlsx: libro en modo write_only de openpyxl, fila por fila y con memoria
+      constante, con las hojas Todos_Resultados, Coincidentes, No_Coincidentes, una
+      hoja Cat_<nombre> por cada predicado adicional del clasificador y Errores.
+    - csv / parquet: solo los resultados completos; las columnas Estado y Categoria
+      permiten filtrar.
+
+    Es bloqueante: desde código async se llama con asyncio.to_thread.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nombre_archivo = f"URLs_Resultados_PAMI_{timestamp}.{formato}"
+    buffer = crear_buffer()
+    try:
+        if formato == "xlsx":
+            _escribir_excel(
+                buffer,
+                [
+                    ("Todos_Resultados", df_resultados),
+                    ("Coincidentes", df_coincidentes),
+                    ("No_Coincidentes", df_no_coincidentes),
+                    *(
+                        (f"Cat_{nombre}", df)
+                        for nombre, df in (df_por_categoria or {}).items()
+                    ),
+                    ("Errores", df_errores),
+                ],
+            )
+        elif formato == "csv":
+            _escribir_csv(buffer, df_resultados)
+        else:
+            df_resultados.to_parquet(buffer, index=False)
+    except BaseException:
+        buffer.close()
+        raise
+
+    buffer.seek(0)
+    logger.info(f"Archivo de resultados generado: {nombre_archivo}")
+    return buffer, nombre_archivo
+
+
+def _escribir_excel(buffer: IO[bytes], hojas: list[tuple[str, pd.DataFrame]]) -> None:
+    libro = Workbook(write_only=True)
+    for posicion, (nombre, df) in enumerate(hojas):
+        # La hoja con todos los resultados va siempre; las demás solo si tienen filas
+        if posicion > 0 and df.empty:
+            continue
+        hoja = libro.create_sheet(nombre)
+        hoja.append([str(columna) for columna in df.columns])
+        for fila in _filas(df):
+            hoja.append(fila)
+    libro.save(buffer)
+
+
+def _escribir_csv(
+    buffer: IO[bytes], df: pd.DataFrame, filas_por_bloque: int = 5000
+) -> None:
+    # BOM de utf-8 para que Excel muestre bien los acentos al abrirlo
+    buffer.write(b"\xef\xbb\xbf")
+    bloque = io.StringIO()
+    escritor = csv.writer(bloque)
+    escritor.writerow([str(columna) for columna in df.columns])
+    for numero, fila in enumerate(_filas(df), start=1):
+        escritor.writerow(fila)
+        if numero % filas_por_bloque == 0:
+            buffer.write(bloque.getvalue().encode("utf-8"))
+            bloque.seek(0)
+            bloque.truncate()
+    buffer.write(bloque.getvalue().encode("utf-8"))
+
+
+def _filas(df: pd.DataFrame) -> Iterator[list[Any]]:
+    """Filas del DataFrame como listas de valores simples, con NaN/NaT como celdas vacías"""
+    for fila in df.itertuples(index=False, name=None):
+        yield [None if _vacio(valor) else valor for valor in fila]
+
+
+def _vacio(valor: Any) -> bool:
+    try:
+        return bool(pd.isna(valor))
+    except (TypeError, ValueError):
+        return False
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import httpx
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_after_delay,
+    wait_random_exponential,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Clases de error de la verificación de una URL
+ERROR_TIMEOUT_NAVEGACION = "timeout_navegacion"
+ERROR_CONEXION = "conexion"
+ERROR_SESION_EXPIRADA = "sesion_expirada"
+ERROR_SERVIDOR = "servidor"
+ERROR_PLAZO_AGOTADO = "plazo_agotado"
+ERROR_RESPUESTA_NO_CONCLUYENTE = "respuesta_no_concluyente"
+ERROR_PAGINA_CERRADA = "pagina_cerrada"
+ERROR_DESCONOCIDO = "desconocido"
+
+CLASES_REINTENTABLES = {
+    ERROR_TIMEOUT_NAVEGACION,
+    ERROR_CONEXION,
+    ERROR_SESION_EXPIRADA,
+    ERROR_SERVIDOR,
+}
+
+
+class SesionExpirada(Exception):
+    """La página sigue mostrando el login después de renovar la sesión"""
+
+
+class PlazoURLAgotado(Exception):
+    """La URL no se pudo verificar dentro de PAMI_URL_DEADLINE_SECONDS, contando reintentos"""
+
+
+class RespuestaErrorServidor(Exception):
+    """El navegador recibió un 5xx/429: la página es un error transitorio, no un resultado"""
+
+    def __init__(self, mensaje: str, status_code: int) -> None:
+        super().__init__(mensaje)
+        self.status_code = status_code
+
+
+def validar_respuesta(respuesta: Any, url_completa: str) -> None:
+    """
+    Raises:
+        RespuestaErrorServidor: si la navegación respondió 5xx o 429
+    """
+    codigo = getattr(respuesta, "status", None) if respuesta is not None else None
+    if codigo is not None and (codigo >= 500 or codigo == 429):
+        raise RespuestaErrorServidor(
+            f"HTTP {codigo} al navegar a {url_completa}", status_code=codigo
+        )
+
+
+def clasificar_error(error: BaseException) -> str:
+    """Clase de error estable para estadísticas, resultados y decisión de reintento"""
+    if isinstance(error, PlazoURLAgotado):
+        return ERROR_PLAZO_AGOTADO
+    if isinstance(error, SesionExpirada):
+        return ERROR_SESION_EXPIRADA
+    codigo = getattr(error, "status_code", None)
+    if codigo is not None and (codigo >= 500 or codigo == 429):
+        return ERROR_SERVIDOR
+    if codigo is not None:
+        return ERROR_RESPUESTA_NO_CONCLUYENTE
+    if isinstance(
+        error, PlaywrightTimeoutError | asyncio.TimeoutError | httpx.TimeoutException
+    ):
+        return ERROR_TIMEOUT_NAVEGACION
+    if isinstance(error, httpx.TransportError):
+        return ERROR_CONEXION
+    if isinstance(error, PlaywrightError):
+        mensaje = str(error)
+        if "net::ERR" in mensaje:
+            return ERROR_CONEXION
+        if "has been closed" in mensaje:
+            return ERROR_PAGINA_CERRADA
+    return ERROR_DESCONOCIDO
+
+
+def es_reintentable(error: BaseException) -> bool:
+    return clasificar_error(error) in CLASES_REINTENTABLES
+
+
+@dataclass
+class Intentos:
+    """Cantidad de intentos hechos para una URL (se completa aunque termine en error)"""
+
+    cantidad: int = 0
+
+    @property
+    def reintentos(self) -> int:
+        return max(0, self.cantidad - 1)
+
+
+async def con_reintentos(
+    intento: Callable[[], Awaitable[T]],
+    descripcion: str,
+    intentos: Intentos | None = None,
+) -> T:
+    """
+    Ejecuta `intento` reintentando los errores transitorios con backoff exponencial con jitter.
+
+    Se reintentan timeouts de navegación, conexiones caídas, sesión expirada y 5xx/429,
+    hasta PAMI_RETRY_MAX_ATTEMPTS intentos. Todo (intentos y esperas) tiene que terminar
+    dentro de PAMI_URL_DEADLINE_SECONDS; si no, se lanza PlazoURLAgotado.
+    """
+    intentos = intentos or Intentos()
+    plazo = settings.PAMI_URL_DEADLINE_SECONDS
+
+    def registrar_reintento(estado: RetryCallState) -> None:
+        error = estado.outcome.exception() if estado.outcome else None
+        clase = clasificar_error(error) if error else ERROR_DESCONOCIDO
+        logger.info(
+            f"Reintentando {descripcion} (intento {estado.attempt_number}): {clase}"
+        )
+
+    async def ejecutar() -> T:
+        async for reintento in AsyncRetrying(
+            retry=retry_if_exception(es_reintentable),
+            stop=stop_after_attempt(settings.PAMI_RETRY_MAX_ATTEMPTS)
+            | stop_after_delay(plazo),
+            wait=wait_random_exponential(
+                multiplier=settings.PAMI_RETRY_BACKOFF_SECONDS,
+                max=settings.PAMI_RETRY_BACKOFF_MAX_SECONDS,
+            ),
+            before_sleep=registrar_reintento,
+            reraise=True,
+        ):
+            with reintento:
+                intentos.cantidad += 1
+                return await intento()
+        raise AssertionError("AsyncRetrying terminó sin resultado")  # pragma: no cover
+
+    inicio = time.monotonic()
+    try:
+        return await asyncio.wait_for(ejecutar(), timeout=plazo)
+    except asyncio.TimeoutError as e:
+        # Un TimeoutError propio del intento que agotó los reintentos antes del plazo se propaga tal cual
+        if time.monotonic() - inicio < plazo:
+            raise
+        raise PlazoURLAgotado(
+            f"{descripcion}: sin resultado en {plazo}s ({intentos.cantidad} intentos)"
+        ) from e
@@ -0,0 +1,347 @@
+import asyncio
+import heapq
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+from app.models import PAMIVerificationJob
+from app.services.pami_jobs import PAMIJobRunner, job_runner
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrabajoEnCola:
+    """Lo que el planificador necesita de un trabajo pendiente (sin el archivo de entrada)"""
+
+    id: uuid.UUID
+    owner_id: uuid.UUID
+    restantes: int
+    creado_en: datetime
+
+
+def tamano_efectivo(trabajo: TrabajoEnCola, ahora: datetime) -> float:
+    """IDs restantes reducidos según la espera en cola (se divide por 2 cada PAMI_SCHEDULER_AGING_MINUTES)"""
+    espera_minutos = max((ahora - trabajo.creado_en).total_seconds() / 60, 0.0)
+    return trabajo.restantes / (
+        1 + espera_minutos / settings.PAMI_SCHEDULER_AGING_MINUTES
+    )
+
+
+def ordenar_cola(
+    pendientes: list[TrabajoEnCola],
+    en_ejecucion_por_usuario: dict[uuid.UUID, int],
+    ahora: datetime,
+) -> list[TrabajoEnCola]:
+    """
+    Orden de despacho de los trabajos pendientes.
+
+    Reparto justo entre usuarios: el siguiente lugar es para el usuario con menos
+    trabajos en ejecución o ya ubicados antes en la cola, y dentro de cada usuario
+    va primero el trabajo más corto (shortest-job-first con envejecimiento). Los
+    empates se resuelven por antigüedad.
+    """
+    por_usuario: dict[uuid.UUID, list[tuple[float, datetime, TrabajoEnCola]]] = (
+        defaultdict(list)
+    )
+    for trabajo in pendientes:
+        por_usuario[trabajo.owner_id].append(
+            (tamano_efectivo(trabajo, ahora), trabajo.creado_en, trabajo)
+        )
+    for trabajos in por_usuario.values():
+        trabajos.sort(key=lambda item: (item[0], item[1]))
+
+    # Un candidato por usuario: su trabajo más corto, con la carga que ya tiene el usuario
+    candidatos = [
+        (
+            en_ejecucion_por_usuario.get(owner_id, 0),
+            trabajos[0][0],
+            trabajos[0][1],
+            str(owner_id),
+            owner_id,
+            0,
+        )
+        for owner_id, trabajos in por_usuario.items()
+    ]
+    heapq.heapify(candidatos)
+
+    orden: list[TrabajoEnCola] = []
+    while candidatos:
+        carga, _, _, clave, owner_id, indice = heapq.heappop(candidatos)
+        trabajos = por_usuario[owner_id]
+        orden.append(trabajos[indice][2])
+        if indice + 1 < len(trabajos):
+            siguiente = trabajos[indice + 1]
+            heapq.heappush(
+                candidatos,
+                (carga + 1, siguiente[0], siguiente[1], clave, owner_id, indice + 1),
+            )
+    return orden
+
+
+def elegir_trabajos(
+    orden: list[TrabajoEnCola],
+    en_ejecucion_por_usuario: dict[uuid.UUID, int],
+    en_ejecucion_total: int,
+    libres_en_worker: int,
+) -> list[uuid.UUID]:
+    """
+    Trabajos a iniciar ahora, en el orden de la cola, respetando el tope global,
+    el tope por usuario y los lugares libres de este worker.
+    """
+    libres = min(
+        settings.PAMI_SCHEDULER_MAX_RUNNING_JOBS - en_ejecucion_total, libres_en_worker
+    )
+    carga = dict(en_ejecucion_por_usuario)
+    elegidos: list[uuid.UUID] = []
+    for trabajo in orden:
+        if len(elegidos) >= libres:
+            break
+        if carga.get(trabajo.owner_id, 0) >= settings.PAMI_SCHEDULER_MAX_JOBS_PER_USER:
+            continue
+        carga[trabajo.owner_id] = carga.get(trabajo.owner_id, 0) + 1
+        elegidos.append(trabajo.id)
+    return elegidos
+
+
+def _limite_actividad() -> datetime:
+    # Un trabajo o verificación en línea que no reporta hace PAMI_JOB_STALE_MINUTES quedó huérfano
+    return datetime.utcnow() - timedelta(minutes=settings.PAMI_JOB_STALE_MINUTES)
+
+
+def _leer_cola(session: Session) -> tuple[list[TrabajoEnCola], dict[uuid.UUID, int]]:
+    """Trabajos pendientes y lugares ocupados por usuario (trabajos en proceso y verificaciones en línea)"""
+    desde = _limite_actividad()
+    en_ejecucion = crud.get_pami_running_jobs_by_owner(session=session, desde=desde)
+    for owner_id, cantidad in crud.get_pami_active_slots_by_owner(
+        session=session, desde=desde
+    ).items():
+        en_ejecucion[owner_id] = en_ejecucion.get(owner_id, 0) + cantidad
+    pendientes = [
+        TrabajoEnCola(
+            id=job_id,
+            owner_id=owner_id,
+            restantes=max(restantes, 0),
+            creado_en=creado_en,
+        )
+        for job_id, owner_id, restantes, creado_en in crud.get_pami_queued_jobs(
+            session=session
+        )
+    ]
+    return pendientes, en_ejecucion
+
+
+def posiciones_en_cola(session: Session) -> dict[uuid.UUID, int]:
+    """Posición (desde 1) de cada trabajo pendiente en el orden de despacho actual"""
+    pendientes, en_ejecucion = _leer_cola(session)
+    orden = ordenar_cola(pendientes, en_ejecucion, datetime.utcnow())
+    return {trabajo.id: posicion for posicion, trabajo in enumerate(orden, start=1)}
+
+
+def _registrar_actividad(slot_id: uuid.UUID) -> None:
+    with Session(engine) as session:
+        crud.touch_pami_verification_slot(session=session, slot_id=slot_id)
+
+
+def _liberar_turno(slot_id: uuid.UUID) -> None:
+    with Session(engine) as session:
+        crud.delete_pami_verification_slot(session=session, slot_id=slot_id)
+
+
+class PAMIJobScheduler:
+    """
+    Despacha los trabajos de verificación PAMI encolados en Postgres.
+
+    Cada worker corre un despachador que, bajo un advisory lock de Postgres, cuenta
+    los trabajos en ejecución de todos los workers y reclama los siguientes de la
+    cola según `ordenar_cola` y los topes de `elegir_trabajos`. Se despierta al
+    encolarse o terminar un trabajo en este proceso y, para ver lo que pasa en
+    otros workers, cada PAMI_SCHEDULER_POLL_SECONDS. Las verificaciones en línea
+    toman lugares de los mismos topes con `turno_en_linea`.
+    """
+
+    def __init__(self, runner: PAMIJobRunner) -> None:
+        self._runner = runner
+        self._despertar = asyncio.Event()
+        self._lugar_liberado = asyncio.Event()
+        self._tarea: asyncio.Task[None] | None = None
+        self._en_linea = 0
+
+    @property
+    def _en_ejecucion_en_worker(self) -> int:
+        return self._runner.en_ejecucion + self._en_linea
+
+    def iniciar(self) -> None:
+        if self._tarea is None or self._tarea.done():
+            self._tarea = asyncio.create_task(self._bucle())
+
+    def despertar(self) -> None:
+        """Pide un despacho inmediato (se llama al encolar, reanudar o terminar un trabajo)"""
+        self._despertar.set()
+        self._lugar_liberado.set()
+
+    async def detener(self) -> None:
+        if self._tarea is None:
+            return
+        self._tarea.cancel()
+        await asyncio.gather(self._tarea, return_exceptions=True)
+        self._tarea = None
+
+    async def _bucle(self) -> None:
+        while True:
+            self._despertar.clear()
+            try:
+                jobs = await asyncio.to_thread(
+                    self._reclamar, self._en_ejecucion_en_worker
+                )
+                for job in jobs:
+                    logger.info(
+                        f"Iniciando trabajo PAMI {job.id} del usuario {job.owner_id}"
+                    )
+                    tarea = self._runner.lanzar(job)
+                    tarea.add_done_callback(lambda _: self.despertar())
+            except Exception as e:
+                logger.error(f"Error al despachar trabajos PAMI: {e}")
+            try:
+                await asyncio.wait_for(
+                    self._despertar.wait(), timeout=settings.PAMI_SCHEDULER_POLL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def _reclamar(en_ejecucion_en_worker: int) -> list[PAMIVerificationJob]:
+        libres_en_worker = (
+            settings.PAMI_SCHEDULER_MAX_JOBS_PER_WORKER - en_ejecucion_en_worker
+        )
+        if libres_en_worker <= 0:
+            return []
+        with Session(engine) as session:
+            crud.lock_pami_job_queue(session=session)
+            crud.delete_stale_pami_verification_slots(
+                session=session, antes=_limite_actividad()
+            )
+            pendientes, en_ejecucion = _leer_cola(session)
+            elegidos = elegir_trabajos(
+                ordenar_cola(pendientes, en_ejecucion, datetime.utcnow()),
+                en_ejecucion,
+                sum(en_ejecucion.values()),
+                libres_en_worker,
+            )
+            # El commit de start_pami_queued_jobs libera el lock
+            return crud.start_pami_queued_jobs(session=session, job_ids=elegidos)
+
+    @asynccontextmanager
+    async def turno_en_linea(
+        self, owner_id: uuid.UUID, total_urls: int
+    ) -> AsyncIterator[None]:
+        """
+        Reserva un lugar para una verificación en línea (/verify-excel, /verify-stream).
+
+        La verificación compite con los trabajos encolados con el mismo orden y los
+        mismos topes (global, por usuario y por worker): espera hasta que
+        `elegir_trabajos` la elija y mientras corre ocupa un PAMIVerificationSlot, que
+        no es un trabajo (no se lista ni se cancela desde /jobs) y se borra al terminar.
+        """
+        esperando_desde = datetime.utcnow()
+        self._en_linea += 1
+        try:
+            while True:
+                self._lugar_liberado.clear()
+                slot_id = await asyncio.to_thread(
+                    self._reservar,
+                    self._en_ejecucion_en_worker - 1,
+                    owner_id,
+                    total_urls,
+                    esperando_desde,
+                )
+                if slot_id is not None:
+                    break
+                try:
+                    await asyncio.wait_for(
+                        self._lugar_liberado.wait(),
+                        timeout=settings.PAMI_SCHEDULER_POLL_SECONDS,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._en_linea -= 1
+            raise
+
+        latido = asyncio.create_task(self._latido(slot_id))
+        try:
+            yield
+        finally:
+            latido.cancel()
+            await asyncio.gather(latido, return_exceptions=True)
+            self._en_linea -= 1
+            try:
+                await asyncio.to_thread(_liberar_turno, slot_id)
+            except Exception as e:
+                logger.error(
+                    f"No se pudo liberar el lugar de la verificación en línea {slot_id}: {e}"
+                )
+            self.despertar()
+
+    @staticmethod
+    def _reservar(
+        en_ejecucion_en_worker: int,
+        owner_id: uuid.UUID,
+        total_urls: int,
+        esperando_desde: datetime,
+    ) -> uuid.UUID | None:
+        libres_en_worker = (
+            settings.PAMI_SCHEDULER_MAX_JOBS_PER_WORKER - en_ejecucion_en_worker
+        )
+        if libres_en_worker <= 0:
+            return None
+        with Session(engine) as session:
+            crud.lock_pami_job_queue(session=session)
+            crud.delete_stale_pami_verification_slots(
+                session=session, antes=_limite_actividad()
+            )
+            pendientes, en_ejecucion = _leer_cola(session)
+            candidato = TrabajoEnCola(
+                id=uuid.uuid4(),
+                owner_id=owner_id,
+                restantes=total_urls,
+                creado_en=esperando_desde,
+            )
+            elegidos = elegir_trabajos(
+                ordenar_cola([*pendientes, candidato], en_ejecucion, datetime.utcnow()),
+                en_ejecucion,
+                sum(en_ejecucion.values()),
+                libres_en_worker,
+            )
+            if candidato.id not in elegidos:
+                session.commit()
+                return None
+            # El commit de create_pami_verification_slot libera el lock
+            slot = crud.create_pami_verification_slot(
+                session=session, owner_id=owner_id, total_urls=total_urls
+            )
+            return slot.id
+
+    @staticmethod
+    async def _latido(slot_id: uuid.UUID) -> None:
+        # Sin actividad reciente el lugar se consideraría huérfano (PAMI_JOB_STALE_MINUTES)
+        while True:
+            await asyncio.sleep(settings.PAMI_JOB_PROGRESS_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(_registrar_actividad, slot_id)
+            except Exception as e:
+                logger.error(
+                    f"No se pudo actualizar la verificación en línea {slot_id}: {e}"
+                )
+
+
+job_scheduler = PAMIJobScheduler(job_runner)
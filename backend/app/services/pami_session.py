@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+from playwright.async_api import Page
+
+from app.core.config import settings
+from app.services.pami_browser_pool import ContextoPAMI, browser_pool
+
+logger = logging.getLogger(__name__)
+
+
+class PAMISessionManager:
+    """
+    Sesión autenticada de PAMI compartida por todas las páginas y verificaciones del proceso.
+
+    Guarda el `storage_state` (cookies y local storage) obtenido tras el login con
+    un TTL. Cada login exitoso incrementa la generación de la sesión; cuando una
+    página vuelve a ver el formulario de login, solo la primera corrutina que
+    llega inicia sesión y el resto espera y reutiliza la sesión renovada.
+    """
+
+    def __init__(self) -> None:
+        self._storage_state: dict[str, Any] | None = None
+        self._obtenido_en = 0.0
+        self._generacion = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def generacion(self) -> int:
+        return self._generacion
+
+    def vigente(self) -> bool:
+        """Indica si hay un storage_state cacheado dentro del TTL"""
+        if self._storage_state is None:
+            return False
+        edad_minutos = (time.monotonic() - self._obtenido_en) / 60
+        return edad_minutos < settings.PAMI_SESSION_TTL_MINUTES
+
+    def storage_state(self) -> dict[str, Any] | None:
+        """storage_state vigente para crear contextos ya autenticados"""
+        return self._storage_state if self.vigente() else None
+
+    def invalidar(self) -> None:
+        self._storage_state = None
+
+    async def exportar_storage_state(self, url: str) -> dict[str, Any]:
+        """Devuelve la sesión vigente, iniciando sesión con Playwright si hace falta"""
+        storage_state = self.storage_state()
+        if storage_state is not None:
+            return storage_state
+
+        async with browser_pool.contexto() as contexto:
+            async with browser_pool.pagina(contexto) as page:
+                await self.asegurar_sesion(page, contexto, url)
+                return dict(await contexto.context.storage_state())
+
+    async def asegurar_sesion(
+        self, page: Page, contexto: ContextoPAMI, url: str
+    ) -> None:
+        """Deja el contexto autenticado, iniciando sesión solo si la sesión cacheada no sirve"""
+        if contexto.generacion_sesion == self._generacion and self.vigente():
+            return
+
+        generacion_vista = self._generacion
+        if self.vigente():
+            await self._aplicar(contexto)
+            return
+
+        await page.goto(url)
+        contexto.registrar_navegacion()
+        if await page.locator(settings.PAMI_LOGIN_FORM_SELECTOR).is_visible():
+            await self.renovar(page, contexto, url, generacion_vista)
+        else:
+            # La sesión del servidor sigue activa: solo se vuelve a cachear
+            async with self._lock:
+                await self._guardar(contexto)
+
+    async def renovar(
+        self, page: Page, contexto: ContextoPAMI, url: str, generacion_vista: int
+    ) -> None:
+        """
+        Vuelve a iniciar sesión con la página que mostró el formulario de login.
+
+        Si otra corrutina renovó la sesión mientras se esperaba el lock
+        (la generación cambió), se reutiliza esa sesión sin volver a loguearse.
+        """
+        async with self._lock:
+            if self._generacion != generacion_vista and self.vigente():
+                await self._aplicar(contexto)
+                return
+
+            await page.goto(url)
+            contexto.registrar_navegacion()
+            if await page.locator(settings.PAMI_LOGIN_FORM_SELECTOR).is_visible():
+                await iniciar_sesion(page)
+            await self._guardar(contexto)
+
+    async def _guardar(self, contexto: ContextoPAMI) -> None:
+        self._storage_state = dict(await contexto.context.storage_state())
+        self._obtenido_en = time.monotonic()
+        self._generacion += 1
+        contexto.generacion_sesion = self._generacion
+
+    async def _aplicar(self, contexto: ContextoPAMI) -> None:
+        """Copia las cookies de la sesión cacheada a un contexto existente"""
+        if self._storage_state is None:
+            return
+        cookies = self._storage_state.get("cookies", [])
+        if cookies:
+            await contexto.context.add_cookies(cookies)
+        contexto.generacion_sesion = self._generacion
+
+
+async def iniciar_sesion(page: Page) -> None:
+    """Completa el formulario de login de PAMI"""
+    try:
+        logger.info("Iniciando sesión en PAMI...")
+        await page.fill('input[name="UserName"]', settings.PAMI_LOGIN_USER)
+        await page.fill('input[name="Password"]', settings.PAMI_LOGIN_PASSWORD)
+        await page.wait_for_selector("select#ubicCodigo", timeout=10000)
+
+        await page.select_option(
+            "select#depoCodigo", value=str(settings.PAMI_DEPOT_CODE)
+        )
+        await page.select_option(
+            "select#ubicCodigo", value=str(settings.PAMI_LOCATION_CODE)
+        )
+
+        await page.click('input[type="submit"]')
+        await page.wait_for_load_state("networkidle")
+        logger.info("Sesión iniciada correctamente")
+    except Exception as e:
+        logger.error(f"Error al iniciar sesión: {e}")
+        raise
+
+
+session_manager = PAMISessionManager()
@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+from collections.abc import Callable
+from typing import Any
+
+import pandas as pd
+
+from app.core.config import settings
+from app.models import PAMIVerificationRequest
+from app.services.pami_rate_controller import ControladorConcurrencia
+from app.services.pami_result_accumulator import AcumuladorResultados
+from app.services.pami_timing import MetricasVerificacion
+
+logger = logging.getLogger(__name__)
+
+# Cola por la que cada proceso hijo envía sus resultados al principal
+_cola_resultados: Any = None
+
+
+def memoria_disponible() -> int | None:
+    """Bytes de memoria física disponible, o None si el sistema no lo informa"""
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def procesos_por_defecto() -> int:
+    """Procesos que entran en la máquina: uno por CPU, limitado por la memoria disponible"""
+    procesos = os.cpu_count() or 1
+    memoria = memoria_disponible()
+    if memoria is not None:
+        procesos = min(
+            procesos,
+            memoria // (settings.PAMI_SHARD_MEMORY_PER_PROCESS_MB * 1024 * 1024),
+        )
+    return max(1, min(procesos, settings.PAMI_SHARD_MAX_PROCESSES))
+
+
+def resolver_procesos(solicitados: int | None, cantidad: int) -> int:
+    """
+    Cantidad de procesos para verificar `cantidad` IDs.
+
+    Un valor pedido en la solicitud se respeta siempre; si no, PAMI_SHARD_PROCESSES
+    (0 = automático) solo se aplica a partir de PAMI_SHARD_MIN_URLS IDs, para no
+    pagar el arranque de varios navegadores en archivos chicos.
+    """
+    if solicitados is None:
+        if cantidad < settings.PAMI_SHARD_MIN_URLS:
+            return 1
+        solicitados = settings.PAMI_SHARD_PROCESSES or procesos_por_defecto()
+    return max(1, min(solicitados, cantidad))
+
+
+def particionar(posiciones: list[int], procesos: int) -> list[list[int]]:
+    """Reparte las posiciones intercaladas para que cada partición reciba filas de todo el archivo"""
+    return [
+        particion
+        for particion in (posiciones[i::procesos] for i in range(procesos))
+        if particion
+    ]
+
+
+def combinar_metricas(
+    metricas: MetricasVerificacion, parciales: MetricasVerificacion
+) -> None:
+    """Suma los contadores de una partición y conserva la duración del proceso más lento"""
+    metricas.urls_verificadas_http += parciales.urls_verificadas_http
+    metricas.urls_verificadas_navegador += parciales.urls_verificadas_navegador
+    metricas.requests_bloqueados += parciales.requests_bloqueados
+    metricas.bytes_ahorrados_estimados += parciales.bytes_ahorrados_estimados
+    metricas.duracion_http = max(metricas.duracion_http, parciales.duracion_http)
+    metricas.duracion_navegador = max(
+        metricas.duracion_navegador, parciales.duracion_navegador
+    )
+
+
+async def verificar_particionado(
+    pendientes: list[int],
+    acumulador: AcumuladorResultados,
+    request_data: PAMIVerificationRequest,
+    registrar_procesada: Callable[[int], None],
+    procesos: int,
+    metricas: MetricasVerificacion,
+    controlador: ControladorConcurrencia,
+) -> None:
+    """
+    Verifica las posiciones pendientes repartidas entre `procesos` procesos hijos.
+
+    Cada hijo lanza su propio Chromium e inicia su propia sesión, así el manejo
+    del protocolo del navegador no queda limitado a un solo núcleo. Los veredictos
+    llegan por una cola a medida que se verifican y se registran en el acumulador
+    del proceso principal, que arma los mismos archivos y estadísticas que una
+    corrida en un solo proceso. Cada veredicto trae la concurrencia del controlador
+    de su hijo: `controlador` refleja la suma y la tasa de todos los hijos.
+    """
+    particiones = particionar(pendientes, procesos)
+    logger.info(
+        f"Verificación particionada: {len(pendientes)} IDs en {len(particiones)} procesos"
+    )
+
+    contexto_mp = multiprocessing.get_context("spawn")
+    cola = contexto_mp.Queue()
+    datos_solicitud = request_data.model_dump()
+    hijos = [
+        contexto_mp.Process(
+            target=_ejecutar_particion,
+            args=(
+                cola,
+                numero,
+                particion,
+                [acumulador.url_ids[posicion] for posicion in particion],
+                datos_solicitud,
+            ),
+            name=f"pami-particion-{numero}",
+            daemon=True,
+        )
+        for numero, particion in enumerate(particiones)
+    ]
+    for hijo in hijos:
+        hijo.start()
+
+    concurrencias: dict[int, int] = {}
+
+    def registrar_resultado(mensaje: tuple[Any, ...]) -> None:
+        (
+            _,
+            numero,
+            posicion,
+            coincide,
+            error,
+            latencia_ms,
+            clase_error,
+            reintentos,
+            categoria,
+            concurrencia,
+        ) = mensaje
+        acumulador.registrar(
+            posicion,
+            coincide,
+            error=error,
+            latencia_ms=latencia_ms,
+            clase_error=clase_error,
+            reintentos=reintentos,
+            categoria=categoria,
+        )
+        concurrencias[numero] = concurrencia
+        controlador.reflejar(sum(concurrencias.values()), terminadas=1)
+        registrar_procesada(posicion)
+
+    try:
+        terminadas = 0
+        while terminadas < len(hijos):
+            for mensaje in await asyncio.to_thread(_leer_mensajes, cola):
+                if mensaje[0] == "resultado":
+                    registrar_resultado(mensaje)
+                elif mensaje[0] == "fin":
+                    _, numero, parciales, duraciones_etapas = mensaje
+                    combinar_metricas(metricas, parciales)
+                    concurrencias.pop(numero, None)
+                    controlador.reflejar(sum(concurrencias.values()))
+                    for etapa, duraciones in duraciones_etapas.items():
+                        acumulador.etapas.duraciones_ms[etapa].extend(duraciones)
+                    terminadas += 1
+                    logger.info(
+                        f"Partición {numero} terminada ({terminadas}/{len(hijos)})"
+                    )
+                else:
+                    _, numero, detalle = mensaje
+                    raise RuntimeError(f"Error en la partición {numero}: {detalle}")
+
+            # Un hijo que muere sin avisar (por ejemplo por falta de memoria) corta la corrida
+            for numero, hijo in enumerate(hijos):
+                if hijo.exitcode not in (None, 0):
+                    raise RuntimeError(
+                        f"La partición {numero} terminó con código {hijo.exitcode}"
+                    )
+    except asyncio.CancelledError:
+        # Corrida cancelada: se conservan los veredictos que ya estaban en la cola antes de
+        # terminar los hijos (leer después de terminate() puede encontrar la cola corrupta)
+        for mensaje in _leer_mensajes(cola, espera=0, maximo=len(pendientes)):
+            if mensaje[0] == "resultado":
+                registrar_resultado(mensaje)
+        raise
+    finally:
+        for hijo in hijos:
+            if hijo.is_alive():
+                hijo.terminate()
+        for hijo in hijos:
+            await asyncio.to_thread(hijo.join, 5)
+        cola.close()
+
+
+def _leer_mensajes(
+    cola: Any, espera: float = 0.5, maximo: int = 1000
+) -> list[tuple[Any, ...]]:
+    """Bloquea hasta `espera` segundos por el primer mensaje y toma los que ya estén en la cola"""
+    try:
+        mensajes = [cola.get(timeout=espera) if espera > 0 else cola.get_nowait()]
+    except queue.Empty:
+        return []
+    while len(mensajes) < maximo:
+        try:
+            mensajes.append(cola.get_nowait())
+        except queue.Empty:
+            break
+    return mensajes
+
+
+def _ejecutar_particion(
+    cola: Any,
+    numero: int,
+    posiciones: list[int],
+    url_ids: list[str],
+    datos_solicitud: dict[str, Any],
+) -> None:
+    """Punto de entrada de cada proceso hijo"""
+    global _cola_resultados
+    _cola_resultados = cola
+    try:
+        asyncio.run(_verificar_particion(numero, posiciones, url_ids, datos_solicitud))
+    except Exception as e:
+        cola.put(("error", numero, f"{type(e).__name__}: {e}"))
+        raise
+
+
+async def _verificar_particion(
+    numero: int,
+    posiciones: list[int],
+    url_ids: list[str],
+    datos_solicitud: dict[str, Any],
+) -> None:
+    # Import diferido: el servicio importa este módulo
+    from app.services.pami_browser_pool import browser_pool
+    from app.services.pami_verification_service import PAMIVerificationService
+
+    request_data = PAMIVerificationRequest.model_validate(datos_solicitud)
+    acumulador = AcumuladorResultados(
+        pd.DataFrame({request_data.columna_urls: url_ids}), request_data.columna_urls
+    )
+
+    controlador = ControladorConcurrencia()
+
+    def registrar_procesada(local: int) -> None:
+        _cola_resultados.put(
+            (
+                "resultado",
+                numero,
+                posiciones[local],
+                acumulador.coincidencias[local],
+                acumulador.errores[local],
+                acumulador.latencias_ms[local],
+                acumulador.clases_error[local],
+                acumulador.reintentos[local],
+                acumulador.categorias[local],
+                controlador.concurrencia,
+            )
+        )
+
+    metricas = MetricasVerificacion()
+    try:
+        await PAMIVerificationService._verificar_pendientes(
+            list(range(len(url_ids))),
+            acumulador,
+            request_data,
+            registrar_procesada,
+            controlador,
+            metricas,
+        )
+    finally:
+        await browser_pool.cerrar()
+    _cola_resultados.put(("fin", numero, metricas, acumulador.etapas.duraciones_ms))
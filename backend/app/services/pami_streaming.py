@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator
+from datetime import datetime
+from typing import Any, Literal
+
+import pandas as pd
+from fastapi import HTTPException
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+from app.models import (
+    PAMIURLResult,
+    PAMIVerificationJob,
+    PAMIVerificationRequest,
+    PAMIVerificationResult,
+)
+from app.services.pami_jobs import construir_job_publico
+from app.services.pami_verification_service import PAMIVerificationService
+
+logger = logging.getLogger(__name__)
+
+FormatoStream = Literal["ndjson", "sse"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+ESTADOS_FINALES = ("completado", "cancelado", "error")
+
+
+def formatear_evento(tipo: str, datos: dict[str, Any], formato: FormatoStream) -> str:
+    """Serializa un evento como línea NDJSON o como evento SSE"""
+    if formato == "sse":
+        return f"event: {tipo}\ndata: {json.dumps(datos, ensure_ascii=False, default=str)}\n\n"
+    return json.dumps({"tipo": tipo, **datos}, ensure_ascii=False, default=str) + "\n"
+
+
+async def stream_verificacion(
+    df_datos: pd.DataFrame,
+    request_data: PAMIVerificationRequest,
+    formato: FormatoStream,
+    owner_id: uuid.UUID | None = None,
+    nombre_archivo: str = "",
+) -> AsyncGenerator[str, None]:
+    """
+    Ejecuta una verificación y emite un evento por ID a medida que se resuelve.
+
+    Termina con un evento "fin" con las estadísticas, o "error" si la verificación falla.
+    Con `owner_id` la corrida terminada se guarda en el historial. Si el cliente se
+    desconecta se cancela la verificación.
+    """
+    cola: asyncio.Queue[PAMIURLResult | None] = asyncio.Queue()
+
+    async def ejecutar() -> Any:
+        try:
+            return await PAMIVerificationService.ejecutar_verificacion(
+                df_datos, request_data, resultado_url=cola.put_nowait
+            )
+        finally:
+            cola.put_nowait(None)
+
+    tarea = asyncio.create_task(ejecutar())
+    emitidos: set[str] = set()
+    try:
+        while (resultado := await cola.get()) is not None:
+            # Las filas duplicadas de un mismo ID comparten veredicto y se emiten una sola vez
+            if resultado.id in emitidos:
+                continue
+            emitidos.add(resultado.id)
+            yield formatear_evento("resultado", resultado.model_dump(), formato)
+
+        try:
+            final = await tarea
+        except HTTPException as e:
+            yield formatear_evento("error", {"detalle": e.detail}, formato)
+            return
+        # En streaming no se guardan archivos: el buffer de resultados se libera enseguida
+        final.cerrar()
+        if owner_id is not None:
+            await PAMIVerificationService.guardar_historial(
+                final, owner_id, nombre_archivo, "verify-stream"
+            )
+        yield formatear_evento(
+            "fin",
+            {"mensaje": final.mensaje, "estadisticas": final.estadisticas.model_dump()},
+            formato,
+        )
+    finally:
+        if not tarea.done():
+            tarea.cancel()
+            await asyncio.gather(tarea, return_exceptions=True)
+
+
+def _leer_avance(
+    job_id: uuid.UUID, cursor: tuple[datetime, str] | None
+) -> tuple[PAMIVerificationJob | None, list[PAMIVerificationResult]]:
+    with Session(engine) as session:
+        # El estado se lee antes que los resultados: si ya era final, no quedan resultados por guardar
+        job = session.get(PAMIVerificationJob, job_id)
+        resultados = crud.get_pami_verification_results_after(
+            session=session, job_id=job_id, cursor=cursor
+        )
+        return job, resultados
+
+
+async def stream_job(job_id: uuid.UUID, formato: FormatoStream) -> AsyncIterator[str]:
+    """
+    Emite los resultados de un trabajo a medida que se guardan en Postgres.
+
+    Funciona desde cualquier worker, porque lee los checkpoints del trabajo en lugar
+    de la memoria del proceso que lo ejecuta. Termina con un evento "fin" con el
+    estado final del trabajo.
+    """
+    cursor: tuple[datetime, str] | None = None
+    while True:
+        job, resultados = await asyncio.to_thread(_leer_avance, job_id, cursor)
+        if job is None:
+            yield formatear_evento(
+                "error", {"detalle": "Trabajo no encontrado"}, formato
+            )
+            return
+
+        for resultado in resultados:
+            evento = PAMIURLResult(
+                id=resultado.url_id,
+                coincide=resultado.coincide,
+                error=resultado.error,
+                latencia_ms=resultado.latencia_ms,
+                clase_error=resultado.clase_error,
+                categoria=resultado.categoria,
+            )
+            yield formatear_evento("resultado", evento.model_dump(), formato)
+            cursor = (resultado.verificado_en, resultado.url_id)
+
+        if not resultados:
+            if job.estado in ESTADOS_FINALES:
+                yield formatear_evento(
+                    "fin", construir_job_publico(job).model_dump(mode="json"), formato
+                )
+                return
+            await asyncio.sleep(settings.PAMI_JOB_PROGRESS_INTERVAL_SECONDS)
@@ -0,0 +1,132 @@
+import logging
+import math
+import random
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Etapas medidas por URL, en el orden en que ocurren
+ETAPA_ADQUISICION_PAGINA = "adquisicion_pagina"
+ETAPA_NAVEGACION = "navegacion"
+ETAPA_ESPERA_LOGIN = "espera_login"
+ETAPA_READINESS = "readiness"
+ETAPA_OBTENCION_CONTENIDO = "obtencion_contenido"
+ETAPA_COINCIDENCIA = "coincidencia"
+
+ETAPAS = (
+    ETAPA_ADQUISICION_PAGINA,
+    ETAPA_NAVEGACION,
+    ETAPA_ESPERA_LOGIN,
+    ETAPA_READINESS,
+    ETAPA_OBTENCION_CONTENIDO,
+    ETAPA_COINCIDENCIA,
+)
+
+
+def percentil(valores_ordenados: list[float], porcentaje: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not valores_ordenados:
+        return 0.0
+    indice = max(
+        0,
+        min(
+            len(valores_ordenados) - 1,
+            math.ceil(porcentaje / 100 * len(valores_ordenados)) - 1,
+        ),
+    )
+    return round(valores_ordenados[indice], 1)
+
+
+def resumir_latencias(valores: Iterable[float]) -> dict[str, float]:
+    """p50/p95/p99 en milisegundos"""
+    ordenados = sorted(valores)
+    return {
+        "p50": percentil(ordenados, 50),
+        "p95": percentil(ordenados, 95),
+        "p99": percentil(ordenados, 99),
+    }
+
+
+@dataclass
+class MetricasVerificacion:
+    """
+    Métricas de una corrida que terminan en PAMIVerificationStats.
+
+    Cada proceso de una corrida particionada completa las suyas y el principal
+    las combina con `pami_sharding.combinar_metricas`.
+    """
+
+    urls_verificadas_http: int = 0
+    urls_verificadas_navegador: int = 0
+    duracion_http: float = 0.0
+    duracion_navegador: float = 0.0
+    requests_bloqueados: int = 0
+    bytes_ahorrados_estimados: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    ids_unicos: int = 0
+    procesos: int = 1
+    urls_reintentadas: int = 0
+    reintentos_totales: int = 0
+    latencias: dict[str, float] = field(default_factory=lambda: resumir_latencias([]))
+    latencias_por_etapa: dict[str, dict[str, float]] = field(default_factory=dict)
+    errores_por_clase: dict[str, int] = field(default_factory=dict)
+
+
+class RegistroEtapas:
+    """
+    Acumula la duración de cada etapa de la verificación de las URLs de una corrida.
+
+    Solo guarda listas de milisegundos por etapa; los percentiles se calculan una
+    vez al final con `resumen()`.
+    """
+
+    def __init__(self) -> None:
+        self.duraciones_ms: dict[str, list[float]] = {etapa: [] for etapa in ETAPAS}
+
+    def registrar(self, etapa: str, milisegundos: float) -> None:
+        self.duraciones_ms[etapa].append(milisegundos)
+
+    @contextmanager
+    def medir(self, etapa: str) -> Iterator[None]:
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, (time.perf_counter() - inicio) * 1000)
+
+    def resumen(self) -> dict[str, dict[str, float]]:
+        """Percentiles por etapa, solo de las etapas que ocurrieron"""
+        return {
+            etapa: resumir_latencias(duraciones)
+            for etapa, duraciones in self.duraciones_ms.items()
+            if duraciones
+        }
+
+
+def contar_clases_error(clases: Iterable[str | None]) -> dict[str, int]:
+    return dict(Counter(clase for clase in clases if clase))
+
+
+def muestrear_contenido() -> bool:
+    """
+    Indica si se vuelca el contenido de esta URL al log de debug.
+
+    La proporción de URLs se configura con PAMI_DEBUG_CONTENT_SAMPLE_RATE (0 desactiva el volcado).
+    """
+    tasa = settings.PAMI_DEBUG_CONTENT_SAMPLE_RATE
+    return tasa > 0 and logger.isEnabledFor(logging.DEBUG) and random.random() < tasa
+
+
+def registrar_contenido(url_id: str, contenido: str, titulo: str | None = None) -> None:
+    """Vuelca el inicio y el final del contenido de una página al log de debug"""
+    logger.debug(f"URL {url_id}: {len(contenido)} caracteres, título: {titulo}")
+    logger.debug(f"URL {url_id}: Primeros 500 chars: {contenido[:500]}")
+    if len(contenido) > 500:
+        logger.debug(f"URL {url_id}: Últimos 500 chars: {contenido[-500:]}")
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+
+logger = logging.getLogger(__name__)
+
+
+def _leer_veredictos_db(
+    url_ids: list[str], desde: datetime
+) -> dict[str, tuple[bool, datetime]]:
+    with Session(engine) as session:
+        return crud.get_pami_cached_verdicts(
+            session=session, url_ids=url_ids, desde=desde
+        )
+
+
+def _guardar_veredictos_db(veredictos: dict[str, bool]) -> None:
+    with Session(engine) as session:
+        crud.save_pami_cached_verdicts(session=session, veredictos=veredictos)
+
+
+class PAMIVerdictCache:
+    """
+    Caché de veredictos por ID de autorización con TTL.
+
+    El primer nivel es un LRU en memoria del proceso; si PAMI_VERDICT_CACHE_DB_ENABLED
+    está activo, los veredictos también se comparten entre workers a través de Postgres.
+    """
+
+    def __init__(self) -> None:
+        self._entradas: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+
+    def _ttl_segundos(self) -> float:
+        return settings.PAMI_VERDICT_CACHE_TTL_MINUTES * 60
+
+    def _guardar_en_memoria(
+        self, url_id: str, coincide: bool, guardado_en: float
+    ) -> None:
+        self._entradas[url_id] = (coincide, guardado_en)
+        self._entradas.move_to_end(url_id)
+        while len(self._entradas) > settings.PAMI_VERDICT_CACHE_MAX_ENTRIES:
+            self._entradas.popitem(last=False)
+
+    async def obtener(self, url_ids: list[str]) -> dict[str, bool]:
+        """Veredictos vigentes para los IDs pedidos (los que no están se omiten)"""
+        ahora = time.time()
+        encontrados: dict[str, bool] = {}
+        faltantes: list[str] = []
+
+        for url_id in url_ids:
+            entrada = self._entradas.get(url_id)
+            if entrada is not None and ahora - entrada[1] < self._ttl_segundos():
+                self._entradas.move_to_end(url_id)
+                encontrados[url_id] = entrada[0]
+            else:
+                if entrada is not None:
+                    del self._entradas[url_id]
+                faltantes.append(url_id)
+
+        if faltantes and settings.PAMI_VERDICT_CACHE_DB_ENABLED:
+            desde = datetime.utcnow() - timedelta(
+                minutes=settings.PAMI_VERDICT_CACHE_TTL_MINUTES
+            )
+            try:
+                desde_db = await asyncio.to_thread(
+                    _leer_veredictos_db, faltantes, desde
+                )
+            except Exception as e:
+                logger.warning(
+                    f"No se pudo leer la caché de veredictos en Postgres: {e}"
+                )
+                desde_db = {}
+            for url_id, (coincide, verificado_en) in desde_db.items():
+                encontrados[url_id] = coincide
+                edad = (datetime.utcnow() - verificado_en).total_seconds()
+                self._guardar_en_memoria(url_id, coincide, ahora - edad)
+
+        return encontrados
+
+    async def guardar(self, veredictos: dict[str, bool]) -> None:
+        """Guarda veredictos recién verificados en memoria y, si corresponde, en Postgres"""
+        if not veredictos:
+            return
+        ahora = time.time()
+        for url_id, coincide in veredictos.items():
+            self._guardar_en_memoria(url_id, coincide, ahora)
+
+        if settings.PAMI_VERDICT_CACHE_DB_ENABLED:
+            try:
+                await asyncio.to_thread(_guardar_veredictos_db, veredictos)
+            except Exception as e:
+                logger.warning(
+                    f"No se pudo guardar la caché de veredictos en Postgres: {e}"
+                )
+
+    def limpiar(self) -> None:
+        self._entradas.clear()
+
+
+verdict_cache = PAMIVerdictCache()
@@ -1,394 +1,905 @@
-import io
+import asyncio
+import base64
 import logging
-import pandas as pd
 import time
-import json
-import base64
-import asyncio
-from datetime import datetime
-from typing import Any, BinaryIO
-from playwright.async_api import async_playwright
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import IO, Any, BinaryIO
+
+import pandas as pd
 from fastapi import HTTPException
+from playwright.async_api import Page
+from sqlmodel import Session
 
+from app import crud
 from app.core.config import settings
-from app.models import PAMIVerificationRequest, PAMIVerificationResponse, PAMIVerificationStats, PAMIURLData
+from app.core.db import engine
+from app.models import (
+    PAMIURLResult,
+    PAMIVerificationRequest,
+    PAMIVerificationResponse,
+    PAMIVerificationRun,
+    PAMIVerificationStats,
+)
+from app.services.pami_artifact_store import ArtefactoPAMI, artifact_store
+from app.services.pami_browser_pool import ContextoPAMI, browser_pool
+from app.services.pami_cancellation import ejecutar_cancelable
+from app.services.pami_classifier import (
+    CATEGORIA_COINCIDE,
+    ClasificadorPaginas,
+    obtener_clasificador,
+)
+from app.services.pami_html_report import escribir_reporte_html
+from app.services.pami_http_engine import PAMIHttpVerifier, RespuestaNoConcluyente
+from app.services.pami_ingestion import (
+    ColumnasFaltantes,
+    contar_filas_con_id,
+    leer_planilla,
+)
+from app.services.pami_rate_controller import ControladorConcurrencia, es_sobrecarga
+from app.services.pami_readiness import ESTADO_LOGIN, esperar_contenido
+from app.services.pami_resource_blocker import ContadorRecursos
+from app.services.pami_result_accumulator import AcumuladorResultados
+from app.services.pami_result_writer import (
+    MEDIA_TYPES_SALIDA,
+    FormatoSalida,
+    escribir_resultados,
+    parquet_disponible,
+)
+from app.services.pami_retry import (
+    ERROR_PLAZO_AGOTADO,
+    ERROR_TIMEOUT_NAVEGACION,
+    Intentos,
+    SesionExpirada,
+    clasificar_error,
+    con_reintentos,
+    validar_respuesta,
+)
+from app.services.pami_session import session_manager
+from app.services.pami_sharding import resolver_procesos, verificar_particionado
+from app.services.pami_timing import (
+    ETAPA_ADQUISICION_PAGINA,
+    ETAPA_COINCIDENCIA,
+    ETAPA_ESPERA_LOGIN,
+    ETAPA_NAVEGACION,
+    ETAPA_OBTENCION_CONTENIDO,
+    ETAPA_READINESS,
+    MetricasVerificacion,
+    RegistroEtapas,
+    contar_clases_error,
+    muestrear_contenido,
+    registrar_contenido,
+    resumir_latencias,
+)
+from app.services.pami_verdict_cache import verdict_cache
 
 logger = logging.getLogger(__name__)
 
 
+def _guardar_historial(run: PAMIVerificationRun, registros: list[dict[str, Any]]) -> uuid.UUID:
+    with Session(engine) as session:
+        run = crud.create_pami_verification_run(
+            session=session, run=run, registros=registros, tamano_lote=settings.PAMI_HISTORY_INSERT_BATCH_SIZE
+        )
+        return run.id
+
+
+@contextmanager
+def _errores_de_lectura() -> Iterator[None]:
+    """Traduce los errores al leer la planilla subida en un 400"""
+    try:
+        yield
+    except ColumnasFaltantes as e:
+        logger.error(f"Columnas faltantes: {e.faltantes}")
+        logger.info(f"Columnas disponibles: {e.disponibles}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error al leer archivo Excel: {e}")
+        raise HTTPException(status_code=400, detail=f"Error al procesar archivo Excel: {str(e)}")
+
+
+@dataclass
+class ResultadoVerificacion:
+    """
+    Resultado de una verificación con los archivos generados.
+
+    El archivo de resultados (Excel, CSV o Parquet) y el reporte HTML quedan en
+    buffers spooled abiertos; quien consume el resultado los cierra con `cerrar()`.
+    """
+    mensaje: str
+    estadisticas: PAMIVerificationStats
+    archivo_excel: IO[bytes]
+    archivo_html: IO[bytes]
+    nombre_archivo_excel: str
+    nombre_archivo_html: str
+    media_type_excel: str = MEDIA_TYPES_SALIDA["xlsx"]
+    motor: str = ""
+    # Filas verificadas para el historial (vacío con PAMI_HISTORY_ENABLED desactivado)
+    registros: list[dict[str, Any]] = field(default_factory=list)
+
+    def leer_excel(self) -> bytes:
+        self.archivo_excel.seek(0)
+        return self.archivo_excel.read()
+
+    def leer_html(self) -> bytes:
+        self.archivo_html.seek(0)
+        return self.archivo_html.read()
+
+    def cerrar(self) -> None:
+        self.archivo_excel.close()
+        self.archivo_html.close()
+
+
+MEDIA_TYPE_EXCEL = MEDIA_TYPES_SALIDA["xlsx"]
+MEDIA_TYPE_HTML = "text/html; charset=utf-8"
+
+
 class PAMIVerificationService:
-    """Servicio para verificar URLs de PAMI usando Playwright"""
+    """Servicio para verificar URLs de PAMI usando Playwright o HTTP directo"""
 
     @staticmethod
     async def verificar_excel_pami(
-        archivo_excel: BinaryIO,
-        request_data: PAMIVerificationRequest
+        archivo_excel: BinaryIO | pd.DataFrame,
+        request_data: PAMIVerificationRequest,
+        owner_id: uuid.UUID | None = None,
+        incluir_base64: bool = False,
+        nombre_archivo: str = ""
     ) -> PAMIVerificationResponse:
         """
         Procesa un archivo Excel con URLs de PAMI y genera archivos HTML y Excel de resultados
         
         Args:
-            archivo_excel: Archivo Excel en memoria
+            archivo_excel: Archivo Excel en memoria o su planilla ya leída con `leer_datos`
             request_data: Configuración de la verificación
+            owner_id: Usuario dueño de los archivos generados y del historial de la corrida
+            incluir_base64: Incluir además los archivos codificados en base64 (compatibilidad)
+            nombre_archivo: Nombre del archivo subido, para el historial
         
         Returns:
-            PAMIVerificationResponse con archivos codificados y estadísticas
+            PAMIVerificationResponse con ids y URLs de descarga de los archivos y estadísticas
         """
+        resultado = await PAMIVerificationService.ejecutar_verificacion(archivo_excel, request_data)
         try:
-            # Leer datos del Excel
-            df_datos = await PAMIVerificationService._obtener_datos_excel(
-                archivo_excel, request_data.columna_urls, request_data.columnas_adicionales
+            excel, html = await PAMIVerificationService.guardar_artefactos(resultado, owner_id)
+            if owner_id is not None:
+                await PAMIVerificationService.guardar_historial(resultado, owner_id, nombre_archivo, "verify-excel")
+
+            return PAMIVerificationResponse(
+                mensaje=resultado.mensaje,
+                estadisticas=resultado.estadisticas,
+                archivo_excel_id=excel.id,
+                archivo_html_id=html.id,
+                url_descarga_excel=excel.url_descarga,
+                url_descarga_html=html.url_descarga,
+                archivo_excel_base64=base64.b64encode(resultado.leer_excel()).decode('utf-8') if incluir_base64 else None,
+                archivo_html_base64=base64.b64encode(resultado.leer_html()).decode('utf-8') if incluir_base64 else None,
+                nombre_archivo_excel=resultado.nombre_archivo_excel,
+                nombre_archivo_html=resultado.nombre_archivo_html
             )
+        finally:
+            resultado.cerrar()
+
+    @staticmethod
+    async def guardar_artefactos(
+        resultado: ResultadoVerificacion, owner_id: uuid.UUID | None = None
+    ) -> tuple[ArtefactoPAMI, ArtefactoPAMI]:
+        """Guarda el archivo de resultados y el HTML generados en el almacén de artefactos"""
+        resultado.archivo_excel.seek(0)
+        excel = await asyncio.to_thread(
+            artifact_store.guardar_archivo, resultado.archivo_excel, resultado.nombre_archivo_excel,
+            resultado.media_type_excel, owner_id
+        )
+        resultado.archivo_html.seek(0)
+        html = await asyncio.to_thread(
+            artifact_store.guardar_archivo, resultado.archivo_html, resultado.nombre_archivo_html, MEDIA_TYPE_HTML, owner_id
+        )
+        return excel, html
+
+    @staticmethod
+    async def guardar_historial(
+        resultado: ResultadoVerificacion,
+        owner_id: uuid.UUID,
+        nombre_archivo: str,
+        origen: str,
+        job_id: uuid.UUID | None = None
+    ) -> uuid.UUID | None:
+        """
+        Guarda la corrida y el veredicto de cada fila en el historial de Postgres.
+
+        Las filas se insertan con executemany en lotes de PAMI_HISTORY_INSERT_BATCH_SIZE.
+        Un error al guardar el historial se registra en el log pero no hace fallar la
+        verificación, que ya tiene sus archivos guardados.
+
+        Returns:
+            Id de la corrida, o None si el historial está desactivado o no se pudo guardar
+        """
+        if not settings.PAMI_HISTORY_ENABLED:
+            return None
+        stats = resultado.estadisticas
+        run = PAMIVerificationRun(
+            owner_id=owner_id,
+            job_id=job_id,
+            origen=origen,
+            nombre_archivo=nombre_archivo[:255],
+            motor=resultado.motor,
+            total_urls=stats.total_urls,
+            urls_coincidentes=stats.urls_coincidentes,
+            urls_no_coincidentes=stats.urls_no_coincidentes,
+            urls_con_error=stats.urls_con_error,
+            urls_sin_verificar=stats.urls_sin_verificar,
+        )
+        try:
+            run_id = await asyncio.to_thread(_guardar_historial, run, resultado.registros)
+        except Exception as e:
+            logger.error(f"No se pudo guardar el historial de la verificación PAMI: {e}")
+            return None
+        logger.info(f"Historial PAMI guardado: corrida {run_id} con {len(resultado.registros)} filas")
+        return run_id
+
+    @staticmethod
+    async def contar_ids(archivo_excel: BinaryIO, request_data: PAMIVerificationRequest) -> int:
+        """
+        Cantidad de IDs a verificar de la planilla. Valida las columnas antes de
+        encolar un trabajo y da el tamaño con el que lo ordena el planificador;
+        de los datos lee solo la columna de IDs.
+
+        Raises:
+            HTTPException 400: si faltan columnas o el archivo no se puede leer
+        """
+        contenido = archivo_excel.read()
+        archivo_excel.seek(0)
+        with _errores_de_lectura():
+            return await asyncio.to_thread(
+                contar_filas_con_id, contenido, request_data.columna_urls, request_data.columnas_adicionales
+            )
+
+    @staticmethod
+    async def leer_datos(archivo_excel: BinaryIO, request_data: PAMIVerificationRequest) -> pd.DataFrame:
+        """
+        Lee la planilla una sola vez para verificarla en línea: la cantidad de filas
+        da el tamaño para el planificador y el DataFrame se pasa a `ejecutar_verificacion`.
+
+        Raises:
+            HTTPException 400: si faltan columnas o el archivo no se puede leer
+        """
+        return await PAMIVerificationService._obtener_datos_excel(
+            archivo_excel, request_data.columna_urls, request_data.columnas_adicionales
+        )
+
+    @staticmethod
+    async def ejecutar_verificacion(
+        archivo_excel: BinaryIO | pd.DataFrame,
+        request_data: PAMIVerificationRequest,
+        progreso: Callable[[int, int], None] | None = None,
+        resultado_url: Callable[[PAMIURLResult], None] | None = None,
+        verificados_previos: dict[str, tuple[bool, str | None]] | None = None,
+        controlador: ControladorConcurrencia | None = None,
+        cancelacion: asyncio.Event | None = None
+    ) -> ResultadoVerificacion:
+        """
+        Ejecuta la verificación completa y devuelve los archivos generados sin codificar
+
+        Args:
+            archivo_excel: Archivo Excel en memoria o su planilla ya leída con `leer_datos`
+            request_data: Configuración de la verificación
+            progreso: Callback opcional que recibe (urls_procesadas, total_urls)
+            resultado_url: Callback opcional que recibe el veredicto de cada fila a medida que se verifica
+            verificados_previos: Veredictos ya guardados por ID, (coincide, categoria), que no se
+                vuelven a verificar
+            controlador: Controlador de concurrencia a usar, para poder consultar su estado durante la corrida
+            cancelacion: Evento que, al activarse, corta la verificación; los archivos se generan
+                igual con los resultados parciales y las estadísticas marcadas como parciales
+
+        Returns:
+            ResultadoVerificacion con estadísticas y archivos Excel/HTML en bytes
+        """
+        try:
+            # Leer datos del Excel, salvo que ya vengan leídos
+            if isinstance(archivo_excel, pd.DataFrame):
+                df_datos = archivo_excel
+            else:
+                df_datos = await PAMIVerificationService._obtener_datos_excel(
+                    archivo_excel, request_data.columna_urls, request_data.columnas_adicionales
+                )
             
             if df_datos.empty:
                 raise HTTPException(status_code=400, detail="No se encontraron datos válidos en el archivo Excel")
             
-            # Verificar URLs con Playwright
-            resultados = await PAMIVerificationService._verificar_urls_playwright(
-                df_datos, request_data
+            if request_data.formato_salida == "parquet" and not parquet_disponible():
+                raise HTTPException(
+                    status_code=400, detail="El formato Parquet requiere instalar pyarrow en el servidor"
+                )
+
+            # Verificar URLs con el motor elegido
+            inicio = time.perf_counter()
+            resultados = await PAMIVerificationService._verificar_urls(
+                df_datos, request_data, progreso, resultado_url, verificados_previos,
+                controlador or ControladorConcurrencia(), cancelacion
             )
+            duracion = time.perf_counter() - inicio
+            metricas: MetricasVerificacion = resultados["metricas"]
             
             # Generar archivos
-            archivo_excel_b64, nombre_excel = await PAMIVerificationService._generar_excel_resultados(
+            archivo_resultados, nombre_excel = await PAMIVerificationService._generar_excel_resultados(
                 resultados["df_resultados"], 
-                resultados["urls_coincidentes"], 
-                resultados["urls_no_coincidentes"]
+                resultados["df_coincidentes"],
+                resultados["df_no_coincidentes"],
+                resultados["df_errores"],
+                request_data.formato_salida,
+                resultados["df_por_categoria"]
             )
             
-            archivo_html_b64, nombre_html = await PAMIVerificationService._generar_html_resultados(
-                resultados["urls_para_html"]
-            )
+            try:
+                archivo_html, nombre_html = await PAMIVerificationService._generar_html_resultados(
+                    resultados["urls_para_html"]
+                )
+            except BaseException:
+                archivo_resultados.close()
+                raise
             
             # Calcular estadísticas
             stats = PAMIVerificationStats(
                 total_urls=len(df_datos),
-                urls_coincidentes=len(resultados["urls_coincidentes"]),
-                urls_no_coincidentes=len(resultados["urls_no_coincidentes"]),
-                urls_con_error=resultados["urls_con_error"]
+                urls_coincidentes=len(resultados["df_coincidentes"]),
+                urls_no_coincidentes=len(resultados["df_no_coincidentes"]),
+                urls_con_error=resultados["urls_con_error"],
+                urls_reintentadas=metricas.urls_reintentadas,
+                reintentos_totales=metricas.reintentos_totales,
+                motor=request_data.engine,
+                procesos=metricas.procesos,
+                duracion_segundos=round(duracion, 3),
+                urls_por_segundo=PAMIVerificationService._tasa(len(df_datos), duracion),
+                urls_verificadas_http=metricas.urls_verificadas_http,
+                urls_verificadas_navegador=metricas.urls_verificadas_navegador,
+                urls_por_segundo_http=PAMIVerificationService._tasa(
+                    metricas.urls_verificadas_http, metricas.duracion_http
+                ),
+                urls_por_segundo_navegador=PAMIVerificationService._tasa(
+                    metricas.urls_verificadas_navegador, metricas.duracion_navegador
+                ),
+                requests_bloqueados=metricas.requests_bloqueados,
+                bytes_ahorrados_estimados=metricas.bytes_ahorrados_estimados,
+                cache_hits=metricas.cache_hits,
+                cache_misses=metricas.cache_misses,
+                ids_unicos=metricas.ids_unicos,
+                latencia_p50_ms=metricas.latencias["p50"],
+                latencia_p95_ms=metricas.latencias["p95"],
+                latencia_p99_ms=metricas.latencias["p99"],
+                latencias_por_etapa=metricas.latencias_por_etapa,
+                errores_por_clase=metricas.errores_por_clase,
+                urls_por_categoria=resultados["urls_por_categoria"],
+                parcial=resultados["urls_sin_verificar"] > 0,
+                urls_sin_verificar=resultados["urls_sin_verificar"]
             )
             
-            return PAMIVerificationResponse(
-                mensaje=f"Verificación completada. {stats.urls_coincidentes} URLs coincidentes de {stats.total_urls} total.",
+            if stats.parcial:
+                mensaje = (
+                    f"Verificación cancelada. {stats.urls_coincidentes} URLs coincidentes; "
+                    f"{stats.urls_sin_verificar} de {stats.total_urls} quedaron sin verificar."
+                )
+            else:
+                mensaje = f"Verificación completada. {stats.urls_coincidentes} URLs coincidentes de {stats.total_urls} total."
+
+            return ResultadoVerificacion(
+                mensaje=mensaje,
                 estadisticas=stats,
-                archivo_excel_base64=archivo_excel_b64,
-                archivo_html_base64=archivo_html_b64,
+                archivo_excel=archivo_resultados,
+                archivo_html=archivo_html,
                 nombre_archivo_excel=nombre_excel,
-                nombre_archivo_html=nombre_html
+                nombre_archivo_html=nombre_html,
+                media_type_excel=MEDIA_TYPES_SALIDA[request_data.formato_salida],
+                motor=request_data.engine,
+                registros=resultados["registros"]
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error en verificación PAMI: {e}")
             raise HTTPException(status_code=500, detail=f"Error al procesar verificación: {str(e)}")
 
     @staticmethod
     async def _obtener_datos_excel(archivo: BinaryIO, columna_urls: str, columnas_adicionales: list[str]) -> pd.DataFrame:
-        """Lee y valida datos del archivo Excel"""
-        try:
-            # Leer archivo Excel
-            contenido = archivo.read()
-            archivo.seek(0)  # Reset para posible re-lectura
-            df = pd.read_excel(io.BytesIO(contenido))
-            
-            # Verificar columnas requeridas
-            columnas_requeridas = [columna_urls] + columnas_adicionales
-            columnas_faltantes = [col for col in columnas_requeridas if col not in df.columns]
-            
-            if columnas_faltantes:
-                logger.error(f"Columnas faltantes: {columnas_faltantes}")
-                logger.info(f"Columnas disponibles: {list(df.columns)}")
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Columnas faltantes en el archivo: {columnas_faltantes}"
-                )
-            
-            # Filtrar filas válidas
-            df_filtrado = df[df[columna_urls].notna()].copy()
-            df_resultado = df_filtrado[columnas_requeridas].copy()
-            
-            logger.info(f"Se cargaron {len(df_resultado)} registros del archivo Excel")
-            return df_resultado
-            
-        except Exception as e:
-            logger.error(f"Error al leer archivo Excel: {e}")
-            raise HTTPException(status_code=400, detail=f"Error al procesar archivo Excel: {str(e)}")
+        """Lee y valida los datos de la planilla (Excel o CSV), solo con las columnas pedidas"""
+        contenido = archivo.read()
+        archivo.seek(0)  # Reset para posible re-lectura
+        with _errores_de_lectura():
+            return await asyncio.to_thread(leer_planilla, contenido, columna_urls, columnas_adicionales)
 
     @staticmethod
-    async def _verificar_urls_playwright(df_datos: pd.DataFrame, request_data: PAMIVerificationRequest) -> dict[str, Any]:
-        """Verifica URLs usando Playwright"""
+    async def _verificar_urls(
+        df_datos: pd.DataFrame,
+        request_data: PAMIVerificationRequest,
+        progreso: Callable[[int, int], None] | None = None,
+        resultado_url: Callable[[PAMIURLResult], None] | None = None,
+        verificados_previos: dict[str, tuple[bool, str | None]] | None = None,
+        controlador: ControladorConcurrencia | None = None,
+        cancelacion: asyncio.Event | None = None
+    ) -> dict[str, Any]:
+        """
+        Verifica las URLs con el motor elegido y consolida los resultados.
+
+        - browser: cada URL se renderiza con Playwright.
+        - http: cada URL se descarga con httpx reutilizando las cookies de la sesión;
+          las respuestas no concluyentes se cuentan como error.
+        - auto: primero HTTP y solo las respuestas no concluyentes pasan al navegador.
+
+        Los errores transitorios se reintentan (ver pami_retry) y una URL que igual
+        termina en error queda en estado "error", separada de las no coincidentes.
+        Si se activa `cancelacion` se corta la fase de verificación y las filas
+        pendientes quedan en estado "sin_verificar".
+        """
+
+        controlador = controlador or ControladorConcurrencia()
+
+        # Los veredictos se acumulan por posición y los DataFrames se arman al final
+        acumulador = AcumuladorResultados(df_datos, request_data.columna_urls)
+        total = len(acumulador)
+        url_ids = acumulador.url_ids
+        metricas = MetricasVerificacion()
+
+        # Cada ID se verifica una sola vez en su primera fila y el veredicto se replica a las demás
+        representantes: dict[str, int] = {}
+        duplicados: dict[int, list[int]] = {}
+        for posicion, url_id in enumerate(url_ids):
+            if url_id in representantes:
+                duplicados.setdefault(representantes[url_id], []).append(posicion)
+            else:
+                representantes[url_id] = posicion
+        metricas.ids_unicos = len(representantes)
+
+        logger.info(
+            f"Iniciando verificación de {total} URLs ({len(representantes)} IDs únicos) "
+            f"con motor '{request_data.engine}'"
+        )
         
-        # Estructuras para resultados
-        columnas_resultado = list(df_datos.columns) + ['URL_Completa', 'Coincide']
-        df_resultados = pd.DataFrame(columns=columnas_resultado)
-        urls_coincidentes = []
-        urls_no_coincidentes = []
-        urls_para_html = []
-        urls_con_error = 0
+        procesadas = 0
         
-        logger.info(f"Iniciando verificación de {len(df_datos)} URLs")
+        def registrar_procesada(posicion: int) -> None:
+            nonlocal procesadas
+            for destino in [posicion, *duplicados.get(posicion, [])]:
+                acumulador.replicar(posicion, destino)
+                procesadas += 1
+                if resultado_url is not None:
+                    resultado_url(acumulador.resultado(destino))
+                if progreso is not None:
+                    progreso(procesadas, total)
+
+        # Los IDs verificados en una corrida anterior no se vuelven a visitar
+        previos = verificados_previos or {}
+        pendientes = []
+        for url_id, posicion in representantes.items():
+            if url_id in previos:
+                coincide, categoria = previos[url_id]
+                for destino in [posicion, *duplicados.get(posicion, [])]:
+                    acumulador.registrar(destino, coincide, categoria=categoria)
+                    procesadas += 1
+            else:
+                pendientes.append(posicion)
+        if previos:
+            logger.info(f"Reanudando verificación: {procesadas} URLs ya verificadas, {len(pendientes)} pendientes")
+
+        # Los IDs con un veredicto vigente en la caché tampoco se visitan; la caché solo guarda
+        # Coincide, así que con predicados adicionales cada página se vuelve a clasificar
+        clasificador = obtener_clasificador(request_data.predicados)
+        usar_cache = (
+            settings.PAMI_VERDICT_CACHE_ENABLED and not request_data.force_refresh
+            and not clasificador.categorias_adicionales
+        )
+        if pendientes and usar_cache:
+            cacheados = await verdict_cache.obtener([url_ids[posicion] for posicion in pendientes])
+            sin_cache = []
+            for posicion in pendientes:
+                if url_ids[posicion] in cacheados:
+                    acumulador.registrar(posicion, cacheados[url_ids[posicion]], latencia_ms=0.0)
+                    metricas.cache_hits += 1
+                    registrar_procesada(posicion)
+                else:
+                    sin_cache.append(posicion)
+            pendientes = sin_cache
+            logger.info(f"Caché de veredictos: {metricas.cache_hits} aciertos, {len(pendientes)} a verificar")
+        metricas.cache_misses = len(pendientes)
+        a_verificar = list(pendientes)
+
+        # Con archivos muy grandes los IDs pendientes se reparten entre varios procesos
+        metricas.procesos = resolver_procesos(request_data.procesos, len(pendientes))
+        if metricas.procesos > 1:
+            await ejecutar_cancelable(
+                verificar_particionado(
+                    pendientes, acumulador, request_data, registrar_procesada, metricas.procesos, metricas,
+                    controlador
+                ),
+                cancelacion
+            )
+        elif pendientes:
+            await ejecutar_cancelable(
+                PAMIVerificationService._verificar_pendientes(
+                    pendientes, acumulador, request_data, registrar_procesada, controlador, metricas
+                ),
+                cancelacion
+            )
+
+        # Guardar en la caché los veredictos nuevos que no terminaron en error
+        if settings.PAMI_VERDICT_CACHE_ENABLED:
+            await verdict_cache.guardar(
+                {
+                    url_ids[posicion]: acumulador.coincidencias[posicion]
+                    for posicion in a_verificar
+                    if acumulador.registradas[posicion] and not acumulador.errores[posicion]
+                }
+            )
+
+        # Latencias y clases de error de los IDs verificados en esta corrida
+        metricas.latencias = resumir_latencias(
+            latencia for posicion in a_verificar
+            if (latencia := acumulador.latencias_ms[posicion]) is not None
+        )
+        metricas.latencias_por_etapa = acumulador.etapas.resumen()
+        metricas.errores_por_clase = contar_clases_error(
+            acumulador.clases_error[posicion] for posicion in a_verificar if acumulador.errores[posicion]
+        )
+        metricas.urls_reintentadas = sum(1 for posicion in a_verificar if acumulador.reintentos[posicion])
+        metricas.reintentos_totales = sum(acumulador.reintentos[posicion] for posicion in a_verificar)
+        logger.info(
+            f"Latencia por URL (ms): {metricas.latencias}, errores: {metricas.errores_por_clase}, "
+            f"reintentos: {metricas.reintentos_totales} en {metricas.urls_reintentadas} URLs"
+        )
+
+        # Consolidar resultados en el orden de entrada
+        materializados = acumulador.materializar(clasificador.categorias_adicionales)
+        logger.info(
+            f"Resultados: {len(materializados.df_coincidentes)} coincidentes, "
+            f"{len(materializados.df_no_coincidentes)} no coincidentes, {acumulador.urls_con_error} con error"
+        )
+
+        return {
+            "df_resultados": materializados.df_resultados,
+            "df_coincidentes": materializados.df_coincidentes,
+            "df_no_coincidentes": materializados.df_no_coincidentes,
+            "df_errores": materializados.df_errores,
+            "urls_para_html": materializados.urls_para_html,
+            "df_por_categoria": materializados.df_por_categoria,
+            "urls_por_categoria": acumulador.contar_categorias(),
+            "urls_con_error": acumulador.urls_con_error,
+            "urls_sin_verificar": acumulador.urls_sin_verificar,
+            "registros": acumulador.registros_historial() if settings.PAMI_HISTORY_ENABLED else [],
+            "metricas": metricas
+        }
+
+    @staticmethod
+    async def _verificar_pendientes(
+        pendientes: list[int], acumulador: AcumuladorResultados, request_data: PAMIVerificationRequest,
+        registrar_procesada: Callable[[int], None], controlador: ControladorConcurrencia, metricas: MetricasVerificacion
+    ) -> None:
+        """
+        Verifica las posiciones pendientes con el motor elegido en este proceso.
+
+        Completa en `metricas` las URLs verificadas y la duración de cada motor y
+        los recursos bloqueados por el navegador.
+        """
+        if request_data.engine in ("http", "auto"):
+            inicio = time.perf_counter()
+            no_concluyentes = await PAMIVerificationService._verificar_posiciones_http(
+                pendientes, acumulador, request_data, registrar_procesada, controlador
+            )
+            metricas.duracion_http = time.perf_counter() - inicio
+            metricas.urls_verificadas_http = len(pendientes) - len(no_concluyentes)
+
+            if request_data.engine == "auto":
+                pendientes = no_concluyentes
+            else:
+                for posicion in no_concluyentes:
+                    acumulador.registrar(
+                        posicion, False, error=True, latencia_ms=acumulador.latencias_ms[posicion],
+                        clase_error=acumulador.clases_error[posicion], reintentos=acumulador.reintentos[posicion]
+                    )
+                    registrar_procesada(posicion)
+                pendientes = []
+
+        if pendientes:
+            inicio = time.perf_counter()
+            recursos = await PAMIVerificationService._verificar_posiciones_navegador(
+                pendientes, acumulador, request_data, registrar_procesada, controlador
+            )
+            metricas.requests_bloqueados = recursos.requests_bloqueados
+            metricas.bytes_ahorrados_estimados = recursos.bytes_ahorrados_estimados
+            metricas.duracion_navegador = time.perf_counter() - inicio
+            metricas.urls_verificadas_navegador = len(pendientes)
+
+    @staticmethod
+    async def _verificar_posiciones_navegador(
+        posiciones: list[int], acumulador: AcumuladorResultados, request_data: PAMIVerificationRequest,
+        registrar_procesada: Callable[[int], None], controlador: ControladorConcurrencia
+    ) -> ContadorRecursos:
+        """
+        Verifica URLs usando Playwright con un pool de páginas concurrentes.
+
+        Las páginas se abren sobre un BrowserContext autenticado prestado por el pool
+        del proceso y cada una toma posiciones de una cola compartida. Cuántas
+        trabajan a la vez lo decide el controlador adaptativo: arranca en
+        `batch_size` y se ajusta según la latencia y los errores del servidor, con
+        techo PAMI_MAX_PAGES_PER_WORKER. Si una URL agota su plazo la página se
+        descarta y el trabajador sigue con una nueva.
+
+        Returns:
+            Requests bloqueados y bytes ahorrados por el filtro de recursos durante la corrida
+        """
+        url_ids = acumulador.url_ids
+        clasificador = obtener_clasificador(request_data.predicados)
+        maximo = max(1, min(settings.PAMI_MAX_PAGES_PER_WORKER, len(posiciones)))
+        controlador.configurar(request_data.batch_size, maximo)
+        logger.info(f"Verificando {len(posiciones)} URLs con hasta {maximo} páginas concurrentes")
         
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=settings.PAMI_HEADLESS)
-                context = await browser.new_context()
+            async with browser_pool.contexto(session_manager.storage_state()) as contexto:
+                # Reutilizar la sesión cacheada del proceso o iniciar sesión con la primera URL
+                async with browser_pool.pagina(contexto) as pagina_login:
+                    await session_manager.asegurar_sesion(
+                        pagina_login, contexto, f"{settings.PAMI_BASE_URL}{url_ids[posiciones[0]]}"
+                    )
                 
-                primera_pagina = None
-                login_realizado = False
+                # Cola de posiciones a verificar
+                cola: asyncio.Queue[int] = asyncio.Queue()
+                for posicion in posiciones:
+                    cola.put_nowait(posicion)
                 
-                # Procesar en lotes
-                for i in range(0, len(df_datos), request_data.batch_size):
-                    batch_df = df_datos.iloc[i:i + request_data.batch_size]
-                    logger.info(f"Procesando lote {i//request_data.batch_size + 1}")
-                    
-                    for idx, row in batch_df.iterrows():
-                        url_id = str(row[request_data.columna_urls])
-                        url_completa = f"{settings.PAMI_BASE_URL}{url_id}"
-                        
-                        try:
-                            page = await context.new_page()
-                            logger.info(f"Verificando URL: {url_id}")
-                            await page.goto(url_completa)
-                            
-                            # Manejo de login
-                            if await page.locator(settings.PAMI_LOGIN_FORM_SELECTOR).is_visible():
-                                if not login_realizado:
-                                    await PAMIVerificationService._iniciar_sesion(page)
-                                    login_realizado = True
-                                    primera_pagina = page
-                                else:
-                                    await page.close()
-                                    await primera_pagina.goto(url_completa)
-                                    page = primera_pagina
-                            
-                            # Esperar carga
-                            await page.wait_for_load_state('domcontentloaded')
-                            await page.wait_for_timeout(1000)  # 1 segundo adicional
-                            
-                            # Verificar contenido
-                            content = await page.content()
-                            coincide = settings.PAMI_SEARCH_TEXT in content
-                            
-                            # Debug: logging detallado
-                            logger.info(f"URL {url_id}: Contenido cargado - {len(content)} caracteres")
-                            logger.info(f"URL {url_id}: Buscando texto '{settings.PAMI_SEARCH_TEXT}'")
-                            logger.info(f"URL {url_id}: Título de página: {await page.title()}")
-                            
-                            # Log parcial del contenido para diagnóstico
-                            if len(content) < 500:
-                                logger.info(f"URL {url_id}: Contenido completo: {content[:500]}")
-                            else:
-                                logger.info(f"URL {url_id}: Primeros 500 chars: {content[:500]}")
-                                logger.info(f"URL {url_id}: Últimos 500 chars: {content[-500:]}")
-                            
-                            logger.info(f"URL {url_id}: Coincide = {coincide}")
-                            
-                            # Procesar resultado
-                            df_resultados = PAMIVerificationService._procesar_resultado_url(
-                                row, url_id, url_completa, coincide, request_data.columna_urls,
-                                df_resultados, urls_coincidentes, urls_no_coincidentes, urls_para_html
+                async def trabajador(numero: int) -> None:
+                    # La página se abre recién cuando la concurrencia llega a este trabajador
+                    if not await controlador.esperar_cupo(numero, cola.empty):
+                        return
+                    while not cola.empty():
+                        inicio_pagina = time.perf_counter()
+                        async with browser_pool.pagina(contexto) as page:
+                            acumulador.etapas.registrar(
+                                ETAPA_ADQUISICION_PAGINA, (time.perf_counter() - inicio_pagina) * 1000
                             )
-                            
-                            if page != primera_pagina:
-                                await page.close()
+                            while not cola.empty():
+                                async with controlador.turno() as turno:
+                                    # Otro trabajador pudo vaciar la cola mientras se esperaba el turno
+                                    try:
+                                        posicion = cola.get_nowait()
+                                    except asyncio.QueueEmpty:
+                                        turno.marcar_sin_trabajo()
+                                        return
+
+                                    url_id = url_ids[posicion]
+                                    url_completa = f"{settings.PAMI_BASE_URL}{url_id}"
+                                    inicio_url = time.perf_counter()
+                                    intentos = Intentos()
+
+                                    # La URL se fija como default para no capturar la variable del bucle
+                                    async def intento(url_id: str = url_id, url_completa: str = url_completa) -> str:
+                                        try:
+                                            return await PAMIVerificationService._verificar_url(
+                                                page, contexto, url_id, url_completa, acumulador.etapas, clasificador
+                                            )
+                                        except Exception as e:
+                                            if es_sobrecarga(e):
+                                                turno.marcar_sobrecarga()
+                                            raise
+
+                                    try:
+                                        categoria = await con_reintentos(intento, f"URL {url_id}", intentos)
+                                        acumulador.registrar(
+                                            posicion, categoria == CATEGORIA_COINCIDE,
+                                            latencia_ms=(time.perf_counter() - inicio_url) * 1000,
+                                            reintentos=intentos.reintentos, categoria=categoria
+                                        )
+                                    except Exception as e:
+                                        clase_error = clasificar_error(e)
+                                        logger.error(
+                                            f"Error al procesar {url_id} (página {numero}, "
+                                            f"{intentos.cantidad} intentos, {clase_error}): {e}"
+                                        )
+                                        if clase_error == ERROR_PLAZO_AGOTADO:
+                                            turno.marcar_sobrecarga()
+                                        acumulador.registrar(
+                                            posicion, False, error=True,
+                                            latencia_ms=(time.perf_counter() - inicio_url) * 1000,
+                                            clase_error=clase_error, reintentos=intentos.reintentos
+                                        )
+                                        # Una página colgada no se reutiliza para la próxima URL
+                                        if clase_error in (ERROR_PLAZO_AGOTADO, ERROR_TIMEOUT_NAVEGACION):
+                                            await PAMIVerificationService._cerrar_pagina(page)
+                                    registrar_procesada(posicion)
                                 
-                        except Exception as e:
-                            logger.error(f"Error al procesar {url_id}: {e}")
-                            urls_con_error += 1
-                            
-                            # Agregar como error
-                            df_resultados = PAMIVerificationService._procesar_resultado_url(
-                                row, url_id, url_completa, False, request_data.columna_urls,
-                                df_resultados, urls_coincidentes, urls_no_coincidentes, urls_para_html
-                            )
-                            
-                            try:
-                                if page != primera_pagina:
-                                    await page.close()
-                            except:
-                                pass
-                    
-                    # Esperar entre lotes
-                    await asyncio.sleep(request_data.delay_seconds)
+                                # Si la página se cerró por un error, o el contexto superó sus límites
+                                # y hay que renovarlo, se sigue con una página nueva
+                                if page.is_closed() or contexto.vencido:
+                                    break
+
+                await asyncio.gather(*(trabajador(numero) for numero in range(maximo)))
                 
-                await browser.close()
+                logger.info(
+                    f"Recursos bloqueados: {contexto.recursos.requests_bloqueados} requests, "
+                    f"~{contexto.recursos.bytes_ahorrados_estimados} bytes ({contexto.recursos.por_tipo})"
+                )
+                return contexto.recursos
                 
         except Exception as e:
             logger.error(f"Error en Playwright: {e}")
             raise
-        
-        return {
-            "df_resultados": df_resultados,
-            "urls_coincidentes": urls_coincidentes,
-            "urls_no_coincidentes": urls_no_coincidentes,
-            "urls_para_html": urls_para_html,
-            "urls_con_error": urls_con_error
-        }
 
     @staticmethod
-    async def _iniciar_sesion(page):
-        """Inicia sesión en PAMI"""
-        try:
-            logger.info("Iniciando sesión en PAMI...")
-            await page.fill('input[name="UserName"]', settings.PAMI_LOGIN_USER)
-            await page.fill('input[name="Password"]', settings.PAMI_LOGIN_PASSWORD)
-            await page.wait_for_selector('select#ubicCodigo', timeout=10000)
-            
-            await page.select_option('select#depoCodigo', value=str(settings.PAMI_DEPOT_CODE))
-            await page.select_option('select#ubicCodigo', value=str(settings.PAMI_LOCATION_CODE))
+    async def _verificar_posiciones_http(
+        posiciones: list[int], acumulador: AcumuladorResultados, request_data: PAMIVerificationRequest,
+        registrar_procesada: Callable[[int], None], controlador: ControladorConcurrencia
+    ) -> list[int]:
+        """
+        Verifica URLs por HTTP directo con las cookies de la sesión de Playwright.
+
+        La cantidad de requests en vuelo la regula el controlador adaptativo, con
+        techo PAMI_HTTP_MAX_CONNECTIONS.
+
+        Returns:
+            Posiciones cuya respuesta no fue concluyente y requieren el navegador
+        """
+        url_ids = acumulador.url_ids
+        clasificador = obtener_clasificador(request_data.predicados)
+        maximo = max(1, min(settings.PAMI_HTTP_MAX_CONNECTIONS, len(posiciones)))
+        controlador.configurar(request_data.batch_size, maximo)
+        storage_state = await session_manager.exportar_storage_state(
+            f"{settings.PAMI_BASE_URL}{url_ids[posiciones[0]]}"
+        )
+        logger.info(f"Verificando {len(posiciones)} URLs por HTTP con hasta {maximo} conexiones")
+
+        no_concluyentes: list[int] = []
+        cola: asyncio.Queue[int] = asyncio.Queue()
+        for posicion in posiciones:
+            cola.put_nowait(posicion)
+
+        async with PAMIHttpVerifier(storage_state, maximo) as verificador:
+            async def trabajador(numero: int) -> None:
+                if not await controlador.esperar_cupo(numero, cola.empty):
+                    return
+                while not cola.empty():
+                    async with controlador.turno() as turno:
+                        # Otro trabajador pudo vaciar la cola mientras se esperaba el turno
+                        try:
+                            posicion = cola.get_nowait()
+                        except asyncio.QueueEmpty:
+                            turno.marcar_sin_trabajo()
+                            return
+
+                        url_id = url_ids[posicion]
+                        inicio_url = time.perf_counter()
+                        intentos = Intentos()
+
+                        async def intento(url_id: str = url_id) -> str:
+                            try:
+                                with acumulador.etapas.medir(ETAPA_OBTENCION_CONTENIDO):
+                                    return await verificador.obtener_contenido(f"{settings.PAMI_BASE_URL}{url_id}")
+                            except Exception as e:
+                                if es_sobrecarga(e):
+                                    turno.marcar_sobrecarga()
+                                raise
+
+                        try:
+                            contenido = await con_reintentos(intento, f"URL {url_id} (HTTP)", intentos)
+                            with acumulador.etapas.medir(ETAPA_COINCIDENCIA):
+                                categoria = clasificador.clasificar(contenido)
+                            logger.debug(f"URL {url_id} (HTTP): Categoría = {categoria}")
+                            acumulador.registrar(
+                                posicion, categoria == CATEGORIA_COINCIDE,
+                                latencia_ms=(time.perf_counter() - inicio_url) * 1000,
+                                reintentos=intentos.reintentos, categoria=categoria
+                            )
+                            registrar_procesada(posicion)
+                        except RespuestaNoConcluyente as e:
+                            # Se cuenta como procesada cuando la resuelva el navegador
+                            logger.info(str(e))
+                            acumulador.latencias_ms[posicion] = (time.perf_counter() - inicio_url) * 1000
+                            acumulador.clases_error[posicion] = clasificar_error(e)
+                            acumulador.reintentos[posicion] = intentos.reintentos
+                            no_concluyentes.append(posicion)
+                        except Exception as e:
+                            clase_error = clasificar_error(e)
+                            logger.error(f"Error HTTP al procesar {url_id} ({intentos.cantidad} intentos, {clase_error}): {e}")
+                            if clase_error == ERROR_PLAZO_AGOTADO:
+                                turno.marcar_sobrecarga()
+                            acumulador.registrar(
+                                posicion, False, error=True, latencia_ms=(time.perf_counter() - inicio_url) * 1000,
+                                clase_error=clase_error, reintentos=intentos.reintentos
+                            )
+                            registrar_procesada(posicion)
             
-            await page.click('input[type="submit"]')
-            await page.wait_for_load_state('networkidle')
-            logger.info("Sesión iniciada correctamente")
-        except Exception as e:
-            logger.error(f"Error al iniciar sesión: {e}")
-            raise
+            await asyncio.gather(*(trabajador(numero) for numero in range(maximo)))
+
+        return sorted(no_concluyentes)
 
     @staticmethod
-    def _procesar_resultado_url(
-        row, url_id: str, url_completa: str, coincide: bool, columna_urls: str,
-        df_resultados: pd.DataFrame, urls_coincidentes: list, urls_no_coincidentes: list, urls_para_html: list
-    ) -> pd.DataFrame:
-        """Procesa el resultado de una URL verificada"""
+    async def _verificar_url(
+        page: Page, contexto: ContextoPAMI, url_id: str, url_completa: str, etapas: RegistroEtapas,
+        clasificador: ClasificadorPaginas
+    ) -> str:
+        """
+        Navega a una URL con una página del pool y clasifica su contenido.
+
+        La navegación vuelve apenas el servidor responde y la espera termina en cuanto
+        aparece el texto buscado, un marcador de "no encontrado" o el formulario de
+        login, dentro del presupuesto de tiempo PAMI_URL_TIMEOUT_SECONDS. La duración
+        de cada etapa se registra en `etapas`.
+
+        Returns:
+            Categoría de la página según `clasificador` ("coincide" si contiene el texto buscado)
+
+        Raises:
+            RespuestaErrorServidor: si el servidor respondió 5xx o 429
+            SesionExpirada: si después de renovar la sesión la página sigue pidiendo login
+        """
+        logger.debug(f"Verificando URL: {url_id}")
+        limite = time.monotonic() + settings.PAMI_URL_TIMEOUT_SECONDS
         
-        # Crear nueva fila para resultados
-        nueva_fila = row.copy()
-        nueva_fila['URL_Completa'] = url_completa
-        nueva_fila['Coincide'] = coincide
+        def restante_ms() -> float:
+            return max(1.0, (limite - time.monotonic()) * 1000)
         
-        df_nueva_fila = pd.DataFrame([nueva_fila])
-        df_resultados = pd.concat([df_resultados, df_nueva_fila], ignore_index=True)
+        generacion_sesion = session_manager.generacion
+        with etapas.medir(ETAPA_NAVEGACION):
+            respuesta = await page.goto(url_completa, wait_until="commit", timeout=restante_ms())
+        contexto.registrar_navegacion()
+        # Una página de error 5xx/429 no se clasifica: se reintenta y cuenta como sobrecarga
+        validar_respuesta(respuesta, url_completa)
+        with etapas.medir(ETAPA_READINESS):
+            estado = await esperar_contenido(page, restante_ms())
         
-        # Clasificar resultado
-        if coincide:
-            logger.info(f"✓ Texto encontrado en: {url_id}")
-            urls_coincidentes.append(row.to_dict())
-            
-            # Agregar a HTML
-            urls_para_html.append({
-                'name': f"Paciente: {row.get('Paciente', 'N/A')} - ID: {url_id}",
-                'url': url_completa,
-                'id': f"url_{url_id}",
-                'paciente': str(row.get('Paciente', 'N/A')),
-                'fecha': str(row.get('Fecha', 'N/A')),
-                'f_alta': str(row.get('F. Alta', 'N/A')),
-                'observacion': str(row.get('Observacion', 'N/A')),
-                'diagnostico': str(row.get('Diagnostico', 'N/A')),
-                'motivo': str(row.get('Motivo', 'N/A')),
-            })
-        else:
-            logger.info(f"✗ Texto NO encontrado en: {url_id}")
-            urls_no_coincidentes.append(row.to_dict())
+        # Si la sesión expiró, una sola corrutina vuelve a iniciar sesión y el resto la reutiliza
+        if estado == ESTADO_LOGIN:
+            with etapas.medir(ETAPA_ESPERA_LOGIN):
+                await session_manager.renovar(page, contexto, url_completa, generacion_sesion)
+                respuesta = await page.goto(url_completa, wait_until="commit", timeout=restante_ms())
+                contexto.registrar_navegacion()
+                validar_respuesta(respuesta, url_completa)
+                if await esperar_contenido(page, restante_ms()) == ESTADO_LOGIN:
+                    raise SesionExpirada(f"URL {url_id}: la sesión sigue sin ser válida después de renovarla")
+
+        # Verificar contenido
+        with etapas.medir(ETAPA_OBTENCION_CONTENIDO):
+            content = await page.content()
+        with etapas.medir(ETAPA_COINCIDENCIA):
+            categoria = clasificador.clasificar(content)
+
+        # Volcado del contenido solo para una muestra de URLs con el log en debug
+        if muestrear_contenido():
+            registrar_contenido(url_id, content, await page.title())
         
-        return df_resultados
+        logger.debug(f"URL {url_id}: Categoría = {categoria}")
+        return categoria
 
     @staticmethod
-    async def _generar_excel_resultados(df_resultados: pd.DataFrame, urls_coincidentes: list, urls_no_coincidentes: list) -> tuple[str, str]:
-        """Genera archivo Excel con resultados"""
+    async def _cerrar_pagina(page: Page) -> None:
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            nombre_archivo = f'URLs_Resultados_PAMI_{timestamp}.xlsx'
-            
-            # Crear archivo en memoria
-            excel_buffer = io.BytesIO()
-            
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                # Hoja con todos los resultados
-                df_resultados.to_excel(writer, sheet_name='Todos_Resultados', index=False)
-                
-                # Hojas separadas
-                if urls_coincidentes:
-                    df_coincidentes = pd.DataFrame(urls_coincidentes)
-                    df_coincidentes.to_excel(writer, sheet_name='Coincidentes', index=False)
-                
-                if urls_no_coincidentes:
-                    df_no_coincidentes = pd.DataFrame(urls_no_coincidentes)
-                    df_no_coincidentes.to_excel(writer, sheet_name='No_Coincidentes', index=False)
-            
-            # Codificar en base64
-            excel_buffer.seek(0)
-            excel_b64 = base64.b64encode(excel_buffer.getvalue()).decode('utf-8')
-            
-            logger.info(f"Archivo Excel generado: {nombre_archivo}")
-            return excel_b64, nombre_archivo
-            
+            await page.close()
         except Exception as e:
-            logger.error(f"Error al generar Excel: {e}")
-            raise
+            logger.warning(f"Error al cerrar página: {e}")
 
     @staticmethod
-    async def _generar_html_resultados(urls_para_html: list) -> tuple[str, str]:
-        """Genera archivo HTML interactivo"""
+    def _tasa(cantidad: int, segundos: float) -> float:
+        """URLs por segundo redondeadas para las estadísticas"""
+        return round(cantidad / segundos, 3) if segundos > 0 else 0.0
+
+    @staticmethod
+    async def _generar_excel_resultados(
+        df_resultados: pd.DataFrame, df_coincidentes: pd.DataFrame, df_no_coincidentes: pd.DataFrame,
+        df_errores: pd.DataFrame | None = None, formato: FormatoSalida = "xlsx",
+        df_por_categoria: dict[str, pd.DataFrame] | None = None
+    ) -> tuple[IO[bytes], str]:
+        """Genera el archivo de resultados en un hilo aparte, sin bloquear el event loop"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            nombre_archivo = f'ControlUrls_PAMI_{timestamp}.html'
-            fecha_actual = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-            
-            # Plantilla HTML (simplificada para la integración)
-            html_template = """<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Control de OPs Internaciones PAMI</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; max-width: 900px; margin: 0 auto; padding: 30px; }}
-        h1 {{ color: #2c3e50; text-align: center; }}
-        .container {{ background-color: #f9f9f9; border-radius: 8px; padding: 25px; }}
-        .stats {{ background-color: #e3f2fd; border-radius: 5px; padding: 10px 15px; margin-bottom: 20px; }}
-        .link-item {{ margin: 15px 0; padding: 15px; border: 1px solid #e0e0e0; border-radius: 5px; background-color: #fff; }}
-        .patient-info {{ background-color: #e8f4fd; padding: 8px 12px; border-radius: 4px; margin: 8px 0; }}
-        a {{ color: #3498db; text-decoration: none; font-weight: bold; }}
-        a:hover {{ text-decoration: underline; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>Control de OPs PAMI</h1>
-        <div class="stats">
-            URLs verificadas: {total_urls} | Fecha de verificación: {fecha}
-        </div>
-        <div class="links-section">
-            <h3>Enlaces verificados:</h3>
-            <div id="linksList">
-"""
-
-            # Agregar enlaces
-            for site in urls_para_html:
-                html_template += f"""
-                <div class="link-item">
-                    <div>
-                        <a href="{site['url']}" target="_blank">{site['paciente']}</a>
-                    </div>
-                    <div class="patient-info">
-                        <div><strong>Paciente:</strong> {site['paciente']}</div>
-                        <div><strong>Fecha:</strong> {site['fecha']} | <strong>F. Alta:</strong> {site['f_alta']}</div>
-                        <div><strong>Motivo:</strong> {site['motivo']}</div>
-                        <div><strong>Observación:</strong> {site['observacion']}</div>
-                        <div><strong>Diagnóstico:</strong> {site['diagnostico']}</div>
-                    </div>
-                    <div style="color: #777; font-size: 0.8em; margin-top: 5px;">{site['url']}</div>
-                </div>
-"""
-
-            html_template += """
-            </div>
-        </div>
-    </div>
-</body>
-</html>
-"""
-            
-            # Reemplazar valores
-            html_content = html_template.format(
-                total_urls=len(urls_para_html),
-                fecha=fecha_actual
+            return await asyncio.to_thread(
+                escribir_resultados, formato, df_resultados, df_coincidentes, df_no_coincidentes,
+                df_errores if df_errores is not None else df_resultados.iloc[0:0], df_por_categoria
             )
-            
-            # Codificar en base64
-            html_b64 = base64.b64encode(html_content.encode('utf-8')).decode('utf-8')
-            
-            logger.info(f"Archivo HTML generado: {nombre_archivo}")
-            return html_b64, nombre_archivo
-            
+        except Exception as e:
+            logger.error(f"Error al generar archivo de resultados: {e}")
+            raise
+
+    @staticmethod
+    async def _generar_html_resultados(urls_para_html: list[dict[str, Any]]) -> tuple[IO[bytes], str]:
+        """Genera el reporte HTML interactivo en un hilo aparte, sin bloquear el event loop"""
+        try:
+            return await asyncio.to_thread(escribir_reporte_html, urls_para_html)
         except Exception as e:
             logger.error(f"Error al generar HTML: {e}")
-            raise
\ No newline at end of file
+            raise
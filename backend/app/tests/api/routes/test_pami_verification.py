@@ -0,0 +1,608 @@
+import base64
+import json
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app import crud
+from app.core.config import settings
+from app.models import (
+    PAMIVerificationJob,
+    PAMIVerificationRequest,
+    PAMIVerificationSlot,
+)
+from app.services.pami_artifact_store import artifact_store
+from app.services.pami_rate_controller import ControladorConcurrencia
+from app.services.pami_resource_blocker import ContadorRecursos
+from app.services.pami_result_accumulator import AcumuladorResultados
+from app.services.pami_verification_service import PAMIVerificationService
+from app.tests.utils.pami_job import create_random_pami_job, create_random_pami_run
+from app.tests.utils.utils import random_lower_string
+
+# Planilla mínima: con el verificador simulado solo coincide el ID 20
+PLANILLA_CSV = ("ids.csv", b"Id,Paciente\n20,Ana\n30,Beto\n", "text/csv")
+FORMULARIO = {"columnas_adicionales": "Paciente"}
+
+
+@pytest.fixture
+def verificador_simulado(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Reemplaza la verificación con Playwright: coinciden los IDs múltiplos de 20"""
+
+    async def verificar_posiciones(
+        posiciones: list[int],
+        acumulador: AcumuladorResultados,
+        _request_data: PAMIVerificationRequest,
+        registrar_procesada: Callable[[int], None],
+        _controlador: ControladorConcurrencia,
+    ) -> ContadorRecursos:
+        for posicion in posiciones:
+            acumulador.registrar(
+                posicion, int(acumulador.url_ids[posicion]) % 20 == 0, latencia_ms=1.0
+            )
+            registrar_procesada(posicion)
+        return ContadorRecursos()
+
+    monkeypatch.setattr(settings, "PAMI_VERDICT_CACHE_ENABLED", False)
+    monkeypatch.setattr(
+        PAMIVerificationService,
+        "_verificar_posiciones_navegador",
+        staticmethod(verificar_posiciones),
+    )
+
+
+def test_create_pami_job(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/pami-verification/jobs",
+        headers=normal_user_token_headers,
+        files={"archivo_excel": PLANILLA_CSV},
+        data=FORMULARIO,
+    )
+    assert response.status_code == 202
+    content = response.json()
+    assert content["estado"] == "pendiente"
+    assert content["nombre_archivo"] == "ids.csv"
+    assert content["total_urls"] == 2
+    assert content["urls_procesadas"] == 0
+    # Con el archivo guardado el trabajo queda en la cola del planificador
+    assert content["posicion_cola"] >= 1
+    job = db.get(PAMIVerificationJob, uuid.UUID(content["id"]))
+    assert job is not None
+    assert job.archivo_entrada == PLANILLA_CSV[1]
+    # Sacarlo de la cola para que no ocupe el lugar del usuario en los demás tests
+    crud.update_pami_verification_job(
+        session=db, job_id=job.id, datos={"estado": "cancelado"}
+    )
+
+
+def test_create_pami_job_invalid_file(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/pami-verification/jobs",
+        headers=superuser_token_headers,
+        files={"archivo_excel": ("ids.txt", b"20\n30\n", "text/plain")},
+    )
+    assert response.status_code == 400
+
+
+def test_read_pami_job(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    job = create_random_pami_job(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/jobs/{job.id}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["id"] == str(job.id)
+    assert content["estado"] == "pendiente"
+    assert content["nombre_archivo"] == job.nombre_archivo
+    assert content["urls_procesadas"] == 0
+    assert content["eta_segundos"] is None
+    # Sin archivo de entrada el planificador no lo encola
+    assert content["posicion_cola"] is None
+
+
+def test_read_pami_job_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/jobs/{uuid.uuid4()}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 404
+    content = response.json()
+    assert content["detail"] == "Trabajo no encontrado"
+
+
+def test_read_pami_job_not_enough_permissions(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    job = create_random_pami_job(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/jobs/{job.id}",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 400
+    content = response.json()
+    assert content["detail"] == "Not enough permissions"
+
+
+def test_read_pami_jobs(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    create_random_pami_job(db)
+    create_random_pami_job(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/jobs",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert len(content["data"]) >= 2
+
+
+def test_download_pami_job_excel_not_ready(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    job = create_random_pami_job(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/jobs/{job.id}/excel",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 409
+
+
+def test_resume_pami_job_not_resumable(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    job = create_random_pami_job(db)
+    response = client.post(
+        f"{settings.API_V1_STR}/pami-verification/jobs/{job.id}/resume",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 409
+
+
+def test_cancel_pami_job(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    job = create_random_pami_job(db)
+    response = client.post(
+        f"{settings.API_V1_STR}/pami-verification/jobs/{job.id}/cancel",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 202
+    content = response.json()
+    assert content["cancelacion_solicitada"] is True
+    # Un trabajo que todavía espera en la cola se cancela sin ejecutarse
+    assert content["estado"] == "cancelado"
+    assert content["finalizado_en"] is not None
+    assert crud.get_pami_job_cancellation_requested(session=db, job_id=job.id) is True
+
+
+def test_cancel_pami_job_already_finished(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    job = create_random_pami_job(db)
+    crud.update_pami_verification_job(
+        session=db, job_id=job.id, datos={"estado": "completado"}
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/pami-verification/jobs/{job.id}/cancel",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 409
+
+
+def test_stream_pami_job_results(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    job = create_random_pami_job(db)
+    crud.save_pami_verification_results(
+        session=db,
+        job_id=job.id,
+        resultados=[
+            {
+                "url_id": "100",
+                "coincide": True,
+                "error": False,
+                "latencia_ms": 12.5,
+                "clase_error": None,
+                "categoria": "coincide",
+            },
+            {
+                "url_id": "200",
+                "coincide": False,
+                "error": True,
+                "latencia_ms": 30000.0,
+                "clase_error": "TimeoutError",
+                "categoria": None,
+            },
+        ],
+    )
+    crud.update_pami_verification_job(
+        session=db, job_id=job.id, datos={"estado": "completado"}
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/jobs/{job.id}/stream",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    eventos = [json.loads(linea) for linea in response.text.splitlines()]
+    resultados = {
+        evento["id"]: evento for evento in eventos if evento["tipo"] == "resultado"
+    }
+    assert resultados["100"]["coincide"] is True
+    assert resultados["100"]["latencia_ms"] == 12.5
+    assert resultados["100"]["categoria"] == "coincide"
+    assert resultados["200"]["clase_error"] == "TimeoutError"
+    assert eventos[-1]["tipo"] == "fin"
+    assert eventos[-1]["estado"] == "completado"
+
+
+@pytest.mark.usefixtures("verificador_simulado")
+def test_verify_excel(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/pami-verification/verify-excel",
+        headers=superuser_token_headers,
+        files={"archivo_excel": PLANILLA_CSV},
+        data=FORMULARIO,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["estadisticas"]["total_urls"] == 2
+    assert content["estadisticas"]["urls_coincidentes"] == 1
+    assert content["estadisticas"]["urls_no_coincidentes"] == 1
+    # Los archivos se descargan del almacén; sin incluir_base64 no viajan en la respuesta
+    assert content["archivo_excel_base64"] is None
+    assert content["archivo_html_base64"] is None
+    assert content["url_descarga_excel"].endswith(
+        f"/artifacts/{content['archivo_excel_id']}"
+    )
+    assert content["url_descarga_html"].endswith(
+        f"/artifacts/{content['archivo_html_id']}"
+    )
+    excel = artifact_store.obtener(content["archivo_excel_id"])
+    assert excel is not None
+    assert excel.nombre_archivo == content["nombre_archivo_excel"]
+
+    descarga = client.get(content["url_descarga_html"], headers=superuser_token_headers)
+    assert descarga.status_code == 200
+    assert descarga.headers["content-type"].startswith("text/html")
+    # El lugar tomado del planificador se libera al terminar
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert superuser
+    assert (
+        db.exec(
+            select(PAMIVerificationSlot).where(
+                PAMIVerificationSlot.owner_id == superuser.id
+            )
+        ).all()
+        == []
+    )
+    # La verificación en línea no crea un trabajo visible en /jobs
+    assert (
+        db.exec(
+            select(PAMIVerificationJob).where(
+                PAMIVerificationJob.owner_id == superuser.id
+            )
+        ).all()
+        == []
+    )
+
+
+@pytest.mark.usefixtures("verificador_simulado")
+def test_verify_excel_reaps_stale_slots(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "PAMI_SCHEDULER_MAX_JOBS_PER_USER", 1)
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert superuser
+    # Lugar de una verificación cuyo worker murió sin liberarlo
+    huerfano = crud.create_pami_verification_slot(
+        session=db, owner_id=superuser.id, total_urls=10
+    )
+    huerfano.actualizado_en = datetime.utcnow() - timedelta(
+        minutes=settings.PAMI_JOB_STALE_MINUTES + 1
+    )
+    db.add(huerfano)
+    db.commit()
+
+    # No ocupa el único lugar del usuario y se borra al reservar uno nuevo
+    response = client.post(
+        f"{settings.API_V1_STR}/pami-verification/verify-excel",
+        headers=superuser_token_headers,
+        files={"archivo_excel": PLANILLA_CSV},
+        data=FORMULARIO,
+    )
+    assert response.status_code == 200
+    db.expire_all()
+    assert db.get(PAMIVerificationSlot, huerfano.id) is None
+
+
+@pytest.mark.usefixtures("verificador_simulado")
+def test_verify_excel_incluir_base64(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/pami-verification/verify-excel",
+        headers=superuser_token_headers,
+        files={"archivo_excel": PLANILLA_CSV},
+        data=FORMULARIO,
+        params={"incluir_base64": "true"},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    # El base64 es el mismo archivo que se guardó en el almacén
+    excel = artifact_store.obtener(content["archivo_excel_id"])
+    assert excel is not None
+    assert base64.b64decode(content["archivo_excel_base64"]) == excel.ruta.read_bytes()
+    html = artifact_store.obtener(content["archivo_html_id"])
+    assert html is not None
+    assert base64.b64decode(content["archivo_html_base64"]) == html.ruta.read_bytes()
+
+
+@pytest.mark.usefixtures("verificador_simulado")
+def test_verify_stream(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/pami-verification/verify-stream",
+        headers=superuser_token_headers,
+        files={"archivo_excel": PLANILLA_CSV},
+        data=FORMULARIO,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["cache-control"] == "no-cache"
+    eventos = [json.loads(linea) for linea in response.text.splitlines()]
+    resultados = {
+        evento["id"]: evento for evento in eventos if evento["tipo"] == "resultado"
+    }
+    assert set(resultados) == {"20", "30"}
+    assert resultados["20"]["coincide"] is True
+    assert resultados["30"]["coincide"] is False
+    assert eventos[-1]["tipo"] == "fin"
+    assert eventos[-1]["estadisticas"]["total_urls"] == 2
+    assert eventos[-1]["estadisticas"]["urls_coincidentes"] == 1
+    # Al terminar el stream el lugar del planificador se libera
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert superuser
+    assert (
+        db.exec(
+            select(PAMIVerificationSlot).where(
+                PAMIVerificationSlot.owner_id == superuser.id
+            )
+        ).all()
+        == []
+    )
+    # La verificación en línea no crea un trabajo visible en /jobs
+    assert (
+        db.exec(
+            select(PAMIVerificationJob).where(
+                PAMIVerificationJob.owner_id == superuser.id
+            )
+        ).all()
+        == []
+    )
+
+
+@pytest.mark.usefixtures("verificador_simulado")
+def test_verify_stream_sse(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/pami-verification/verify-stream",
+        headers=superuser_token_headers,
+        files={"archivo_excel": PLANILLA_CSV},
+        data=FORMULARIO,
+        params={"formato": "sse"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    tipos = [
+        linea.removeprefix("event: ")
+        for linea in response.text.splitlines()
+        if linea.startswith("event: ")
+    ]
+    assert tipos == ["resultado", "resultado", "fin"]
+
+
+def test_download_pami_artifact_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/artifacts/{uuid.uuid4()}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Archivo no encontrado"
+
+
+def test_download_pami_artifact_range_and_etag(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert superuser
+    artefacto = artifact_store.guardar(
+        b"0123456789", "rango.txt", "text/plain", owner_id=superuser.id
+    )
+    url = f"{settings.API_V1_STR}/pami-verification/artifacts/{artefacto.id}"
+
+    response = client.get(url, headers=superuser_token_headers)
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    assert response.headers["accept-ranges"] == "bytes"
+    etag = response.headers["etag"]
+    assert etag == f'"{artefacto.etag}"'
+
+    response = client.get(
+        url, headers={**superuser_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get(
+        url, headers={**superuser_token_headers, "Range": "bytes=2-5"}
+    )
+    assert response.status_code == 206
+    assert response.content == b"2345"
+    assert response.headers["content-range"] == "bytes 2-5/10"
+    assert response.headers["content-length"] == "4"
+
+    # Un fin posterior al final del archivo se recorta
+    response = client.get(
+        url, headers={**superuser_token_headers, "Range": "bytes=7-50"}
+    )
+    assert response.status_code == 206
+    assert response.content == b"789"
+    assert response.headers["content-range"] == "bytes 7-9/10"
+
+    # Sufijo: los últimos 3 bytes
+    response = client.get(url, headers={**superuser_token_headers, "Range": "bytes=-3"})
+    assert response.status_code == 206
+    assert response.content == b"789"
+    assert response.headers["content-range"] == "bytes 7-9/10"
+
+    response = client.get(
+        url, headers={**superuser_token_headers, "Range": "bytes=20-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */10"
+
+    # Con If-Range de otra versión el rango se ignora y se envía el archivo completo
+    response = client.get(
+        url,
+        headers={
+            **superuser_token_headers,
+            "Range": "bytes=2-5",
+            "If-Range": '"otra-version"',
+        },
+    )
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+
+    response = client.get(
+        url, headers={**superuser_token_headers, "Range": "bytes=2-5", "If-Range": etag}
+    )
+    assert response.status_code == 206
+    assert response.content == b"2345"
+
+
+@pytest.mark.parametrize(
+    "rango",
+    ["bytes=abc", "bytes=0-1,4-5", "items=0-1", "bytes=5-2", "bytes=-", "bytes 2-5"],
+)
+def test_download_pami_artifact_ignores_invalid_range(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session, rango: str
+) -> None:
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert superuser
+    artefacto = artifact_store.guardar(
+        b"0123456789", "rango.txt", "text/plain", owner_id=superuser.id
+    )
+    # Un Range mal formado, de varios rangos o de otra unidad se ignora: archivo completo
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/artifacts/{artefacto.id}",
+        headers={**superuser_token_headers, "Range": rango},
+    )
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    assert "content-range" not in response.headers
+
+
+@pytest.mark.parametrize("rango", ["bytes=10-", "bytes=20-30", "bytes=-0"])
+def test_download_pami_artifact_unsatisfiable_range(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session, rango: str
+) -> None:
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert superuser
+    artefacto = artifact_store.guardar(
+        b"0123456789", "rango.txt", "text/plain", owner_id=superuser.id
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/artifacts/{artefacto.id}",
+        headers={**superuser_token_headers, "Range": rango},
+    )
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */10"
+
+
+def test_download_pami_artifact_not_enough_permissions(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    superuser = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert superuser
+    artefacto = artifact_store.guardar(
+        b"0123456789", "rango.txt", "text/plain", owner_id=superuser.id
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/artifacts/{artefacto.id}",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Not enough permissions"
+
+
+def test_read_pami_history(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    url_id = random_lower_string()
+    run = create_random_pami_run(db, url_id)
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/history",
+        headers=superuser_token_headers,
+        params={"url_id": url_id},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 1
+    registro = content["data"][0]
+    assert registro["run_id"] == str(run.id)
+    assert registro["estado"] == "coincide"
+    assert registro["paciente"] == "Ana"
+    assert registro["nombre_archivo"] == run.nombre_archivo
+
+
+def test_read_pami_history_filtered_by_state(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    url_id = random_lower_string()
+    create_random_pami_run(db, url_id)
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/history",
+        headers=superuser_token_headers,
+        params={"url_id": url_id, "estado": "no_coincide"},
+    )
+    assert response.status_code == 200
+    assert response.json()["count"] == 0
+
+
+def test_read_pami_history_only_own_runs(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    url_id = random_lower_string()
+    create_random_pami_run(db, url_id)
+    response = client.get(
+        f"{settings.API_V1_STR}/pami-verification/history",
+        headers=normal_user_token_headers,
+        params={"url_id": url_id},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 0
+    assert content["data"] == []
@@ -0,0 +1,94 @@
+import time
+from typing import Any
+
+from fastapi.testclient import TestClient
+
+from app.benchmarks.pami_fake_server import (
+    COOKIE_SESION,
+    RUTA_AUTORIZACIONES,
+    RUTA_LOGIN,
+    ConfiguracionServidorFalso,
+    coincide,
+    crear_app,
+)
+from app.core.config import settings
+
+_FORMULARIO = {
+    "UserName": "usuario",
+    "Password": "clave",
+    "depoCodigo": "1",
+    "ubicCodigo": "1",
+}
+
+
+def _cliente(**configuracion: Any) -> TestClient:
+    return TestClient(
+        crear_app(ConfiguracionServidorFalso(latencia_ms=0, **configuracion))
+    )
+
+
+def test_sin_sesion_muestra_el_login() -> None:
+    cliente = _cliente()
+
+    respuesta = cliente.get(f"{RUTA_AUTORIZACIONES}/123")
+
+    assert respuesta.status_code == 200
+    assert settings.PAMI_LOGIN_FORM_MARKER in respuesta.text
+    for campo in (
+        'name="UserName"',
+        'name="Password"',
+        'id="depoCodigo"',
+        'id="ubicCodigo"',
+    ):
+        assert campo in respuesta.text
+
+
+def test_login_y_veredicto_por_id() -> None:
+    cliente = _cliente(proporcion_coincidencias=1.0)
+
+    respuesta = cliente.post(
+        f"{RUTA_LOGIN}?ReturnUrl={RUTA_AUTORIZACIONES}/123", data=_FORMULARIO
+    )
+
+    assert respuesta.url.path == f"{RUTA_AUTORIZACIONES}/123"
+    assert COOKIE_SESION in cliente.cookies
+    assert settings.PAMI_SEARCH_TEXT in respuesta.text
+    assert len(respuesta.text) >= settings.PAMI_HTTP_MIN_CONTENT_LENGTH
+
+
+def test_login_incompleto_vuelve_al_formulario() -> None:
+    cliente = _cliente()
+
+    respuesta = cliente.post(RUTA_LOGIN, data={**_FORMULARIO, "ubicCodigo": ""})
+
+    assert settings.PAMI_LOGIN_FORM_MARKER in respuesta.text
+    assert COOKIE_SESION not in cliente.cookies
+
+
+def test_sesion_vence() -> None:
+    cliente = _cliente(expiracion_sesion_segundos=0.05)
+    cliente.post(RUTA_LOGIN, data=_FORMULARIO)
+    assert (
+        settings.PAMI_LOGIN_FORM_MARKER
+        not in cliente.get(f"{RUTA_AUTORIZACIONES}/1").text
+    )
+
+    time.sleep(0.1)
+
+    assert (
+        settings.PAMI_LOGIN_FORM_MARKER in cliente.get(f"{RUTA_AUTORIZACIONES}/1").text
+    )
+    assert cliente.get("/__estado").json()["sesiones_vencidas"] == 1
+
+
+def test_errores_configurables() -> None:
+    cliente = _cliente(proporcion_errores=1.0)
+    cliente.post(RUTA_LOGIN, data=_FORMULARIO)
+
+    assert cliente.get(f"{RUTA_AUTORIZACIONES}/1").status_code == 503
+
+
+def test_proporcion_de_coincidencias() -> None:
+    ids = [str(100000 + numero) for numero in range(5000)]
+    proporcion = sum(coincide(url_id, 0.3) for url_id in ids) / len(ids)
+    assert 0.27 < proporcion < 0.33
@@ -26,8 +26,12 @@ def db() -> Generator[Session, None, None]:
 
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
-    with TestClient(app) as c:
-        yield c
+    # Los trabajos PAMI que encolan los tests no se despachan en segundo plano
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, "PAMI_SCHEDULER_ENABLED", False)
+        monkeypatch.setattr(settings, "PAMI_BROWSER_POOL_PRELAUNCH", False)
+        with TestClient(app) as c:
+            yield c
 
 
 @pytest.fixture(scope="module")
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app import crud
+from app.tests.utils.utils import random_lower_string
+
+
+def test_save_and_get_pami_cached_verdicts(db: Session) -> None:
+    coincide_id = random_lower_string()
+    no_coincide_id = random_lower_string()
+    crud.save_pami_cached_verdicts(
+        session=db, veredictos={coincide_id: True, no_coincide_id: False}
+    )
+    veredictos = crud.get_pami_cached_verdicts(
+        session=db,
+        url_ids=[coincide_id, no_coincide_id, random_lower_string()],
+        desde=datetime.utcnow() - timedelta(minutes=5),
+    )
+    assert {url_id: coincide for url_id, (coincide, _) in veredictos.items()} == {
+        coincide_id: True,
+        no_coincide_id: False,
+    }
+
+
+def test_get_pami_cached_verdicts_expired(db: Session) -> None:
+    url_id = random_lower_string()
+    crud.save_pami_cached_verdicts(session=db, veredictos={url_id: True})
+    veredictos = crud.get_pami_cached_verdicts(
+        session=db, url_ids=[url_id], desde=datetime.utcnow() + timedelta(minutes=1)
+    )
+    assert veredictos == {}
+
+
+def test_save_pami_cached_verdicts_overwrites(db: Session) -> None:
+    url_id = random_lower_string()
+    crud.save_pami_cached_verdicts(session=db, veredictos={url_id: True})
+    crud.save_pami_cached_verdicts(session=db, veredictos={url_id: False})
+    veredictos = crud.get_pami_cached_verdicts(
+        session=db, url_ids=[url_id], desde=datetime.utcnow() - timedelta(minutes=5)
+    )
+    assert veredictos[url_id][0] is False
@@ -0,0 +1,62 @@
+import io
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.services.pami_artifact_store import PAMIArtifactStore
+
+
+def test_guardar_y_obtener_artefacto(tmp_path: Path) -> None:
+    store = PAMIArtifactStore(str(tmp_path))
+    artefacto = store.guardar(
+        b"contenido", "resultados.xlsx", "application/octet-stream"
+    )
+
+    obtenido = store.obtener(artefacto.id)
+
+    assert obtenido is not None
+    assert obtenido.ruta.read_bytes() == b"contenido"
+    assert obtenido.nombre_archivo == "resultados.xlsx"
+    assert obtenido.tamano == len(b"contenido")
+    assert obtenido.etag == artefacto.etag
+    assert artefacto.url_descarga.endswith(
+        f"/pami-verification/artifacts/{artefacto.id}"
+    )
+
+
+def test_obtener_artefacto_inexistente(tmp_path: Path) -> None:
+    store = PAMIArtifactStore(str(tmp_path))
+    assert store.obtener("no-es-un-id") is None
+    assert store.obtener("../config") is None
+    assert store.obtener("6f1c2f4e-6f0a-4a53-9d55-2d8f6f0b5f11") is None
+
+
+def test_limpiar_artefactos_vencidos(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "PAMI_ARTIFACTS_RETENTION_HOURS", 1)
+    store = PAMIArtifactStore(str(tmp_path))
+    vencido = store.guardar(b"viejo", "viejo.html", "text/html")
+    vigente = store.guardar(b"nuevo", "nuevo.html", "text/html")
+    hace_dos_horas = time.time() - 2 * 3600
+    for ruta in tmp_path.glob(f"{vencido.id}*"):
+        os.utime(ruta, (hace_dos_horas, hace_dos_horas))
+
+    assert store.limpiar_vencidos() == 1
+    assert store.obtener(vencido.id) is None
+    assert store.obtener(vigente.id) is not None
+
+
+def test_guardar_archivo_copia_desde_buffer(tmp_path: Path) -> None:
+    store = PAMIArtifactStore(str(tmp_path))
+    contenido = b"x" * (3 * 1024 * 1024 + 17)
+    origen = io.BytesIO(contenido)
+
+    artefacto = store.guardar_archivo(origen, "resultados.csv", "text/csv")
+
+    assert artefacto.ruta.read_bytes() == contenido
+    assert artefacto.etag == store.guardar(contenido, "copia.csv", "text/csv").etag
+    assert not origen.closed
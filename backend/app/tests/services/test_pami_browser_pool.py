@@ -0,0 +1,122 @@
+import asyncio
+from typing import Any, cast
+
+import pytest
+
+from app.core.config import settings
+from app.services.pami_browser_pool import PAMIBrowserPool
+
+
+class _Pagina:
+    def __init__(self, context: "_BrowserContext") -> None:
+        self.context = context
+        self._cerrada = False
+
+    def is_closed(self) -> bool:
+        return self._cerrada
+
+    async def close(self) -> None:
+        self._cerrada = True
+        self.context.pages.remove(self)
+
+
+class _BrowserContext:
+    def __init__(self, storage_state: dict[str, Any] | None) -> None:
+        self.storage_state_inicial = storage_state
+        self.pages: list[_Pagina] = []
+        self.cerrado = False
+
+    async def new_page(self) -> _Pagina:
+        pagina = _Pagina(self)
+        self.pages.append(pagina)
+        return pagina
+
+    async def storage_state(self) -> dict[str, Any]:
+        return {"cookies": [{"name": "sesion", "value": str(id(self))}]}
+
+    async def close(self) -> None:
+        self.cerrado = True
+
+
+class _Browser:
+    def __init__(self) -> None:
+        self.contexts: list[_BrowserContext] = []
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def new_context(
+        self, storage_state: dict[str, Any] | None = None
+    ) -> _BrowserContext:
+        context = _BrowserContext(storage_state)
+        self.contexts.append(context)
+        return context
+
+
+@pytest.fixture
+def pool(monkeypatch: pytest.MonkeyPatch) -> tuple[PAMIBrowserPool, _Browser]:
+    monkeypatch.setattr(settings, "PAMI_BLOCK_RESOURCES", False)
+    monkeypatch.setattr(settings, "PAMI_CONTEXT_MAX_NAVIGATIONS", 3)
+    browser = _Browser()
+    pool = PAMIBrowserPool()
+
+    async def iniciar() -> _Browser:
+        return browser
+
+    monkeypatch.setattr(pool, "iniciar", iniciar)
+    return pool, browser
+
+
+def test_contexto_se_renueva_durante_el_prestamo(
+    pool: tuple[PAMIBrowserPool, _Browser],
+) -> None:
+    pool_navegador, browser = pool
+
+    async def verificar() -> None:
+        async with pool_navegador.contexto() as contexto:
+            original = contexto.context
+            async with pool_navegador.pagina(contexto) as pagina_vieja:
+                for _ in range(3):
+                    contexto.registrar_navegacion()
+                assert contexto.vencido
+
+                # La página nueva ya usa otro BrowserContext con la sesión del anterior
+                async with pool_navegador.pagina(contexto) as pagina_nueva:
+                    assert pagina_nueva.context is contexto.context
+                    assert contexto.context is not original
+                    assert (
+                        cast(_BrowserContext, contexto.context).storage_state_inicial
+                        == await original.storage_state()
+                    )
+                    assert contexto.navegaciones == 0
+                    assert not contexto.vencido
+                    # El anterior sigue abierto mientras tenga páginas
+                    assert not original.cerrado
+                    assert pagina_vieja.context is original
+            assert original.cerrado
+        # Al devolverlo, el contexto renovado vuelve al pool
+        assert len(pool_navegador._contextos_libres) == 1
+
+    asyncio.run(verificar())
+    assert len(browser.contexts) == 2
+
+
+def test_renovacion_concurrente_crea_un_solo_contexto(
+    pool: tuple[PAMIBrowserPool, _Browser],
+) -> None:
+    pool_navegador, browser = pool
+
+    async def verificar() -> None:
+        async with pool_navegador.contexto() as contexto:
+            for _ in range(3):
+                contexto.registrar_navegacion()
+
+            async def abrir() -> None:
+                async with pool_navegador.pagina(contexto):
+                    await asyncio.sleep(0)
+
+            await asyncio.gather(*(abrir() for _ in range(5)))
+
+    asyncio.run(verificar())
+    assert len(browser.contexts) == 2
+    assert browser.contexts[0].cerrado
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.services.pami_cancellation import ejecutar_cancelable
+
+
+def test_termina_sin_cancelacion() -> None:
+    async def ejecutar() -> bool:
+        return await ejecutar_cancelable(asyncio.sleep(0), asyncio.Event())
+
+    assert asyncio.run(ejecutar()) is True
+
+
+def test_cancelacion_interrumpe_la_corrutina() -> None:
+    estado: list[str] = []
+
+    async def trabajo() -> None:
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            estado.append("cancelada")
+            raise
+
+    async def ejecutar() -> bool:
+        cancelacion = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.01, cancelacion.set)
+        return await ejecutar_cancelable(trabajo(), cancelacion)
+
+    assert asyncio.run(ejecutar()) is False
+    assert estado == ["cancelada"]
+
+
+def test_cancelacion_previa_no_ejecuta() -> None:
+    ejecutada: list[bool] = []
+
+    async def trabajo() -> None:
+        ejecutada.append(True)
+
+    async def ejecutar() -> bool:
+        cancelacion = asyncio.Event()
+        cancelacion.set()
+        return await ejecutar_cancelable(trabajo(), cancelacion)
+
+    assert asyncio.run(ejecutar()) is False
+    assert ejecutada == []
+
+
+def test_propaga_errores_de_la_corrutina() -> None:
+    async def trabajo() -> None:
+        raise RuntimeError("falla")
+
+    async def ejecutar() -> bool:
+        return await ejecutar_cancelable(trabajo(), asyncio.Event())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(ejecutar())
@@ -0,0 +1,83 @@
+import pytest
+
+from app.core.config import settings
+from app.services.pami_classifier import (
+    CATEGORIA_COINCIDE,
+    CATEGORIA_SIN_COINCIDENCIA,
+    ClasificadorPaginas,
+    PredicadoInvalido,
+    obtener_clasificador,
+    validar_predicados,
+)
+
+PREDICADOS = {
+    "rechazada": "Rechazada",
+    "pendiente": "re:Pendiente de (?:auditor[ií]a|aprobaci[oó]n)",
+    "otro_financiador": "re:OSDE|Swiss Medical",
+}
+
+
+def _pagina(texto: str) -> str:
+    return f"<html><body><p>Prestación ambulatoria.</p><td>{texto}</td></body></html>"
+
+
+def test_clasifica_por_prioridad() -> None:
+    clasificador = ClasificadorPaginas(PREDICADOS)
+
+    assert (
+        clasificador.clasificar(_pagina(settings.PAMI_SEARCH_TEXT))
+        == CATEGORIA_COINCIDE
+    )
+    assert clasificador.clasificar(_pagina("Pendiente de auditoría")) == "pendiente"
+    assert clasificador.clasificar(_pagina("OSDE - OSDE")) == "otro_financiador"
+    assert clasificador.clasificar(_pagina("sin datos")) == CATEGORIA_SIN_COINCIDENCIA
+    # Con varios predicados presentes gana el de mayor prioridad, sin importar la posición
+    assert clasificador.clasificar(_pagina("OSDE - OSDE Rechazada")) == "rechazada"
+    assert (
+        clasificador.clasificar(_pagina(f"Rechazada {settings.PAMI_SEARCH_TEXT}"))
+        == CATEGORIA_COINCIDE
+    )
+
+
+def test_un_predicado_que_empieza_dentro_de_otro_no_se_pierde() -> None:
+    clasificador = ClasificadorPaginas(
+        {"alta": "re:Auditoria", "baja": "re:Estado: \\w+"}
+    )
+
+    assert clasificador.clasificar(_pagina("Estado: Auditoria")) == "alta"
+
+
+def test_sin_predicados_adicionales_solo_busca_el_texto() -> None:
+    clasificador = ClasificadorPaginas({})
+
+    assert clasificador.categorias == [CATEGORIA_COINCIDE]
+    assert (
+        clasificador.clasificar(_pagina(settings.PAMI_SEARCH_TEXT))
+        == CATEGORIA_COINCIDE
+    )
+    assert clasificador.clasificar(_pagina("OSDE - OSDE")) == CATEGORIA_SIN_COINCIDENCIA
+
+
+@pytest.mark.parametrize(
+    "predicados",
+    [
+        {"mal": "re:("},
+        {"con_grupo": "re:(?P<x>a)"},
+        {"flags": "re:(?i)rechazada"},
+        {"coincide": "Rechazada"},
+        {"con espacio": "Rechazada"},
+    ],
+)
+def test_predicados_invalidos(predicados: dict[str, str]) -> None:
+    with pytest.raises(PredicadoInvalido):
+        validar_predicados(predicados)
+
+
+def test_obtener_clasificador_usa_la_configuracion(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "PAMI_PREDICATES", {"rechazada": "Rechazada"})
+
+    assert obtener_clasificador().categorias_adicionales == ["rechazada"]
+    assert obtener_clasificador({}).categorias_adicionales == []
+    assert obtener_clasificador(PREDICADOS) is obtener_clasificador(dict(PREDICADOS))
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.services.pami_html_report import escribir_reporte_html
+
+
+@pytest.fixture(autouse=True)
+def directorio_artefactos(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "PAMI_ARTIFACTS_DIR", str(tmp_path))
+
+
+def _sitio(numero: int, paciente: str = "Pérez") -> dict[str, str]:
+    return {
+        "url": f"https://pami.example/Index/{numero}",
+        "paciente": paciente,
+        "fecha": "01/02/2024",
+        "f_alta": "03/02/2024",
+        "motivo": "Control",
+        "observacion": "N/A",
+        "diagnostico": "Neumonía",
+    }
+
+
+def _renderizar(sitios: list[dict[str, str]]) -> tuple[str, str]:
+    archivo, nombre = escribir_reporte_html(sitios)
+    with archivo:
+        return archivo.read().decode("utf-8"), nombre
+
+
+def test_reporte_escapa_los_datos_de_la_planilla() -> None:
+    contenido, nombre = _renderizar([_sitio(1, paciente='<script>alert("x")</script>')])
+
+    assert nombre.endswith(".html")
+    assert "URLs verificadas: 1" in contenido
+    assert '<script>alert("x")</script>' not in contenido
+    assert "&lt;script&gt;alert(&#34;x&#34;)&lt;/script&gt;" in contenido
+    # Dentro del JSON embebido tampoco puede cerrarse el <script>
+    assert "\\u003cscript\\u003e" in contenido
+
+
+def test_reporte_renderiza_solo_la_primera_pagina_en_html(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "PAMI_HTML_PAGE_SIZE", 2)
+
+    contenido, _ = _renderizar([_sitio(numero) for numero in range(5)])
+
+    assert contenido.count('class="link-item"') == 2
+    assert "var POR_PAGINA = 2;" in contenido
+    assert '"https://pami.example/Index/4"' in contenido
+
+
+def test_reporte_sin_coincidencias() -> None:
+    contenido, _ = _renderizar([])
+
+    assert "URLs verificadas: 0" in contenido
+    assert 'class="link-item"' not in contenido
+    assert '<script type="application/json" id="filas">[\n]</script>' in contenido
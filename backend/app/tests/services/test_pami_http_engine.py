@@ -0,0 +1,69 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.pami_http_engine import (
+    PAMIHttpVerifier,
+    RespuestaNoConcluyente,
+    requiere_navegador,
+)
+
+PAGINA_LARGA = "<html><body>" + "x" * 5000 + "</body></html>"
+
+
+def _respuesta(status_code: int, texto: str) -> httpx.Response:
+    return httpx.Response(status_code, text=texto)
+
+
+def test_requiere_navegador_con_respuestas_no_200() -> None:
+    assert requiere_navegador(_respuesta(302, PAGINA_LARGA))
+    assert requiere_navegador(_respuesta(503, settings.PAMI_SEARCH_TEXT))
+    assert not requiere_navegador(_respuesta(200, PAGINA_LARGA))
+
+
+def test_requiere_navegador_con_formulario_de_login() -> None:
+    # El login manda aunque la página sea larga o incluya el texto buscado
+    assert requiere_navegador(
+        _respuesta(200, PAGINA_LARGA + settings.PAMI_LOGIN_FORM_MARKER)
+    )
+    assert requiere_navegador(
+        _respuesta(200, settings.PAMI_SEARCH_TEXT + settings.PAMI_LOGIN_FORM_MARKER)
+    )
+
+
+def test_requiere_navegador_con_contenido_corto(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "PAMI_HTTP_MIN_CONTENT_LENGTH", 2000)
+    # Una página corta sin el texto buscado puede completarse con JavaScript
+    assert requiere_navegador(_respuesta(200, "<div id='app'></div>"))
+    # Con el texto buscado ya es concluyente, aunque sea corta
+    assert not requiere_navegador(
+        _respuesta(200, f"<p>{settings.PAMI_SEARCH_TEXT}</p>")
+    )
+
+
+def test_obtener_contenido_rechaza_respuestas_no_concluyentes() -> None:
+    respuestas = {"/1": _respuesta(200, PAGINA_LARGA), "/2": _respuesta(429, "")}
+
+    async def obtener(url: str) -> str:
+        async with PAMIHttpVerifier(
+            {"cookies": [{"name": "sesion", "value": "abc"}]}, 2
+        ) as verificador:
+            # Mismas cookies, pero contra un transporte falso en lugar de la red
+            original = verificador._client
+            await original.aclose()
+            verificador._client = httpx.AsyncClient(
+                cookies=original.cookies,
+                transport=httpx.MockTransport(
+                    lambda request: respuestas[request.url.path]
+                ),
+            )
+            return await verificador.obtener_contenido(url)
+
+    assert asyncio.run(obtener("https://pami.test/1")) == PAGINA_LARGA
+    with pytest.raises(RespuestaNoConcluyente) as error:
+        asyncio.run(obtener("https://pami.test/2"))
+    assert error.value.status_code == 429
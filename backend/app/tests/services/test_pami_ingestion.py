@@ -0,0 +1,92 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.services.pami_ingestion import (
+    FORMATO_CSV,
+    FORMATO_XLSX,
+    ColumnasFaltantes,
+    contar_filas_con_id,
+    detectar_formato,
+    leer_planilla,
+)
+
+
+def _planilla() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Id": [11, None, 33, 44],
+            "Paciente": ["Ana", "Beto", "Carla", "Dora"],
+            "Extra": ["x", "y", "z", "w"],
+            "Motivo": ["Internación", "Internación", "Internación", "Consulta"],
+        }
+    )
+
+
+def _xlsx(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def test_excel_solo_columnas_pedidas_en_orden() -> None:
+    contenido = _xlsx(_planilla())
+
+    df = leer_planilla(contenido, "Id", ["Motivo", "Paciente"])
+
+    assert detectar_formato(contenido) == FORMATO_XLSX
+    assert list(df.columns) == ["Id", "Motivo", "Paciente"]
+    # Las filas sin ID se descartan
+    assert df["Id"].tolist() == [11, 33, 44]
+    assert df["Paciente"].tolist() == ["Ana", "Carla", "Dora"]
+
+
+def test_texto_repetido_como_categoria() -> None:
+    planilla = pd.DataFrame(
+        {
+            "Id": range(1, 7),
+            "Paciente": ["Ana", "Beto", "Carla", "Dora", "Eva", "Fede"],
+            "Motivo": ["Internación"] * 5 + ["Consulta"],
+        }
+    )
+
+    df = leer_planilla(_xlsx(planilla), "Id", ["Paciente", "Motivo"])
+
+    assert isinstance(df["Motivo"].dtype, pd.CategoricalDtype)
+    assert df["Paciente"].dtype == object
+
+
+def test_csv_con_punto_y_coma_y_cp1252() -> None:
+    contenido = "Id;Paciente;Motivo\n11;Ana;Internación\n22;Beto;Internación\n".encode(
+        "cp1252"
+    )
+
+    df = leer_planilla(contenido, "Id", ["Paciente", "Motivo"])
+
+    assert detectar_formato(contenido) == FORMATO_CSV
+    assert df["Id"].tolist() == [11, 22]
+    assert df["Motivo"].tolist() == ["Internación", "Internación"]
+
+
+def test_columnas_faltantes_antes_de_leer_los_datos() -> None:
+    with pytest.raises(ColumnasFaltantes) as error:
+        leer_planilla(_xlsx(_planilla()), "Id", ["Paciente", "Diagnostico"])
+
+    assert error.value.faltantes == ["Diagnostico"]
+    assert "Extra" in error.value.disponibles
+
+
+def test_contar_filas_con_id_valida_todas_las_columnas() -> None:
+    contenido = _xlsx(_planilla())
+
+    assert contar_filas_con_id(contenido, "Id", ["Paciente", "Motivo"]) == 3
+    assert (
+        contar_filas_con_id(
+            b"Id,Paciente\n11,Ana\n,Beto\n33,Carla\n", "Id", ["Paciente"]
+        )
+        == 2
+    )
+    # Aunque solo lea la columna de IDs, rechaza la planilla igual que leer_planilla
+    with pytest.raises(ColumnasFaltantes):
+        contar_filas_con_id(contenido, "Id", ["Diagnostico"])
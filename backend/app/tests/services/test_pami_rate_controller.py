@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.pami_http_engine import RespuestaNoConcluyente
+from app.services.pami_rate_controller import ControladorConcurrencia, es_sobrecarga
+from app.services.pami_retry import RespuestaErrorServidor
+
+
+def test_es_sobrecarga() -> None:
+    assert es_sobrecarga(asyncio.TimeoutError())
+    assert es_sobrecarga(httpx.ConnectError("reset"))
+    assert es_sobrecarga(RespuestaNoConcluyente("HTTP 503", status_code=503))
+    assert es_sobrecarga(RespuestaNoConcluyente("HTTP 429", status_code=429))
+    assert not es_sobrecarga(RespuestaNoConcluyente("HTTP 200", status_code=200))
+    # Páginas 5xx/429 del navegador
+    assert es_sobrecarga(RespuestaErrorServidor("HTTP 503", status_code=503))
+    assert es_sobrecarga(RespuestaErrorServidor("HTTP 429", status_code=429))
+    assert not es_sobrecarga(ValueError("otro error"))
+
+
+def test_controlador_sube_con_respuestas_sanas() -> None:
+    async def ejecutar() -> tuple[int, int]:
+        controlador = ControladorConcurrencia()
+        controlador.configurar(inicial=2, maximo=8)
+        en_vuelo = 0
+        pico = 0
+
+        async def tarea() -> None:
+            nonlocal en_vuelo, pico
+            async with controlador.turno():
+                en_vuelo += 1
+                pico = max(pico, en_vuelo)
+                assert en_vuelo <= controlador.maximo
+                await asyncio.sleep(0.001)
+                en_vuelo -= 1
+
+        await asyncio.gather(*(tarea() for _ in range(200)))
+        return controlador.concurrencia, pico
+
+    concurrencia, pico = asyncio.run(ejecutar())
+    assert concurrencia == 8
+    assert pico <= 8
+
+
+def test_controlador_baja_ante_sobrecarga(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "PAMI_AIMD_DECREASE_FACTOR", 0.5)
+
+    async def ejecutar() -> int:
+        controlador = ControladorConcurrencia()
+        controlador.configurar(inicial=8, maximo=8)
+
+        async def tarea() -> None:
+            async with controlador.turno() as turno:
+                await asyncio.sleep(0.001)
+                turno.marcar_sobrecarga()
+
+        # Ocho fallas simultáneas cuentan como una sola señal de congestión
+        await asyncio.gather(*(tarea() for _ in range(8)))
+        return controlador.concurrencia
+
+    assert asyncio.run(ejecutar()) == 4
+
+
+def test_turno_sin_trabajo_no_ajusta_el_limite() -> None:
+    async def ejecutar() -> ControladorConcurrencia:
+        controlador = ControladorConcurrencia()
+        controlador.configurar(inicial=1, maximo=8)
+        for _ in range(20):
+            async with controlador.turno() as turno:
+                turno.marcar_sin_trabajo()
+        return controlador
+
+    controlador = asyncio.run(ejecutar())
+    assert controlador.concurrencia == 1
+    assert controlador.tasa() == 0
+
+
+def test_controlador_refleja_otros_procesos() -> None:
+    controlador = ControladorConcurrencia()
+
+    controlador.reflejar(7, terminadas=5)
+    assert controlador.concurrencia == 7
+    assert controlador.tasa() > 0
+
+    # Sin procesos activos la concurrencia informada vuelve a cero
+    controlador.reflejar(0)
+    assert controlador.concurrencia == 0
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from app.core.config import settings
+from app.services.pami_readiness import (
+    ESTADO_CARGADO,
+    ESTADO_COINCIDE,
+    ESTADO_LOGIN,
+    ESTADO_NO_ENCONTRADO,
+    esperar_contenido,
+)
+
+
+class _Handle:
+    def __init__(self, valor: str) -> None:
+        self._valor = valor
+
+    async def json_value(self) -> str:
+        return self._valor
+
+
+class _Pagina:
+    """Página falsa: wait_for_function devuelve `estado` y una evaluación posterior `estado_tardio`"""
+
+    def __init__(self, estado: str, estado_tardio: str | bool = False) -> None:
+        self.estado = estado
+        self.estado_tardio = estado_tardio
+        self.argumentos: list[Any] = []
+        self.esperas_ms: list[float] = []
+        self.timeout: float | None = None
+
+    async def wait_for_function(
+        self, _: str, arg: list[Any], polling: int, timeout: float
+    ) -> _Handle:
+        self.argumentos = arg
+        self.timeout = timeout
+        return _Handle(self.estado)
+
+    async def wait_for_timeout(self, espera_ms: float) -> None:
+        self.esperas_ms.append(espera_ms)
+
+    async def evaluate(self, _: str, __: list[Any]) -> str | bool:
+        return self.estado_tardio
+
+
+@pytest.fixture(autouse=True)
+def marcadores(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        settings, "PAMI_NOT_FOUND_MARKERS", ["No se encontraron resultados"]
+    )
+    monkeypatch.setattr(settings, "PAMI_READINESS_PADDING_MS", 0)
+
+
+@pytest.mark.parametrize(
+    "estado", [ESTADO_LOGIN, ESTADO_COINCIDE, ESTADO_NO_ENCONTRADO, ESTADO_CARGADO]
+)
+def test_esperar_contenido_devuelve_el_primer_estado(estado: str) -> None:
+    pagina = _Pagina(estado)
+
+    assert asyncio.run(esperar_contenido(pagina, 1500)) == estado  # type: ignore[arg-type]
+    assert pagina.argumentos == [
+        settings.PAMI_SEARCH_TEXT,
+        ["No se encontraron resultados"],
+        settings.PAMI_LOGIN_FORM_SELECTOR,
+    ]
+    assert pagina.timeout == 1500
+    # Sin margen configurado no se espera de más
+    assert pagina.esperas_ms == []
+
+
+def test_esperar_contenido_con_margen_toma_el_contenido_tardio(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "PAMI_READINESS_PADDING_MS", 200)
+
+    tardio = _Pagina(ESTADO_CARGADO, estado_tardio=ESTADO_COINCIDE)
+    assert asyncio.run(esperar_contenido(tardio, 1000)) == ESTADO_COINCIDE  # type: ignore[arg-type]
+    assert tardio.esperas_ms == [200]
+
+    # Si después del margen sigue sin marcadores, queda como cargada
+    sin_marcadores = _Pagina(ESTADO_CARGADO, estado_tardio=False)
+    assert asyncio.run(esperar_contenido(sin_marcadores, 1000)) == ESTADO_CARGADO  # type: ignore[arg-type]
+
+    # El margen solo aplica a las páginas que cargaron sin ningún marcador
+    coincide = _Pagina(ESTADO_COINCIDE)
+    assert asyncio.run(esperar_contenido(coincide, 1000)) == ESTADO_COINCIDE  # type: ignore[arg-type]
+    assert coincide.esperas_ms == []
@@ -0,0 +1,124 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import pytest
+
+from app.core.config import settings
+from app.services.pami_resource_blocker import (
+    BYTES_ESTIMADOS_OTROS,
+    BYTES_ESTIMADOS_POR_TIPO,
+    ContadorRecursos,
+    hosts_permitidos,
+    instalar_bloqueo_recursos,
+    recurso_permitido,
+)
+
+
+class _Request:
+    def __init__(self, resource_type: str, url: str) -> None:
+        self.resource_type = resource_type
+        self.url = url
+
+
+class _Route:
+    def __init__(self, resource_type: str, url: str) -> None:
+        self.request = _Request(resource_type, url)
+        self.resultado: str | None = None
+
+    async def continue_(self) -> None:
+        self.resultado = "continuado"
+
+    async def abort(self) -> None:
+        self.resultado = "abortado"
+
+
+class _BrowserContext:
+    def __init__(self) -> None:
+        self.rutas: dict[str, Callable[[Any], Awaitable[None]]] = {}
+
+    async def route(
+        self, patron: str, manejador: Callable[[Any], Awaitable[None]]
+    ) -> None:
+        self.rutas[patron] = manejador
+
+
+@pytest.fixture(autouse=True)
+def filtro(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        settings, "PAMI_BASE_URL", "https://maranon.markey.com.ar/Markey/Index/"
+    )
+    monkeypatch.setattr(settings, "PAMI_ALLOWED_HOSTS", [])
+    monkeypatch.setattr(
+        settings, "PAMI_ALLOWED_RESOURCE_TYPES", ["document", "script", "xhr", "fetch"]
+    )
+
+
+def test_contador_recursos() -> None:
+    contador = ContadorRecursos()
+    contador.registrar("image")
+    contador.registrar("image")
+    contador.registrar("websocket")
+
+    assert contador.requests_bloqueados == 3
+    assert (
+        contador.bytes_ahorrados_estimados
+        == 2 * BYTES_ESTIMADOS_POR_TIPO["image"] + BYTES_ESTIMADOS_OTROS
+    )
+    assert contador.por_tipo == {"image": 2, "websocket": 1}
+
+    contador.reiniciar()
+    assert (
+        contador.requests_bloqueados,
+        contador.bytes_ahorrados_estimados,
+        contador.por_tipo,
+    ) == (0, 0, {})
+
+
+def test_hosts_permitidos(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert hosts_permitidos() == ["maranon.markey.com.ar"]
+
+    monkeypatch.setattr(settings, "PAMI_ALLOWED_HOSTS", ["Markey.com.ar"])
+    assert hosts_permitidos() == ["markey.com.ar"]
+
+
+def test_recurso_permitido() -> None:
+    hosts = ["markey.com.ar"]
+    assert recurso_permitido("document", "https://markey.com.ar/Index/1", hosts)
+    # Los subdominios del host permitido también
+    assert recurso_permitido("script", "https://maranon.markey.com.ar/app.js", hosts)
+    # Tipo no permitido, aunque sea del mismo host
+    assert not recurso_permitido("image", "https://markey.com.ar/logo.png", hosts)
+    # Scripts de terceros y hosts que solo terminan igual
+    assert not recurso_permitido("script", "https://cdn.analytics.com/tag.js", hosts)
+    assert not recurso_permitido("script", "https://evilmarkey.com.ar/tag.js", hosts)
+
+
+def test_filtro_de_rutas_aborta_y_cuenta_lo_bloqueado() -> None:
+    context = _BrowserContext()
+    contador = ContadorRecursos()
+    rutas = [
+        _Route("document", "https://maranon.markey.com.ar/Markey/Index/1"),
+        _Route("xhr", "https://maranon.markey.com.ar/api/datos"),
+        _Route("stylesheet", "https://maranon.markey.com.ar/site.css"),
+        _Route("font", "https://fonts.gstatic.com/roboto.woff2"),
+        _Route("script", "https://www.googletagmanager.com/gtag.js"),
+    ]
+
+    async def filtrar() -> None:
+        await instalar_bloqueo_recursos(context, contador)  # type: ignore[arg-type]
+        manejador = context.rutas["**/*"]
+        for ruta in rutas:
+            await manejador(ruta)
+
+    asyncio.run(filtrar())
+
+    assert [ruta.resultado for ruta in rutas] == [
+        "continuado",
+        "continuado",
+        "abortado",
+        "abortado",
+        "abortado",
+    ]
+    assert contador.requests_bloqueados == 3
+    assert contador.por_tipo == {"stylesheet": 1, "font": 1, "script": 1}
@@ -0,0 +1,119 @@
+import pandas as pd
+
+from app.core.config import settings
+from app.services.pami_result_accumulator import AcumuladorResultados
+
+
+def _planilla() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Id": [11, 22, 33],
+            "Paciente": ["Ana", "Beto", "Carla"],
+            "Diagnostico": ["A", "B", "C"],
+        },
+        index=[5, 7, 9],
+    )
+
+
+def test_materializar_mantiene_orden_y_columnas() -> None:
+    acumulador = AcumuladorResultados(_planilla(), "Id")
+    # Los veredictos pueden llegar en cualquier orden
+    acumulador.registrar(2, True)
+    acumulador.registrar(0, True)
+    acumulador.registrar(1, False)
+
+    resultados = acumulador.materializar()
+
+    assert list(resultados.df_resultados.columns) == [
+        "Id",
+        "Paciente",
+        "Diagnostico",
+        "URL_Completa",
+        "Coincide",
+        "Estado",
+        "Categoria",
+        "Clase_Error",
+    ]
+    assert resultados.df_resultados["Coincide"].tolist() == [True, False, True]
+    assert (
+        resultados.df_resultados["URL_Completa"].tolist()[0]
+        == f"{settings.PAMI_BASE_URL}11"
+    )
+    assert resultados.df_coincidentes["Paciente"].tolist() == ["Ana", "Carla"]
+    assert resultados.df_no_coincidentes["Paciente"].tolist() == ["Beto"]
+    assert resultados.df_errores.empty
+
+
+def test_materializar_separa_errores_de_no_coincidentes() -> None:
+    acumulador = AcumuladorResultados(_planilla(), "Id")
+    acumulador.registrar(0, False)
+    acumulador.registrar(
+        1, False, error=True, clase_error="timeout_navegacion", reintentos=2
+    )
+    acumulador.registrar(2, True)
+
+    resultados = acumulador.materializar()
+
+    assert resultados.df_resultados["Estado"].tolist() == [
+        "no_coincide",
+        "error",
+        "coincide",
+    ]
+    assert resultados.df_no_coincidentes["Paciente"].tolist() == ["Ana"]
+    assert resultados.df_errores["Paciente"].tolist() == ["Beto"]
+    assert resultados.df_errores["Clase_Error"].tolist() == ["timeout_navegacion"]
+    assert acumulador.urls_con_error == 1
+    assert acumulador.resultado(1).reintentos == 2
+
+
+def test_materializar_separa_categorias() -> None:
+    acumulador = AcumuladorResultados(_planilla(), "Id")
+    acumulador.registrar(0, False, categoria="rechazada")
+    acumulador.registrar(1, False, error=True, clase_error="servidor")
+    # Sin categoría explícita (caché o reanudación) se deduce del veredicto
+    acumulador.registrar(2, True)
+
+    resultados = acumulador.materializar(["rechazada", "pendiente"])
+
+    assert resultados.df_resultados["Categoria"].tolist() == [
+        "rechazada",
+        None,
+        "coincide",
+    ]
+    assert list(resultados.df_por_categoria) == ["rechazada"]
+    assert resultados.df_por_categoria["rechazada"]["Paciente"].tolist() == ["Ana"]
+    assert acumulador.contar_categorias() == {"rechazada": 1, "coincide": 1}
+    assert acumulador.resultado(0).categoria == "rechazada"
+    acumulador = AcumuladorResultados(_planilla(), "Id")
+    acumulador.registrar(1, True)
+
+    (fila,) = acumulador.materializar().urls_para_html
+
+    assert fila["id"] == "url_22"
+    assert fila["paciente"] == "Beto"
+    assert fila["diagnostico"] == "B"
+    # Las columnas que no están en la planilla se muestran como N/A
+    assert fila["motivo"] == "N/A"
+    assert fila["name"] == "Paciente: Beto - ID: 22"
+
+
+def test_registros_historial_solo_filas_verificadas() -> None:
+    acumulador = AcumuladorResultados(_planilla(), "Id")
+    acumulador.registrar(0, True)
+    acumulador.registrar(2, False, error=True, clase_error="timeout_navegacion")
+
+    registros = acumulador.registros_historial()
+
+    # La fila 1 quedó sin verificar (corrida cancelada) y no va al historial
+    assert [registro["posicion"] for registro in registros] == [0, 2]
+    assert registros[0] == {
+        "posicion": 0,
+        "url_id": "11",
+        "paciente": "Ana",
+        "fecha": None,
+        "estado": "coincide",
+        "categoria": "coincide",
+        "clase_error": None,
+    }
+    assert registros[1]["estado"] == "error"
+    assert registros[1]["clase_error"] == "timeout_navegacion"
@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.services.pami_result_writer import escribir_resultados
+
+
+@pytest.fixture(autouse=True)
+def directorio_artefactos(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "PAMI_ARTIFACTS_DIR", str(tmp_path))
+
+
+def _resultados() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Id": ["1", "2", "3"],
+            "Paciente": ["Pérez", np.nan, "Gómez"],
+            "Coincide_PAMI": [True, False, False],
+            "Estado": ["coincide", "no_coincide", "error"],
+        }
+    )
+
+
+def test_excel_escribe_hojas_con_filas() -> None:
+    df = _resultados()
+
+    archivo, nombre = escribir_resultados(
+        "xlsx", df, df.iloc[[0]], df.iloc[[1]], df.iloc[0:0]
+    )
+    with archivo:
+        hojas = pd.read_excel(archivo, sheet_name=None, dtype={"Id": str})
+
+    assert nombre.endswith(".xlsx")
+    assert list(hojas) == ["Todos_Resultados", "Coincidentes", "No_Coincidentes"]
+    assert hojas["Todos_Resultados"]["Id"].tolist() == ["1", "2", "3"]
+    assert pd.isna(hojas["Todos_Resultados"]["Paciente"][1])
+    assert hojas["Coincidentes"]["Paciente"].tolist() == ["Pérez"]
+
+
+def test_excel_sin_resultados_mantiene_la_hoja_principal() -> None:
+    vacio = _resultados().iloc[0:0]
+
+    archivo, _ = escribir_resultados("xlsx", vacio, vacio, vacio, vacio)
+    with archivo:
+        hojas = pd.read_excel(archivo, sheet_name=None)
+
+    assert list(hojas) == ["Todos_Resultados"]
+    assert list(hojas["Todos_Resultados"].columns) == [
+        "Id",
+        "Paciente",
+        "Coincide_PAMI",
+        "Estado",
+    ]
+
+
+def test_csv_con_bom_y_celdas_vacias() -> None:
+    df = _resultados()
+
+    archivo, nombre = escribir_resultados("csv", df, df, df, df)
+    with archivo:
+        contenido = archivo.read()
+
+    assert nombre.endswith(".csv")
+    assert contenido.startswith(b"\xef\xbb\xbf")
+    lineas = contenido[3:].decode("utf-8").splitlines()
+    assert lineas[0] == "Id,Paciente,Coincide_PAMI,Estado"
+    assert lineas[2] == "2,,False,no_coincide"
+
+
+def test_parquet() -> None:
+    pytest.importorskip("pyarrow")
+    df = _resultados()
+
+    archivo, nombre = escribir_resultados("parquet", df, df, df, df)
+    with archivo:
+        leido = pd.read_parquet(archivo)
+
+    assert nombre.endswith(".parquet")
+    assert leido["Id"].tolist() == ["1", "2", "3"]
+
+
+def test_excel_con_hojas_por_categoria() -> None:
+    df = _resultados()
+
+    archivo, _ = escribir_resultados(
+        "xlsx",
+        df,
+        df.iloc[[0]],
+        df.iloc[[1, 2]],
+        df.iloc[[2]],
+        {"rechazada": df.iloc[[1]]},
+    )
+    with archivo:
+        hojas = pd.read_excel(archivo, sheet_name=None, dtype={"Id": str})
+
+    assert list(hojas) == [
+        "Todos_Resultados",
+        "Coincidentes",
+        "No_Coincidentes",
+        "Cat_rechazada",
+        "Errores",
+    ]
+    assert hojas["Cat_rechazada"]["Id"].tolist() == ["2"]
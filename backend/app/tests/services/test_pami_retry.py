@@ -0,0 +1,129 @@
+import asyncio
+
+import httpx
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from app.core.config import settings
+from app.services.pami_http_engine import RespuestaNoConcluyente
+from app.services.pami_retry import (
+    ERROR_CONEXION,
+    ERROR_DESCONOCIDO,
+    ERROR_PLAZO_AGOTADO,
+    ERROR_RESPUESTA_NO_CONCLUYENTE,
+    ERROR_SERVIDOR,
+    ERROR_SESION_EXPIRADA,
+    ERROR_TIMEOUT_NAVEGACION,
+    Intentos,
+    PlazoURLAgotado,
+    RespuestaErrorServidor,
+    SesionExpirada,
+    clasificar_error,
+    con_reintentos,
+    es_reintentable,
+    validar_respuesta,
+)
+
+
+@pytest.fixture
+def reintentos_rapidos(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "PAMI_RETRY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "PAMI_RETRY_BACKOFF_SECONDS", 0.001)
+    monkeypatch.setattr(settings, "PAMI_RETRY_BACKOFF_MAX_SECONDS", 0.002)
+    monkeypatch.setattr(settings, "PAMI_URL_DEADLINE_SECONDS", 5.0)
+
+
+def test_clasificar_error() -> None:
+    assert (
+        clasificar_error(PlaywrightTimeoutError("Timeout 30000ms exceeded"))
+        == ERROR_TIMEOUT_NAVEGACION
+    )
+    assert (
+        clasificar_error(httpx.ConnectError("Connection reset by peer"))
+        == ERROR_CONEXION
+    )
+    assert clasificar_error(SesionExpirada()) == ERROR_SESION_EXPIRADA
+    assert (
+        clasificar_error(RespuestaNoConcluyente("HTTP 503", status_code=503))
+        == ERROR_SERVIDOR
+    )
+    assert (
+        clasificar_error(RespuestaNoConcluyente("HTTP 200", status_code=200))
+        == ERROR_RESPUESTA_NO_CONCLUYENTE
+    )
+    assert clasificar_error(PlazoURLAgotado()) == ERROR_PLAZO_AGOTADO
+    assert clasificar_error(ValueError("otro")) == ERROR_DESCONOCIDO
+
+    assert es_reintentable(SesionExpirada())
+    assert not es_reintentable(RespuestaNoConcluyente("HTTP 200", status_code=200))
+    assert not es_reintentable(PlazoURLAgotado())
+
+
+class _Respuesta:
+    def __init__(self, status: int) -> None:
+        self.status = status
+
+
+def test_validar_respuesta_del_navegador() -> None:
+    # Sin respuesta (navegación dentro del mismo documento) o con 2xx/4xx se sigue normalmente
+    validar_respuesta(None, "url")
+    validar_respuesta(_Respuesta(200), "url")
+    validar_respuesta(_Respuesta(404), "url")
+
+    for codigo in (503, 429):
+        with pytest.raises(RespuestaErrorServidor) as error:
+            validar_respuesta(_Respuesta(codigo), "url")
+        assert clasificar_error(error.value) == ERROR_SERVIDOR
+        assert es_reintentable(error.value)
+
+
+@pytest.mark.usefixtures("reintentos_rapidos")
+def test_con_reintentos_recupera_error_transitorio() -> None:
+    llamadas = 0
+
+    async def intento() -> bool:
+        nonlocal llamadas
+        llamadas += 1
+        if llamadas < 3:
+            raise PlaywrightTimeoutError("Timeout 30000ms exceeded")
+        return True
+
+    intentos = Intentos()
+    assert asyncio.run(con_reintentos(intento, "URL 1", intentos)) is True
+    assert intentos.cantidad == 3
+    assert intentos.reintentos == 2
+
+
+@pytest.mark.usefixtures("reintentos_rapidos")
+def test_con_reintentos_no_reintenta_errores_definitivos() -> None:
+    async def intento() -> bool:
+        raise ValueError("contenido inválido")
+
+    intentos = Intentos()
+    with pytest.raises(ValueError):
+        asyncio.run(con_reintentos(intento, "URL 1", intentos))
+    assert intentos.cantidad == 1
+
+
+@pytest.mark.usefixtures("reintentos_rapidos")
+def test_con_reintentos_agota_intentos() -> None:
+    async def intento() -> bool:
+        raise httpx.ConnectError("Connection reset by peer")
+
+    intentos = Intentos()
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(con_reintentos(intento, "URL 1", intentos))
+    assert intentos.cantidad == settings.PAMI_RETRY_MAX_ATTEMPTS
+
+
+@pytest.mark.usefixtures("reintentos_rapidos")
+def test_con_reintentos_respeta_plazo_por_url(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "PAMI_URL_DEADLINE_SECONDS", 0.05)
+
+    async def intento() -> bool:
+        # Una página colgada que nunca responde
+        await asyncio.sleep(10)
+        return True
+
+    with pytest.raises(PlazoURLAgotado):
+        asyncio.run(con_reintentos(intento, "URL 1"))
@@ -0,0 +1,109 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services import pami_scheduler
+from app.services.pami_jobs import PAMIJobRunner
+from app.services.pami_scheduler import (
+    PAMIJobScheduler,
+    TrabajoEnCola,
+    elegir_trabajos,
+    ordenar_cola,
+)
+
+AHORA = datetime(2026, 1, 1, 12, 0)
+
+
+def trabajo(
+    owner_id: uuid.UUID, restantes: int, minutos_en_cola: float = 0
+) -> TrabajoEnCola:
+    return TrabajoEnCola(
+        id=uuid.uuid4(),
+        owner_id=owner_id,
+        restantes=restantes,
+        creado_en=AHORA - timedelta(minutes=minutos_en_cola),
+    )
+
+
+def test_ordenar_cola_primero_los_trabajos_cortos() -> None:
+    usuario = uuid.uuid4()
+    grande = trabajo(usuario, 50_000, minutos_en_cola=5)
+    chico = trabajo(usuario, 200)
+    mediano = trabajo(usuario, 3_000, minutos_en_cola=1)
+
+    assert ordenar_cola([grande, chico, mediano], {}, AHORA) == [chico, mediano, grande]
+
+
+def test_ordenar_cola_reparte_entre_usuarios() -> None:
+    usuario_a, usuario_b, usuario_c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    a1, a2, a3 = trabajo(usuario_a, 10), trabajo(usuario_a, 20), trabajo(usuario_a, 30)
+    b1 = trabajo(usuario_b, 5_000)
+    c1 = trabajo(usuario_c, 100)
+
+    # El usuario A tiene muchos trabajos chicos pero no acapara los primeros lugares
+    assert ordenar_cola([a1, a2, a3, b1, c1], {}, AHORA) == [a1, c1, b1, a2, a3]
+    # Con un trabajo ya en ejecución, A queda detrás de los demás usuarios
+    assert ordenar_cola([a1, b1, c1], {usuario_a: 1}, AHORA) == [c1, b1, a1]
+
+
+def test_ordenar_cola_envejece_los_trabajos_grandes(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "PAMI_SCHEDULER_AGING_MINUTES", 30.0)
+    usuario = uuid.uuid4()
+    grande = trabajo(usuario, 8_000, minutos_en_cola=300)
+    chico = trabajo(usuario, 1_000)
+
+    # 300 minutos en cola dividen su tamaño efectivo por 11
+    assert ordenar_cola([chico, grande], {}, AHORA) == [grande, chico]
+
+
+def test_elegir_trabajos_respeta_los_topes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "PAMI_SCHEDULER_MAX_RUNNING_JOBS", 3)
+    monkeypatch.setattr(settings, "PAMI_SCHEDULER_MAX_JOBS_PER_USER", 1)
+    usuario_a, usuario_b, usuario_c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    a1, a2 = trabajo(usuario_a, 10), trabajo(usuario_a, 20)
+    b1, c1 = trabajo(usuario_b, 30), trabajo(usuario_c, 40)
+    orden = [a1, a2, b1, c1]
+
+    # Un trabajo por usuario: a2 espera aunque esté antes en la cola
+    assert elegir_trabajos(orden, {}, 0, libres_en_worker=5) == [a1.id, b1.id, c1.id]
+    # B ya tiene uno en ejecución y solo queda un lugar global
+    assert elegir_trabajos(
+        orden, {usuario_b: 1, usuario_c: 1}, 2, libres_en_worker=5
+    ) == [a1.id]
+    # Sin lugar en el worker no se reclama nada
+    assert elegir_trabajos(orden, {}, 0, libres_en_worker=0) == []
+
+
+def test_turno_en_linea_espera_lugar_y_lo_libera(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "PAMI_SCHEDULER_POLL_SECONDS", 0.01)
+    reserva = uuid.uuid4()
+    pedidos: list[int] = []
+    liberados: list[uuid.UUID] = []
+
+    def reservar(en_ejecucion_en_worker: int, *_: object) -> uuid.UUID | None:
+        # Sin lugar las dos primeras veces (topes globales o por usuario ocupados)
+        pedidos.append(en_ejecucion_en_worker)
+        return reserva if len(pedidos) == 3 else None
+
+    monkeypatch.setattr(PAMIJobScheduler, "_reservar", staticmethod(reservar))
+    monkeypatch.setattr(pami_scheduler, "_liberar_turno", liberados.append)
+    planificador = PAMIJobScheduler(PAMIJobRunner())
+
+    async def verificar() -> None:
+        async with planificador.turno_en_linea(uuid.uuid4(), 10):
+            assert planificador._en_ejecucion_en_worker == 1
+            assert liberados == []
+
+    asyncio.run(verificar())
+
+    # La verificación en espera no se cuenta a sí misma entre los lugares ocupados del worker
+    assert pedidos == [0, 0, 0]
+    assert liberados == [reserva]
+    assert planificador._en_ejecucion_en_worker == 0
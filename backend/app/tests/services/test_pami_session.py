@@ -0,0 +1,151 @@
+import asyncio
+from typing import Any, cast
+
+import pytest
+from playwright.async_api import BrowserContext, Page
+
+from app.services import pami_session
+from app.services.pami_browser_pool import ContextoPAMI
+from app.services.pami_session import PAMISessionManager
+
+
+class _Locator:
+    def __init__(self, pagina: "_Pagina") -> None:
+        self._pagina = pagina
+
+    async def is_visible(self) -> bool:
+        return self._pagina.muestra_login
+
+
+class _Pagina:
+    def __init__(self, muestra_login: bool) -> None:
+        self.muestra_login = muestra_login
+        self.visitas = 0
+
+    async def goto(self, _: str, **__: Any) -> None:
+        self.visitas += 1
+
+    def locator(self, _: str) -> _Locator:
+        return _Locator(self)
+
+
+class _BrowserContext:
+    def __init__(self) -> None:
+        self.cookies_agregadas: list[dict[str, Any]] = []
+
+    async def storage_state(self) -> dict[str, Any]:
+        return {"cookies": [{"name": "sesion", "value": "abc"}], "origins": []}
+
+    async def add_cookies(self, cookies: list[dict[str, Any]]) -> None:
+        self.cookies_agregadas.extend(cookies)
+
+
+def _contexto(context: _BrowserContext) -> ContextoPAMI:
+    return ContextoPAMI(cast(BrowserContext, context))
+
+
+def _pagina(pagina: _Pagina) -> Page:
+    return cast(Page, pagina)
+
+
+@pytest.fixture
+def logins(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    """Reemplaza el formulario de login por un contador; el login tarda para forzar la espera de los demás"""
+    hechos: list[int] = []
+
+    async def iniciar_sesion(page: _Pagina) -> None:
+        await asyncio.sleep(0.01)
+        page.muestra_login = False
+        hechos.append(1)
+
+    monkeypatch.setattr(pami_session, "iniciar_sesion", iniciar_sesion)
+    return hechos
+
+
+def test_renovar_inicia_sesion_una_sola_vez(logins: list[int]) -> None:
+    sesion = PAMISessionManager()
+    navegadores = [_BrowserContext() for _ in range(5)]
+    contextos = [_contexto(navegador) for navegador in navegadores]
+    paginas = [_Pagina(muestra_login=True) for _ in range(5)]
+
+    async def renovar_todas() -> None:
+        # Todas vieron el login con la generación 0
+        await asyncio.gather(
+            *(
+                sesion.renovar(_pagina(pagina), contexto, "https://pami/1", 0)
+                for pagina, contexto in zip(paginas, contextos, strict=True)
+            )
+        )
+
+    asyncio.run(renovar_todas())
+
+    assert len(logins) == 1
+    assert sesion.generacion == 1
+    assert sesion.vigente()
+    assert all(contexto.generacion_sesion == 1 for contexto in contextos)
+    # Solo la primera navegó; las demás recibieron las cookies de la sesión renovada
+    assert sum(pagina.visitas for pagina in paginas) == 1
+    assert sum(1 for navegador in navegadores if navegador.cookies_agregadas) == 4
+
+
+def test_renovar_con_generacion_actual_vuelve_a_iniciar_sesion(
+    logins: list[int],
+) -> None:
+    sesion = PAMISessionManager()
+    contexto = _contexto(_BrowserContext())
+
+    async def renovar_dos_veces() -> None:
+        await sesion.renovar(
+            _pagina(_Pagina(muestra_login=True)), contexto, "https://pami/1", 0
+        )
+        # La sesión de la generación 1 también expiró: quien la vio vencer no la reutiliza
+        await sesion.renovar(
+            _pagina(_Pagina(muestra_login=True)),
+            contexto,
+            "https://pami/2",
+            sesion.generacion,
+        )
+
+    asyncio.run(renovar_dos_veces())
+
+    assert len(logins) == 2
+    assert sesion.generacion == 2
+    assert contexto.generacion_sesion == 2
+
+
+def test_renovar_sin_login_visible_solo_guarda_la_sesion(logins: list[int]) -> None:
+    sesion = PAMISessionManager()
+    contexto = _contexto(_BrowserContext())
+
+    asyncio.run(
+        sesion.renovar(
+            _pagina(_Pagina(muestra_login=False)), contexto, "https://pami/1", 0
+        )
+    )
+
+    assert logins == []
+    assert sesion.generacion == 1
+    assert sesion.storage_state() == {
+        "cookies": [{"name": "sesion", "value": "abc"}],
+        "origins": [],
+    }
+
+
+def test_asegurar_sesion_reutiliza_la_sesion_vigente(logins: list[int]) -> None:
+    sesion = PAMISessionManager()
+    navegador = _BrowserContext()
+    primero = _contexto(_BrowserContext())
+    segundo = _contexto(navegador)
+    pagina = _Pagina(muestra_login=True)
+
+    async def asegurar() -> None:
+        await sesion.asegurar_sesion(_pagina(pagina), primero, "https://pami/1")
+        await sesion.asegurar_sesion(_pagina(pagina), segundo, "https://pami/1")
+
+    asyncio.run(asegurar())
+
+    # El segundo contexto recibe las cookies sin volver a navegar ni a iniciar sesión
+    assert len(logins) == 1
+    assert pagina.visitas == 2
+    assert segundo.generacion_sesion == sesion.generacion == 1
+    assert navegador.cookies_agregadas == [{"name": "sesion", "value": "abc"}]
@@ -0,0 +1,173 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+from typing import Any
+
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.models import PAMIVerificationRequest
+from app.services import pami_sharding
+from app.services.pami_rate_controller import ControladorConcurrencia
+from app.services.pami_result_accumulator import AcumuladorResultados
+from app.services.pami_sharding import (
+    combinar_metricas,
+    particionar,
+    procesos_por_defecto,
+    resolver_procesos,
+    verificar_particionado,
+)
+from app.services.pami_timing import MetricasVerificacion
+
+
+def test_resolver_procesos_respeta_lo_pedido() -> None:
+    assert resolver_procesos(4, 100) == 4
+    # Nunca más procesos que IDs
+    assert resolver_procesos(4, 2) == 2
+
+
+def test_resolver_procesos_automatico(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "PAMI_SHARD_MIN_URLS", 1000)
+    monkeypatch.setattr(settings, "PAMI_SHARD_PROCESSES", 3)
+    # Los archivos chicos no se particionan
+    assert resolver_procesos(None, 999) == 1
+    assert resolver_procesos(None, 1000) == 3
+
+
+def test_procesos_por_defecto_limitado_por_memoria(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    monkeypatch.setattr(settings, "PAMI_SHARD_MEMORY_PER_PROCESS_MB", 512)
+    monkeypatch.setattr(settings, "PAMI_SHARD_MAX_PROCESSES", 8)
+
+    monkeypatch.setattr(pami_sharding, "memoria_disponible", lambda: 2 * 1024**3)
+    assert procesos_por_defecto() == 4
+
+    monkeypatch.setattr(pami_sharding, "memoria_disponible", lambda: 64 * 1024**3)
+    assert procesos_por_defecto() == 8
+
+    monkeypatch.setattr(pami_sharding, "memoria_disponible", lambda: 0)
+    assert procesos_por_defecto() == 1
+
+
+def test_particionar_intercala_posiciones() -> None:
+    assert particionar([0, 1, 2, 3, 4], 2) == [[0, 2, 4], [1, 3]]
+    assert particionar([7], 3) == [[7]]
+
+
+def test_combinar_metricas() -> None:
+    metricas = MetricasVerificacion()
+    combinar_metricas(
+        metricas,
+        MetricasVerificacion(
+            urls_verificadas_navegador=10, duracion_navegador=4.0, requests_bloqueados=3
+        ),
+    )
+    combinar_metricas(
+        metricas,
+        MetricasVerificacion(urls_verificadas_navegador=5, duracion_navegador=6.0),
+    )
+
+    assert metricas.urls_verificadas_navegador == 15
+    assert metricas.requests_bloqueados == 3
+    # Los procesos corren en paralelo: la duración es la del más lento
+    assert metricas.duracion_navegador == 6.0
+
+
+class _Cola(queue.Queue):  # type: ignore[type-arg]
+    def close(self) -> None:
+        pass
+
+
+class _Proceso:
+    """Proceso hijo que, al arrancar, deja en la cola los veredictos que enviaría su partición"""
+
+    def __init__(self, contexto: "_ContextoSpawn", args: tuple[Any, ...]) -> None:
+        self.contexto = contexto
+        self.cola, self.numero, self.posiciones = args[0], args[1], args[2]
+        self.exitcode = 0
+
+    def start(self) -> None:
+        # Cada partición informa una concurrencia distinta de su controlador
+        concurrencia = 3 + self.numero
+        for posicion in self.posiciones:
+            self.cola.put(
+                (
+                    "resultado",
+                    self.numero,
+                    posicion,
+                    True,
+                    False,
+                    5.0,
+                    None,
+                    0,
+                    "coincide",
+                    concurrencia,
+                )
+            )
+        # Los "fin" llegan cuando ya arrancaron todas, como si corrieran a la vez
+        self.contexto.iniciados += 1
+        if self.contexto.iniciados == len(self.contexto.procesos):
+            for proceso in self.contexto.procesos:
+                parciales = MetricasVerificacion(
+                    urls_verificadas_navegador=len(proceso.posiciones)
+                )
+                self.cola.put(("fin", proceso.numero, parciales, {}))
+
+    def is_alive(self) -> bool:
+        return False
+
+    def join(self, _: float) -> None:
+        pass
+
+
+class _ContextoSpawn:
+    def __init__(self) -> None:
+        self.procesos: list[_Proceso] = []
+        self.iniciados = 0
+
+    def Queue(self) -> _Cola:
+        return _Cola()
+
+    def Process(self, args: tuple[Any, ...], **_: Any) -> _Proceso:
+        proceso = _Proceso(self, args)
+        self.procesos.append(proceso)
+        return proceso
+
+
+def test_verificar_particionado_suma_los_controladores_de_los_hijos(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(multiprocessing, "get_context", lambda _: _ContextoSpawn())
+    acumulador = AcumuladorResultados(
+        pd.DataFrame({"Id": [str(i) for i in range(6)]}), "Id"
+    )
+    controlador = ControladorConcurrencia()
+    vistas: list[int] = []
+
+    def registrar_procesada(_: int) -> None:
+        vistas.append(controlador.concurrencia)
+
+    metricas = MetricasVerificacion()
+    asyncio.run(
+        verificar_particionado(
+            list(range(6)),
+            acumulador,
+            PAMIVerificationRequest(),
+            registrar_procesada,
+            2,
+            metricas,
+            controlador,
+        )
+    )
+
+    # Con las dos particiones informando, la concurrencia del trabajo es la suma (3 + 4)
+    assert vistas == [3, 3, 3, 7, 7, 7]
+    assert controlador.tasa() > 0
+    # Al terminar los hijos ya no queda concurrencia que informar
+    assert controlador.concurrencia == 0
+    assert metricas.urls_verificadas_navegador == 6
+    assert all(acumulador.coincidencias)
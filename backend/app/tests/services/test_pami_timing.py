@@ -0,0 +1,45 @@
+from app.services.pami_timing import (
+    ETAPA_NAVEGACION,
+    RegistroEtapas,
+    contar_clases_error,
+    percentil,
+    resumir_latencias,
+)
+
+
+def test_percentil_rango_mas_cercano() -> None:
+    valores = [float(valor) for valor in range(1, 101)]
+    assert percentil(valores, 50) == 50.0
+    assert percentil(valores, 95) == 95.0
+    assert percentil(valores, 99) == 99.0
+    assert percentil([], 50) == 0.0
+    assert percentil([7.0], 99) == 7.0
+
+
+def test_resumir_latencias_desordenadas() -> None:
+    assert resumir_latencias([30.0, 10.0, 20.0]) == {
+        "p50": 20.0,
+        "p95": 30.0,
+        "p99": 30.0,
+    }
+
+
+def test_registro_etapas_resume_solo_etapas_medidas() -> None:
+    etapas = RegistroEtapas()
+    with etapas.medir(ETAPA_NAVEGACION):
+        pass
+    etapas.registrar(ETAPA_NAVEGACION, 100.0)
+
+    resumen = etapas.resumen()
+
+    assert list(resumen) == [ETAPA_NAVEGACION]
+    assert resumen[ETAPA_NAVEGACION]["p99"] == 100.0
+
+
+def test_contar_clases_error() -> None:
+    assert contar_clases_error(
+        [None, "TimeoutError", "TimeoutError", "ConnectError"]
+    ) == {
+        "TimeoutError": 2,
+        "ConnectError": 1,
+    }
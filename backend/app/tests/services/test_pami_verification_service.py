@@ -0,0 +1,415 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any, cast
+
+import pandas as pd
+import pytest
+from playwright.async_api import Page
+
+from app.core.config import settings
+from app.models import PAMIVerificationRequest
+from app.services import pami_verification_service
+from app.services.pami_browser_pool import ContextoPAMI, browser_pool
+from app.services.pami_classifier import CATEGORIA_COINCIDE, obtener_clasificador
+from app.services.pami_rate_controller import ControladorConcurrencia
+from app.services.pami_readiness import (
+    ESTADO_CARGADO,
+    ESTADO_LOGIN,
+    ESTADO_NO_ENCONTRADO,
+)
+from app.services.pami_resource_blocker import ContadorRecursos
+from app.services.pami_result_accumulator import AcumuladorResultados
+from app.services.pami_retry import SesionExpirada
+from app.services.pami_session import session_manager
+from app.services.pami_timing import RegistroEtapas
+from app.services.pami_verification_service import PAMIVerificationService
+
+
+def _planilla() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Id": [10, 20, 10, 30, 20],
+            "Paciente": ["Ana", "Beto", "Ana", "Carla", "Beto"],
+            "Diagnostico": ["A1", "B1", "A2", "C1", "B2"],
+        }
+    )
+
+
+class _Respuesta:
+    def __init__(self, status: int) -> None:
+        self.status = status
+
+
+class _Pagina:
+    """Página falsa: cada ID responde los códigos de `respuestas` en orden y después 200"""
+
+    def __init__(self, respuestas: dict[str, list[int]], visitas: list[str]) -> None:
+        self._respuestas = respuestas
+        self._visitas = visitas
+        self._url = ""
+        self._cerrada = False
+
+    async def goto(self, url: str, **_: Any) -> _Respuesta:
+        self._url = url
+        url_id = url.rsplit("/", 1)[-1]
+        self._visitas.append(url_id)
+        pendientes = self._respuestas.get(url_id, [])
+        return _Respuesta(pendientes.pop(0) if pendientes else 200)
+
+    async def content(self) -> str:
+        # Coinciden los IDs múltiplos de 20, como en navegador_simulado
+        return (
+            settings.PAMI_SEARCH_TEXT
+            if int(self._url.rsplit("/", 1)[-1]) % 20 == 0
+            else "sin datos"
+        )
+
+    async def title(self) -> str:
+        return ""
+
+    def is_closed(self) -> bool:
+        return self._cerrada
+
+    async def close(self) -> None:
+        self._cerrada = True
+
+
+class _Contexto:
+    def __init__(self) -> None:
+        self.recursos = ContadorRecursos()
+        self.navegaciones = 0
+        self.vencido = False
+
+    def registrar_navegacion(self) -> None:
+        self.navegaciones += 1
+
+
+@pytest.fixture
+def pool_falso(
+    monkeypatch: pytest.MonkeyPatch,
+) -> tuple[dict[str, list[int]], list[str]]:
+    """
+    Reemplaza Playwright por páginas falsas pero recorre el camino real de los
+    trabajadores del navegador (controlador, reintentos y clasificación).
+
+    Returns:
+        (códigos de respuesta por ID a configurar en el test, IDs visitados en orden)
+    """
+    respuestas: dict[str, list[int]] = {}
+    visitas: list[str] = []
+
+    @asynccontextmanager
+    async def contexto(_storage_state: Any = None) -> AsyncIterator[_Contexto]:
+        yield _Contexto()
+
+    @asynccontextmanager
+    async def pagina(_contexto: _Contexto) -> AsyncIterator[_Pagina]:
+        yield _Pagina(respuestas, visitas)
+
+    async def asegurar_sesion(*_: Any) -> None:
+        return None
+
+    async def esperar_contenido(*_: Any) -> str:
+        return ESTADO_CARGADO
+
+    monkeypatch.setattr(browser_pool, "contexto", contexto)
+    monkeypatch.setattr(browser_pool, "pagina", pagina)
+    monkeypatch.setattr(session_manager, "asegurar_sesion", asegurar_sesion)
+    monkeypatch.setattr(
+        pami_verification_service, "esperar_contenido", esperar_contenido
+    )
+    monkeypatch.setattr(settings, "PAMI_RETRY_BACKOFF_SECONDS", 0.001)
+    monkeypatch.setattr(settings, "PAMI_RETRY_BACKOFF_MAX_SECONDS", 0.002)
+    monkeypatch.setattr(settings, "PAMI_RETRY_MAX_ATTEMPTS", 3)
+    return respuestas, visitas
+
+
+@pytest.fixture
+def navegador_simulado(monkeypatch: pytest.MonkeyPatch) -> list[list[str]]:
+    """Reemplaza la verificación con Playwright: coinciden los IDs múltiplos de 20"""
+    visitados: list[list[str]] = []
+
+    async def verificar_posiciones(
+        posiciones: list[int],
+        acumulador: AcumuladorResultados,
+        _request_data: PAMIVerificationRequest,
+        registrar_procesada: Callable[[int], None],
+        _controlador: ControladorConcurrencia,
+    ) -> ContadorRecursos:
+        visitados.append([acumulador.url_ids[posicion] for posicion in posiciones])
+        for posicion in posiciones:
+            acumulador.registrar(
+                posicion, int(acumulador.url_ids[posicion]) % 20 == 0, latencia_ms=1.0
+            )
+            registrar_procesada(posicion)
+        return ContadorRecursos()
+
+    monkeypatch.setattr(settings, "PAMI_VERDICT_CACHE_ENABLED", False)
+    monkeypatch.setattr(
+        PAMIVerificationService,
+        "_verificar_posiciones_navegador",
+        staticmethod(verificar_posiciones),
+    )
+    return visitados
+
+
+def test_verificar_urls_deduplica_ids(navegador_simulado: list[list[str]]) -> None:
+    progreso: list[tuple[int, int]] = []
+    resultados = asyncio.run(
+        PAMIVerificationService._verificar_urls(
+            _planilla(),
+            PAMIVerificationRequest(columnas_adicionales=["Paciente", "Diagnostico"]),
+            progreso=lambda procesadas, total: progreso.append((procesadas, total)),
+        )
+    )
+
+    assert navegador_simulado == [["10", "20", "30"]]
+    assert resultados["metricas"].ids_unicos == 3
+    df_resultados = resultados["df_resultados"]
+    assert df_resultados["Diagnostico"].tolist() == ["A1", "B1", "A2", "C1", "B2"]
+    assert df_resultados["Coincide"].tolist() == [False, True, False, False, True]
+    assert progreso[-1] == (5, 5)
+
+
+def test_verificar_urls_reanuda_con_duplicados(
+    navegador_simulado: list[list[str]],
+) -> None:
+    resultados = asyncio.run(
+        PAMIVerificationService._verificar_urls(
+            _planilla(),
+            PAMIVerificationRequest(columnas_adicionales=["Paciente", "Diagnostico"]),
+            verificados_previos={"10": (True, None)},
+        )
+    )
+
+    assert navegador_simulado == [["20", "30"]]
+    assert resultados["df_resultados"]["Coincide"].tolist() == [
+        True,
+        True,
+        True,
+        False,
+        True,
+    ]
+
+
+def test_verificar_urls_reanuda_conservando_categorias(
+    navegador_simulado: list[list[str]],
+) -> None:
+    resultados = asyncio.run(
+        PAMIVerificationService._verificar_urls(
+            _planilla(),
+            PAMIVerificationRequest(
+                columnas_adicionales=["Paciente"], predicados={"rechazada": "Rechazada"}
+            ),
+            verificados_previos={"10": (False, "rechazada")},
+        )
+    )
+
+    assert navegador_simulado == [["20", "30"]]
+    # Las dos filas del ID verificado antes de la interrupción conservan su categoría
+    assert resultados["urls_por_categoria"] == {
+        "rechazada": 2,
+        "coincide": 2,
+        "sin_coincidencia": 1,
+    }
+    assert resultados["df_por_categoria"]["rechazada"]["Paciente"].tolist() == [
+        "Ana",
+        "Ana",
+    ]
+
+
+def test_ejecutar_verificacion_con_la_planilla_ya_leida(
+    navegador_simulado: list[list[str]], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def no_leer(*_: Any) -> pd.DataFrame:
+        raise AssertionError("La planilla ya leída no se vuelve a parsear")
+
+    monkeypatch.setattr(
+        PAMIVerificationService, "_obtener_datos_excel", staticmethod(no_leer)
+    )
+    resultado = asyncio.run(
+        PAMIVerificationService.ejecutar_verificacion(
+            _planilla(),
+            PAMIVerificationRequest(columnas_adicionales=["Paciente", "Diagnostico"]),
+        )
+    )
+    resultado.cerrar()
+
+    assert navegador_simulado == [["10", "20", "30"]]
+    assert resultado.estadisticas.total_urls == 5
+    assert resultado.estadisticas.urls_coincidentes == 2
+
+
+def test_verificar_urls_cancelada_conserva_resultados_parciales(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    liberado: list[bool] = []
+
+    async def verificar_posiciones(
+        posiciones: list[int],
+        acumulador: AcumuladorResultados,
+        _request_data: PAMIVerificationRequest,
+        registrar_procesada: Callable[[int], None],
+        _controlador: ControladorConcurrencia,
+    ) -> ContadorRecursos:
+        acumulador.registrar(posiciones[0], True, latencia_ms=1.0)
+        registrar_procesada(posiciones[0])
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            # Acá el motor real cierra las páginas y el contexto prestados
+            liberado.append(True)
+        return ContadorRecursos()
+
+    monkeypatch.setattr(settings, "PAMI_VERDICT_CACHE_ENABLED", False)
+    monkeypatch.setattr(
+        PAMIVerificationService,
+        "_verificar_posiciones_navegador",
+        staticmethod(verificar_posiciones),
+    )
+
+    async def ejecutar() -> dict[str, Any]:
+        cancelacion = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.05, cancelacion.set)
+        return await PAMIVerificationService._verificar_urls(
+            _planilla(),
+            PAMIVerificationRequest(columnas_adicionales=["Paciente", "Diagnostico"]),
+            cancelacion=cancelacion,
+        )
+
+    resultados = asyncio.run(ejecutar())
+
+    assert liberado == [True]
+    assert resultados["urls_sin_verificar"] == 3
+    assert resultados["df_resultados"]["Estado"].tolist() == [
+        "coincide",
+        "sin_verificar",
+        "coincide",
+        "sin_verificar",
+        "sin_verificar",
+    ]
+    assert resultados["df_no_coincidentes"].empty
+
+
+def test_navegador_reintenta_errores_del_servidor(
+    pool_falso: tuple[dict[str, list[int]], list[str]],
+) -> None:
+    respuestas, visitas = pool_falso
+    # 20 se recupera al segundo intento; 30 responde 503 en todos los intentos
+    respuestas.update({"20": [503], "30": [503, 503, 503]})
+    acumulador = AcumuladorResultados(pd.DataFrame({"Id": [10, 20, 30]}), "Id")
+
+    asyncio.run(
+        PAMIVerificationService._verificar_posiciones_navegador(
+            [0, 1, 2],
+            acumulador,
+            PAMIVerificationRequest(batch_size=1),
+            lambda _: None,
+            ControladorConcurrencia(),
+        )
+    )
+
+    assert visitas.count("20") == 2
+    assert visitas.count("30") == 3
+    assert acumulador.estado(1) == "coincide"
+    assert acumulador.reintentos[1] == 1
+    # Una página 503 no se registra como una no coincidencia real
+    assert acumulador.estado(2) == "error"
+    assert acumulador.clases_error[2] == "servidor"
+    assert acumulador.estado(0) == "no_coincide"
+
+
+@pytest.mark.usefixtures("pool_falso")
+def test_navegador_solo_cuenta_turnos_con_trabajo() -> None:
+    acumulador = AcumuladorResultados(pd.DataFrame({"Id": [10, 20, 30]}), "Id")
+    controlador = ControladorConcurrencia()
+
+    asyncio.run(
+        PAMIVerificationService._verificar_posiciones_navegador(
+            [0, 1, 2],
+            acumulador,
+            PAMIVerificationRequest(batch_size=3),
+            lambda _: None,
+            controlador,
+        )
+    )
+
+    # Los trabajadores que encuentran la cola vacía no suman éxitos al controlador
+    assert len(controlador._finalizados) == 3
+
+
+def test_navegador_recorta_concurrencia_ante_errores_del_servidor(
+    pool_falso: tuple[dict[str, list[int]], list[str]],
+) -> None:
+    respuestas, _ = pool_falso
+    acumulador = AcumuladorResultados(pd.DataFrame({"Id": [10, 20, 30, 40]}), "Id")
+
+    def verificar(controlador: ControladorConcurrencia) -> None:
+        asyncio.run(
+            PAMIVerificationService._verificar_posiciones_navegador(
+                [0, 1, 2, 3],
+                acumulador,
+                PAMIVerificationRequest(batch_size=4),
+                lambda _: None,
+                controlador,
+            )
+        )
+
+    sano = ControladorConcurrencia()
+    verificar(sano)
+    assert sano.concurrencia >= 4
+
+    # Todas las páginas responden 503: el controlador AIMD tiene que retroceder
+    respuestas.update({url_id: [503, 503, 503] for url_id in ("10", "20", "30", "40")})
+    saturado = ControladorConcurrencia()
+    verificar(saturado)
+    assert saturado.concurrencia < 4
+    assert acumulador.clases_error == ["servidor"] * 4
+
+
+def test_verificar_url_renueva_la_sesion_cuando_aparece_el_login(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    estados: list[str] = []
+    renovaciones: list[int] = []
+
+    async def esperar_contenido(*_: Any) -> str:
+        return estados.pop(0)
+
+    async def renovar(*_: Any) -> None:
+        renovaciones.append(1)
+
+    monkeypatch.setattr(
+        pami_verification_service, "esperar_contenido", esperar_contenido
+    )
+    monkeypatch.setattr(session_manager, "renovar", renovar)
+
+    def verificar() -> str:
+        visitas: list[str] = []
+        return asyncio.run(
+            PAMIVerificationService._verificar_url(
+                cast(Page, _Pagina({}, visitas)),
+                cast(ContextoPAMI, _Contexto()),
+                "20",
+                f"{settings.PAMI_BASE_URL}20",
+                RegistroEtapas(),
+                obtener_clasificador(),
+            )
+        )
+
+    # Login y, después de renovar, la página carga: se clasifica normalmente
+    estados.extend([ESTADO_LOGIN, ESTADO_CARGADO])
+    assert verificar() == CATEGORIA_COINCIDE
+    assert renovaciones == [1]
+
+    # Sigue pidiendo login después de renovar: error de sesión en lugar de "no coincide"
+    estados.extend([ESTADO_LOGIN, ESTADO_LOGIN])
+    with pytest.raises(SesionExpirada):
+        verificar()
+    assert renovaciones == [1, 1]
+
+    # Sin login no se renueva la sesión
+    estados.append(ESTADO_NO_ENCONTRADO)
+    assert verificar() == CATEGORIA_COINCIDE
+    assert renovaciones == [1, 1]
@@ -0,0 +1,55 @@
+from sqlmodel import Session
+
+from app import crud
+from app.models import PAMIVerificationJob, PAMIVerificationRequest, PAMIVerificationRun
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_pami_job(db: Session) -> PAMIVerificationJob:
+    user = create_random_user(db)
+    owner_id = user.id
+    assert owner_id is not None
+    nombre_archivo = f"{random_lower_string()}.xlsx"
+    return crud.create_pami_verification_job(
+        session=db,
+        owner_id=owner_id,
+        nombre_archivo=nombre_archivo,
+        request_data=PAMIVerificationRequest(),
+    )
+
+
+def create_random_pami_run(db: Session, url_id: str) -> PAMIVerificationRun:
+    user = create_random_user(db)
+    owner_id = user.id
+    assert owner_id is not None
+    run = PAMIVerificationRun(
+        owner_id=owner_id,
+        origen="verify-excel",
+        nombre_archivo=f"{random_lower_string()}.xlsx",
+        motor="browser",
+        total_urls=2,
+        urls_coincidentes=1,
+        urls_no_coincidentes=1,
+    )
+    registros = [
+        {
+            "posicion": 0,
+            "url_id": url_id,
+            "paciente": "Ana",
+            "fecha": None,
+            "estado": "coincide",
+            "categoria": "coincide",
+            "clase_error": None,
+        },
+        {
+            "posicion": 1,
+            "url_id": random_lower_string(),
+            "paciente": "Beto",
+            "fecha": None,
+            "estado": "no_coincide",
+            "categoria": "sin_coincidencia",
+            "clase_error": None,
+        },
+    ]
+    return crud.create_pami_verification_run(session=db, run=run, registros=registros)